@@ -1,53 +1,225 @@
 import streamlit as st
 import google.generativeai as genai
+import importlib.util
 import os
-from supabase import create_client, Client
+import queue
+import threading
+from concurrent.futures import Future
+from supabase_pool import SupabasePool
+from novel_archive import NovelArchive, archive_path_for
+from story_store import ChapterCache, StoryStore, SupabaseReplicator
+from history_manager import summarize_locally
+from story_search import DEFAULT_EMBEDDING_MODEL, StorySearchIndex
+from novel_export import FORMATS, export_novel, novel_fingerprint
+from novel_browser import fetch_chapter_contents, fetch_chapter_list, fetch_title_page, local_title_page
+from story_settings import StorySettings, build_chapter_request, build_settings_prefix
+from prompt_prefix import PromptPrefixCache
+from world_state import EXTRACTION_MODEL, WorldState, update_world_state
+from token_budget import MetricsTable, check_context, estimate_tokens, timed_generate
+from draft_generator import RateLimiter, generate_drafts, rank_drafts
+
+# 생성 지표(토큰 수, 지연 시간, 추정 비용) 기록용 로컬 테이블
+@st.cache_resource
+def get_metrics_table():
+    return MetricsTable()
+
+# Supabase 연결 풀 (프로세스 전체의 모든 세션이 하나의 클라이언트를 공유)
+@st.cache_resource
+def get_supabase_pool():
+    url = st.secrets["supabase"]["url"]
+    key = st.secrets["supabase"]["key"]
+    return SupabasePool(url, key)
 
 # Supabase 클라이언트 초기화
 def init_supabase():
-    url = st.secrets["supabase"]["url"]
-    key = st.secrets["supabase"]["key"]
-    return create_client(url, key)
+    return get_supabase_pool().client()
 
-# Supabase에 저장하는 함수
-def save_to_supabase(title, chapter, contents):
+def supabase_available():
     try:
-        # Supabase 연결
-        client = init_supabase()
-        
-        # 테이블에 저장
-        response = client.table('stories').insert({
-            "title": title,
-            "chapter": chapter,
-            "contents": contents
-        }).execute()
-
-        # 응답에서 상태 코드 및 데이터를 확인
-        if response.data:  # 데이터가 존재하면 성공 처리
-            st.success("소설이 Supabase에 성공적으로 저장되었습니다.")
-        elif response.error:  # 오류가 존재하면 오류 처리
-            st.error(f"Supabase 저장 실패: {response.error['message']}")
-        else:  # 그 외의 경우
-            st.warning("알 수 없는 오류 발생")
-
+        get_supabase_pool()
+        return True
+    except Exception:
+        return False  # Supabase 설정이 없으면 로컬 저장소만 사용
+
+# 로컬 소설 저장소 (원본 데이터). Supabase에는 백그라운드 스레드가 묶어서 동기화합니다.
+@st.cache_resource
+def get_story_store():
+    store = StoryStore()
+    try:
+        pool = get_supabase_pool()
+    except Exception:
+        pool = None  # Supabase 설정이 없으면 로컬에만 저장
+    if pool is not None:
+        SupabaseReplicator(store, pool).start()
+    # 회차를 저장할 때마다 검색 색인도 해당 회차만 갱신 (임베딩이 느릴 수 있으므로 백그라운드에서)
+    store.background_listeners.append(get_search_index().index_chapter)
+    return store
+
+# 최근에 본 회차 본문 LRU 캐시 (세션에는 회차 번호와 요약만 보관)
+@st.cache_resource
+def get_chapter_cache():
+    return ChapterCache(get_story_store(), capacity=64)
+
+def load_history_text(entry):
+    return get_chapter_cache().get(entry['title'], entry['chapter'])
+
+# 저장된 모든 회차의 검색 색인 (sentence-transformers가 있으면 의미 검색도 사용)
+@st.cache_resource
+def get_search_index():
+    embedding_model = DEFAULT_EMBEDDING_MODEL if importlib.util.find_spec("sentence_transformers") else None
+    return StorySearchIndex(embedding_model=embedding_model)
+
+
+# 소설 아카이브 저장 함수 (소설 한 편 = 파일 하나, 회차는 압축 블록으로 덧붙임)
+def save_chapter_to_archive(title, chapter_number, text, save_path="./MyGreatNovel"):
+    archive_path = archive_path_for(title, save_path)
+    NovelArchive(archive_path).append_chapter(chapter_number, text)
+    return archive_path
+
+# 소설 불러오기 화면 조회 (Supabase가 없으면 로컬 저장소만 조회)
+# 목록과 본문 모두 짧게 캐시하고, 회차를 저장하면 해당 항목을 바로 비움
+@st.cache_data(ttl=60, show_spinner=False)
+def load_title_page(page):
+    if not supabase_available():
+        return local_title_page(get_story_store(), page)
+    return fetch_title_page(init_supabase(), page)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_chapter_list(title):
+    if not supabase_available():
+        return []  # 로컬 회차는 화면에서 get_story_store().list_chapters로 합침
+    return fetch_chapter_list(init_supabase(), title)
+
+@st.cache_data(ttl=60, max_entries=500, show_spinner=False)
+def fetch_remote_chapter_contents(title, chapter):
+    if not supabase_available():
+        return None
+    return fetch_chapter_contents(init_supabase(), title, chapter)
+
+def load_chapter_contents(title, chapter):
+    # 로컬 저장소가 원본이므로 먼저 확인 (방금 저장했거나 덮어쓴 회차도 동기화 전에 바로 보임)
+    contents = get_chapter_cache().get(title, chapter)
+    if contents is not None:
+        return contents
+    return fetch_remote_chapter_contents(title, chapter)
+
+# 고정 프롬프트 앞부분 재사용 (Gemini 컨텍스트 캐시 또는 로컬 압축 대체)
+@st.cache_resource
+def get_prefix_cache():
+    return PromptPrefixCache()
+
+# 모든 세션이 공유하는 Gemini 호출 제한 (동시 초안 요청도 이 한도를 따름)
+@st.cache_resource
+def get_rate_limiter():
+    return RateLimiter(max_concurrent=4, per_minute=15)
+
+# 인물/세계 상태 추출 작업 큐 (회차를 먼저 보여주고 추출은 백그라운드에서 차례로 실행)
+@st.cache_resource
+def get_world_state_queue():
+    jobs = queue.Queue()
+    def run():
+        # 작업자 하나가 저장 순서대로 처리하므로 N화 추출은 항상 N-1화 상태 위에서 실행됨
+        while True:
+            args, future = jobs.get()
+            try:
+                future.set_result(refresh_world_state(*args))
+            except Exception as e:
+                future.set_exception(e)
+    threading.Thread(target=run, name="world-state", daemon=True).start()
+    return jobs
+
+def submit_world_state(*args):
+    future = Future()
+    get_world_state_queue().put((args, future))
+    return future
+
+# 회차별 인물/세계 상태 (소설과 함께 로컬 저장소에 보관, 작업자 스레드에서 실행)
+def refresh_world_state(store, rate_limiter, api_key, title, chapter_number, text, settings):
+    row = store.load_world_state(title, before_chapter=chapter_number)
+    state = WorldState.from_json(row[1]) if row else WorldState.seed(settings)
+    # 빠진 회차 없이 모든 회차가 모델로 추출된 상태 위에서만 이번 상태도 믿을 수 있음
+    base_trusted = (row[2] and row[0] == chapter_number - 1) if row else chapter_number == 1
+    generate = None
+    if api_key:
+        # 저렴한 모델로 JSON만 추출 (실패하면 로컬 추출로 대체)
+        extractor = genai.GenerativeModel(
+            EXTRACTION_MODEL, generation_config={"response_mime_type": "application/json"}
+        )
+        def generate(prompt):
+            # 회차 생성과 같은 호출 제한을 따름
+            with rate_limiter:
+                return extractor.generate_content(prompt).text
+    state, used_model = update_world_state(state, chapter_number, text, generate)
+    # 로컬 추출 결과도 다음 추출의 기반으로 저장하되, 프롬프트에서 믿을 수 있는지 표시
+    store.save_world_state(title, chapter_number, state.to_json(), used_model and base_trusted)
+    return state, used_model
+
+def show_world_state_job():
+    """
+    이전 실행에서 맡긴 상태 추출 작업의 결과를 한 번 보여줍니다.
+    """
+    job = st.session_state.get('world_state_job')
+    if not job:
+        return
+    chapter_number, future = job
+    if not future.done():
+        st.caption(f"🗺️ {chapter_number}화 인물·세계 상태를 백그라운드에서 갱신하는 중입니다.")
+        return
+    del st.session_state['world_state_job']
+    try:
+        state, used_model = future.result()
+    except Exception as e:
+        st.warning(f"⚠️ {chapter_number}화 인물·세계 상태 갱신 중 오류가 발생했습니다: {e}")
+        return
+    st.caption(
+        f"🗺️ {chapter_number}화 인물·세계 상태 갱신 ({'모델 추출' if used_model else '로컬 추출'}): "
+        f"인물 {len(state.characters)}명, 진행 중인 사건 {len(state.open_threads)}개"
+    )
+
+# 생성된 회차를 로컬 저장소, 세션, 파일에 저장하고 화면에 표시하는 함수
+def save_chapter(title, chapter_number, result_text, settings=None):
+    # 로컬 저장소에 커밋되면 바로 완료 처리 (Supabase 전송은 백그라운드에서 진행)
+    try:
+        get_story_store().save_chapter(title, chapter_number, result_text)
+        st.success(f"소설 {chapter_number}화가 저장되었습니다. Supabase 동기화는 백그라운드에서 진행됩니다.")
+    except Exception as e:
+        st.error(f"⚠️ 로컬 저장소 저장 중 오류가 발생했습니다: {e}")
+    # 목록 캐시와 이 회차의 원격 본문 캐시는 새 내용이 보이도록 비움
+    load_title_page.clear()
+    load_chapter_list.clear()
+    fetch_remote_chapter_contents.clear(title, chapter_number)
+
+    # 세션 상태에는 회차 식별자와 요약만 추가 (본문은 저장소에서 필요할 때 읽음)
+    st.session_state['history'].append({
+        "title": title,
+        "chapter": chapter_number,
+        "summary": summarize_locally(result_text, max_chars=120),
+    })
+
+    # 파일 저장
+    try:
+        file_path = save_chapter_to_archive(title, chapter_number, result_text)
+        st.success(f"소설 {chapter_number}화가 {file_path}에 저장되었습니다.")
     except Exception as e:
-        st.error(f"⚠️ Supabase 저장 중 오류가 발생했습니다: {e}")
+        st.error(f"⚠️ 파일 저장 중 오류가 발생했습니다: {e}")
 
+    st.markdown("---")
+    st.subheader(f"📘 생성된 소설 ({chapter_number}화)")
+    st.write(result_text)
 
-# 텍스트 파일 저장 함수
-def save_text_to_file(text, file_name, save_path):
-    os.makedirs(save_path, exist_ok=True)
-    file_path = os.path.join(save_path, file_name)
-    with open(file_path, 'w', encoding='utf-8') as file:
-        file.write(text)
-    return file_path
+    # 다음 회차 프롬프트에 넣을 인물/세계 상태는 화면을 그린 뒤 백그라운드에서 갱신
+    # (다음 생성 시점에 저장된 상태가 직전 회차까지 반영돼 있으면 사용하고, 아니면 이전 회차 전체를 보냄)
+    if settings is not None and track_world_state:
+        st.session_state['world_state_job'] = (chapter_number, submit_world_state(
+            get_story_store(), get_rate_limiter(), gemini_api_key, title, chapter_number, result_text, settings,
+        ))
 
 # 페이지 설정
 st.set_page_config(page_title="AI 소설 생성기", layout="wide")
 
 # 사이드바 메뉴
 st.sidebar.title("📚 메뉴")
-menu = st.sidebar.radio("이동할 화면을 선택하세요", ["초기 세팅", "히스토리 확인", "소설 불러오기"])
+menu = st.sidebar.radio("이동할 화면을 선택하세요", ["초기 세팅", "히스토리 확인", "소설 불러오기", "소설 검색", "소설 내보내기"])
 
 
 # Gemini API Key 입력
@@ -60,6 +232,24 @@ model_choice = st.sidebar.selectbox(
     '🧠 사용할 모델:',
     ('gemini-1.5-flash', 'gemini-2.5-flash')
 )
+compact_settings = st.sidebar.checkbox(
+    "설정을 압축 형식(JSON)으로 전송",
+    value=False,
+    help="소설 기본 설정을 한 줄 JSON으로 보내 프롬프트 토큰을 줄입니다."
+)
+track_world_state = st.sidebar.checkbox(
+    "인물·세계 상태 추적",
+    value=True,
+    help="회차마다 인물·관계·장소·진행 중인 사건을 추출해, 이전 회차 전체 대신 상태 표와 직전 회차만 보냅니다."
+)
+pending_sync = get_story_store().pending_count()
+if pending_sync:
+    st.sidebar.caption(f"☁️ Supabase 동기화 대기 중: {pending_sync}건")
+draft_count = st.sidebar.number_input(
+    "✍️ 동시에 생성할 초안 수",
+    min_value=1, max_value=4, value=1, step=1,
+    help="2 이상이면 여러 초안을 동시에 요청하고, 분량·반복·인물 이름 기준으로 순위를 매겨 비교할 수 있습니다."
+)
 
 # 모델 초기화
 if gemini_api_key:
@@ -211,29 +401,14 @@ if menu == "초기 세팅":
             ["부모", "형제", "친구", "악당", "조력자", "스승", "제자", "배우자", "연인"],
             default=st.session_state['main_character_relationship']
         )
-        
-    user_prompt_to_llm = f"""당신은 초인기 소설 작가입니다.
-                아래 정보를 기반으로 2500자 이내의 소설 {len(st.session_state['history'])+1}화를 작성해주세요.
-            
-
-                1. 시점: {st.session_state['perspective']}
-                2. 장르: {", ".join(st.session_state['novel_genre'])}
-                3. 문체: {", ".join(st.session_state['literary_style'])}
-                4. 주제: {", ".join(st.session_state['theme'])}
-                5. 시간적 배경: {", ".join(st.session_state['background_time'])}
-                6. 공간적 배경: {", ".join(st.session_state['background_space'])}
-                7. 사회적 환경: {", ".join(st.session_state['background_social'])}
-                8. 주인공 이름: {name}, 나이: {age}, 성별: {gender}, 직업: {job}
-                9. 주인공 배경: {", ".join(st.session_state['main_character_background'])}
-                10. 주인공 외모: {", ".join(st.session_state['main_character_appearance'])}
-                11. 주인공 능력: {", ".join(st.session_state['main_character_ability'])}
-                12. 주인공 초능력: {", ".join(st.session_state['main_character_superpower'])}
-                13. 주인공 성격: {", ".join(st.session_state['main_character_personality'])}
-                14. 주인공 주변 관계: {", ".join(st.session_state['main_character_relationship'])}
-                """
+
+    show_world_state_job()
+
+    # 설정 객체 (설정이 같으면 프롬프트 블록은 캐시된 결과를 재사용)
+    story_settings = StorySettings.from_session(st.session_state, name, age, gender, job)
 
     # 소설 생성 후 Supabase에 저장 (제목 포함)
-    if st.button(f"소설 {len(st.session_state['history'])+1}화 생성하기 ✨"):
+    if st.button(f"소설 {len(st.session_state['history'])+1}화 생성하기 ✨", key="generate_chapter"):
         if not gemini_api_key:
             st.error("⚠️ Gemini API 키가 설정되지 않아 소설을 생성할 수 없습니다.")
         else:
@@ -242,81 +417,103 @@ if menu == "초기 세팅":
                     # 현재 생성할 회차 번호를 가져옵니다.
                     current_chapter_number = len(st.session_state['history']) + 1
 
-                    # 1화와 그 이후의 프롬프트를 구분하여 생성
-                    if current_chapter_number == 1:
-                        # 1화 생성 시 사용할 프롬프트 (이전 내용 없이)
-                        final_prompt = f"""당신은 초인기 소설 작가입니다.
-                        아래 정보를 기반으로 2500자 이내의 소설 1화를 작성해주세요.
-                        
-                        1. 시점: {st.session_state['perspective']}
-                        2. 장르: {", ".join(st.session_state['novel_genre'])}
-                        3. 문체: {", ".join(st.session_state['literary_style'])}
-                        4. 주제: {", ".join(st.session_state['theme'])}
-                        5. 시간적 배경: {", ".join(st.session_state['background_time'])}
-                        6. 공간적 배경: {", ".join(st.session_state['background_space'])}
-                        7. 사회적 환경: {", ".join(st.session_state['background_social'])}
-                        8. 주인공 이름: {name}, 나이: {age}, 성별: {gender}, 직업: {job}
-                        9. 주인공 배경: {", ".join(st.session_state['main_character_background'])}
-                        10. 주인공 외모: {", ".join(st.session_state['main_character_appearance'])}
-                        11. 주인공 능력: {", ".join(st.session_state['main_character_ability'])}
-                        12. 주인공 초능력: {", ".join(st.session_state['main_character_superpower'])}
-                        13. 주인공 성격: {", ".join(st.session_state['main_character_personality'])}
-                        14. 주인공 주변 관계: {", ".join(st.session_state['main_character_relationship'])}
-                        """
+                    # 2화 이상은 이전 내용 포함 (상태 표가 최신이면 상태 표 + 직전 회차만)
+                    previous_content = ""
+                    world_state_table = ""
+                    if current_chapter_number > 1:
+                        last_entry = st.session_state['history'][-1]
+                        state_row = get_story_store().load_world_state(
+                            last_entry['title'], before_chapter=current_chapter_number
+                        ) if track_world_state else None
+                        # 직전 회차까지 모델이 추출한 상태일 때만 이전 회차 전체를 상태 표로 대신함
+                        if state_row and state_row[0] == current_chapter_number - 1 and state_row[2]:
+                            world_state_table = WorldState.from_json(state_row[1]).render_table()
+                            previous_content = load_history_text(last_entry) or ""
+                        else:
+                            previous_content = "\n\n".join(
+                                load_history_text(entry) or "" for entry in st.session_state['history']
+                            )
+                    chapter_request = build_chapter_request(current_chapter_number, previous_content, world_state_table)
+
+                    # 고정 앞부분(시스템 프롬프트 + 설정)은 재사용하고 달라진 부분만 전송
+                    settings_prefix = build_settings_prefix(story_settings)
+                    compact_prefix = build_settings_prefix(story_settings, compact=True)
+                    request_model, prompt_parts, prefix_mode = get_prefix_cache().prepare(
+                        model, model_choice, system_prompt, settings_prefix, compact_prefix, chapter_request,
+                        compact=compact_settings, account=gemini_api_key,
+                    )
+
+                    # 요청 전 토큰 수를 추정하고 컨텍스트 초과 여부를 확인 (캐시된 앞부분도 컨텍스트에 포함)
+                    context_warning = check_context(model_choice, PromptPrefixCache.context_tokens(
+                        system_prompt, settings_prefix, compact_prefix, chapter_request, compact=compact_settings
+                    ))
+                    if context_warning:
+                        st.warning(f"⚠️ {context_warning}")
+
+                    if draft_count == 1:
+                        # 모델에 프롬프트 요청
+                        response, latency, prompt_tokens, completion_tokens = timed_generate(request_model, prompt_parts)
+                        result_text = response.text
+                        cost = get_metrics_table().record(
+                            "GenStory_deploy", model_choice, prompt_tokens, completion_tokens, latency,
+                            title=novel_title, chapter=current_chapter_number
+                        )
+                        st.caption(
+                            f"🧮 입력 {prompt_tokens:,} 토큰 / 출력 {completion_tokens:,} 토큰, "
+                            f"{latency:.1f}초, 추정 비용 ${cost:.4f}, 앞부분 재사용: {prefix_mode}"
+                        )
+                        save_chapter(novel_title, current_chapter_number, result_text, story_settings)
                     else:
-                        # 2화 이상 생성 시 사용할 프롬프트 (이전 내용 포함)
-                        previous_content = "\n\n".join(st.session_state['history'])
-                        final_prompt = f"""
-                        다음 정보를 바탕으로 **바로 직전의 내용에 이어서** 소설 {current_chapter_number}화를 작성해주세요.
-                        이전 회차의 내용을 참고하여 스토리가 자연스럽게 이어지도록 해주세요.
-                        
-                        --- 이전 회차 내용 ---
-                        {previous_content}
-                        ---
-                        
-                        다음은 소설의 기본 설정입니다.
-                        1. 시점: {st.session_state['perspective']}
-                        2. 장르: {", ".join(st.session_state['novel_genre'])}
-                        3. 문체: {", ".join(st.session_state['literary_style'])}
-                        4. 주제: {", ".join(st.session_state['theme'])}
-                        5. 시간적 배경: {", ".join(st.session_state['background_time'])}
-                        6. 공간적 배경: {", ".join(st.session_state['background_space'])}
-                        7. 사회적 환경: {", ".join(st.session_state['background_social'])}
-                        8. 주인공 이름: {name}, 나이: {age}, 성별: {gender}, 직업: {job}
-                        9. 주인공 배경: {", ".join(st.session_state['main_character_background'])}
-                        10. 주인공 외모: {", ".join(st.session_state['main_character_appearance'])}
-                        11. 주인공 능력: {", ".join(st.session_state['main_character_ability'])}
-                        12. 주인공 초능력: {", ".join(st.session_state['main_character_superpower'])}
-                        13. 주인공 성격: {", ".join(st.session_state['main_character_personality'])}
-                        14. 주인공 주변 관계: {", ".join(st.session_state['main_character_relationship'])}
-                        """
-
-                    # 모델에 프롬프트 요청
-                    response = model.generate_content([system_prompt, final_prompt])
-                    result_text = response.text
-
-                    # Supabase에 저장
-                    save_to_supabase(novel_title, current_chapter_number, result_text)
-
-                    # 세션 상태에 추가
-                    st.session_state['history'].append(result_text)
-
-                    # 파일 저장
-                    save_path = "./MygreatNovel"
-                    file_name = f"chapter_{current_chapter_number:02d}.txt"
-                    try:
-                        file_path = save_text_to_file(result_text, file_name, save_path)
-                        st.success(f"소설 {current_chapter_number}화가 {file_path}에 저장되었습니다.")
-                    except Exception as e:
-                        st.error(f"⚠️ 파일 저장 중 오류가 발생했습니다: {e}")
-
-                    st.markdown("---")
-                    st.subheader(f"📘 생성된 소설 ({current_chapter_number}화)")
-                    st.write(result_text)
+                        # 여러 초안을 동시에 요청하고, 가장 먼저 도착한 초안을 바로 표시
+                        first_draft = st.empty()
+                        drafts = []
+                        for idx, result in generate_drafts(
+                            lambda: timed_generate(request_model, prompt_parts), draft_count, get_rate_limiter()
+                        ):
+                            if isinstance(result, Exception):
+                                st.warning(f"⚠️ 초안 {idx + 1} 생성 실패: {result}")
+                                continue
+                            response, latency, prompt_tokens, completion_tokens = result
+                            get_metrics_table().record(
+                                "GenStory_deploy", model_choice, prompt_tokens, completion_tokens, latency,
+                                title=novel_title, chapter=current_chapter_number
+                            )
+                            drafts.append(response.text)
+                            if len(drafts) == 1:
+                                with first_draft.container():
+                                    st.markdown(f"#### ⚡ 먼저 도착한 초안 ({len(drafts)}/{draft_count})")
+                                    st.write(response.text)
+                        first_draft.empty()
+
+                        if drafts:
+                            st.session_state['drafts'] = {
+                                "title": novel_title,
+                                "chapter": current_chapter_number,
+                                "ranked": rank_drafts(drafts, target_chars=2500, character_names=[name]),
+                            }
+                        else:
+                            st.error("⚠️ 초안을 하나도 생성하지 못했습니다.")
 
                 except Exception as e:
                     st.error(f"⚠️ 소설 생성 중 오류가 발생했습니다: {e}")
 
+    # 초안 비교 및 확정 (순위가 매겨진 초안 사이를 바로 전환)
+    drafts_state = st.session_state.get('drafts')
+    if drafts_state and drafts_state['chapter'] == len(st.session_state['history']) + 1:
+        st.markdown("---")
+        st.subheader(f"📝 {drafts_state['chapter']}화 초안 비교")
+        ranked = drafts_state['ranked']
+        choice = st.radio(
+            "초안을 선택하세요 (점수 순)",
+            list(range(len(ranked))),
+            format_func=lambda i: f"초안 {i + 1} · 점수 {ranked[i][0]['score']} · {ranked[i][0]['length']}자",
+            horizontal=True
+        )
+        st.write(ranked[choice][1])
+        if st.button("✅ 이 초안으로 확정"):
+            del st.session_state['drafts']
+            save_chapter(drafts_state['title'], drafts_state['chapter'], ranked[choice][1], story_settings)
+
 # =============================
 # 화면 2: 히스토리 확인
 # =============================
@@ -327,53 +524,79 @@ elif menu == "히스토리 확인":
         st.info("아직 생성된 내용이 없습니다.")
     else:
         st.markdown("### 📂 생성된 회차 목록")
-        for idx, entry in enumerate(st.session_state['history'], start=1):
-            if st.button(f"{idx:02d}화 보기"):
-                st.markdown(f"#### ✨ {idx:02d}화")
-                st.write(entry)
+        history = st.session_state['history']
+        # 회차마다 버튼을 만드는 대신 선택 상자 하나로 고르고, 고른 회차만 저장소에서 읽음
+        selected = st.selectbox(
+            "볼 회차를 선택하세요.",
+            list(range(len(history))),
+            index=len(history) - 1,
+            format_func=lambda i: f"{history[i]['chapter']:02d}화 - {history[i]['summary'][:40]}"
+        )
+        entry = history[selected]
+        st.markdown(f"#### ✨ {entry['chapter']:02d}화")
+        entry_text = load_history_text(entry)
+        if entry_text is None:
+            st.warning("저장소에서 회차 본문을 찾을 수 없습니다.")
+        else:
+            st.write(entry_text)
+
+    # 회차가 늘어날수록 프롬프트 크기와 생성 시간이 어떻게 변하는지 확인
+    metrics = get_metrics_table().rows(app="GenStory_deploy", title=st.session_state['novel_title'])
+    if metrics:
+        with st.expander("🧮 회차별 토큰 / 지연 시간"):
+            st.dataframe(metrics)
 
 # 2. 소설 불러오기 기능 추가
 if menu == "소설 불러오기":
     st.title("📜 소설 불러오기")
-    
-    client = init_supabase()
 
     if 'selected_title' not in st.session_state:
         st.session_state['selected_title'] = ""
 
     try:
-        # 소설 제목을 불러오는 쿼리 (distinct로 제목 목록만)
-        # execute() 호출 시 에러가 발생하면 바로 except 블록으로 이동합니다.
-        response = client.table('stories').select('title').execute()
-        
-        # 'raise_for_status()' 호출을 삭제합니다.
-        
-        # 중복 제거 (set 사용)
-        titles = list(set(row['title'] for row in response.data))
-
-        if not titles:
+        # 중복 없는 제목 목록을 서버에서 페이지 단위로 조회 (전체 쪽수는 첫 쪽 조회 결과로 확인)
+        _, page_count = load_title_page(1)
+        if st.session_state.get('title_page', 1) > page_count:
+            st.session_state['title_page'] = page_count  # 제목이 줄어 쪽수가 줄어든 경우
+        title_page = st.number_input("제목 목록 페이지", min_value=1, max_value=page_count, step=1, key='title_page')
+        title_rows, page_count = load_title_page(title_page)
+        st.caption(f"전체 {page_count}쪽 중 {title_page}쪽")
+
+        if not title_rows:
             st.warning("소설 제목이 없습니다. 소설을 먼저 생성해 주세요.")
         else:
-            selected_title = st.selectbox("소설 제목을 선택하세요.", titles)
+            chapter_counts = {row['title']: row['chapter_count'] for row in title_rows}
+            selected_title = st.selectbox(
+                "소설 제목을 선택하세요.",
+                list(chapter_counts),
+                format_func=lambda t: f"{t} ({chapter_counts[t]}화)"
+            )
             st.session_state['selected_title'] = selected_title
 
             if selected_title:
                 try:
-                    response_chapters = client.table('stories').select('chapter').filter('title', 'eq', selected_title).execute()
-                    
-                    
-                    chapters = [row['chapter'] for row in response_chapters.data]
-
-                    selected_chapter = st.selectbox("챕터를 선택하세요.", chapters)
+                    # 회차 번호와 글자 수를 한 번에 조회
+                    chapter_rows = load_chapter_list(selected_title)
+                    lengths = {row['chapter']: row['length'] for row in chapter_rows}
+                    # 아직 동기화되지 않은 로컬 회차도 목록에 포함
+                    lengths.update(get_story_store().list_chapters(selected_title))
+                    lengths = dict(sorted(lengths.items()))
+
+                    selected_chapter = st.selectbox(
+                        "챕터를 선택하세요.",
+                        list(lengths),
+                        format_func=lambda c: f"{c}화 ({lengths[c]:,}자)"
+                    )
 
                     if selected_chapter:
                         try:
-                            response_content = client.table('stories').select('contents').filter('title', 'eq', selected_title).filter('chapter', 'eq', selected_chapter).execute()
-                            
-
-                            chapter_content = response_content.data[0]['contents']
+                            # 본문은 (제목, 회차) 단위로 로컬 캐시
+                            chapter_content = load_chapter_contents(selected_title, selected_chapter)
                             st.subheader(f"📘 {selected_title} - {selected_chapter}화 내용")
-                            st.write(chapter_content)
+                            if chapter_content is None:
+                                st.warning("회차 본문을 찾을 수 없습니다.")
+                            else:
+                                st.write(chapter_content)
 
                         except Exception as e:
                             st.error(f"⚠️ 챕터 내용 불러오기 오류: {e}")
@@ -383,3 +606,88 @@ if menu == "소설 불러오기":
 
     except Exception as e:
         st.error(f"⚠️ 소설 제목 불러오기 오류: {e}")
+        st.info("Supabase에 sql/story_browser.sql의 조회 함수가 등록되어 있는지 확인해주세요.")
+
+
+# =============================
+# 화면 4: 소설 검색
+# =============================
+if menu == "소설 검색":
+    st.title("🔎 소설 검색")
+
+    search_index = get_search_index()
+    # 색인 전에 저장된 회차가 있으면 빠진 회차만 색인
+    store = get_story_store()
+    newly_indexed = search_index.index_missing(store.chapter_keys(), store.load_chapter)
+    if newly_indexed:
+        st.caption(f"새로 색인한 회차: {newly_indexed}개")
+
+    modes = ["정확한 구절"]
+    if search_index.semantic_available:
+        modes.append("의미 검색 (장면 찾기)")
+    mode = st.radio("검색 방식", modes, horizontal=True)
+    query = st.text_input("인물, 장소, 구절 또는 찾고 싶은 장면을 입력하세요.")
+
+    if query:
+        try:
+            if mode == "정확한 구절":
+                results, elapsed_ms = search_index.search_phrase(query)
+            else:
+                results, elapsed_ms = search_index.search_semantic(query)
+            st.caption(f"전체 {search_index.doc_count()}개 회차 검색, {len(results)}건, {elapsed_ms:.1f} ms")
+
+            if not results:
+                st.info("검색 결과가 없습니다.")
+            for result in results:
+                detail = f"{result['count']}회 등장" if "count" in result else f"유사도 {result['score']:.2f}"
+                st.markdown(f"**{result['title']} - {result['chapter']}화** · {detail}")
+                st.write(result['snippet'])
+        except Exception as e:
+            st.error(f"⚠️ 검색 중 오류가 발생했습니다: {e}")
+
+
+# =============================
+# 화면 5: 소설 내보내기
+# =============================
+if menu == "소설 내보내기":
+    st.title("📦 소설 내보내기")
+
+    store = get_story_store()
+    titles = store.titles()
+    if not titles:
+        st.info("로컬 저장소에 저장된 소설이 없습니다.")
+    else:
+        export_title = st.selectbox("내보낼 소설을 선택하세요.", titles)
+        export_format = st.radio("파일 형식", list(FORMATS), horizontal=True)
+        versions = store.chapter_versions(export_title)
+        # 만든 파일은 (제목, 형식, 회차 지문)별로 기억해 지금 고른 소설과 형식의 파일만 내려받게 함
+        export_key = (export_title, export_format, novel_fingerprint(versions))
+        export_paths = st.session_state.setdefault('export_paths', {})
+        st.caption(f"총 {len(versions)}화")
+
+        if st.button("📦 파일 만들기"):
+            try:
+                with st.spinner("회차를 하나씩 읽어 파일로 쓰는 중입니다..."):
+                    # 회차 본문은 저장소에서 하나씩 읽어 바로 파일에 씀 (책 전체를 메모리에 올리지 않음)
+                    export_path, cache_hit = export_novel(
+                        export_title, export_format,
+                        [chapter for chapter, _ in versions],
+                        lambda chapter: store.load_chapter(export_title, chapter),
+                        export_key[2],
+                    )
+                export_paths[export_key] = export_path
+                if cache_hit:
+                    st.info("💾 변경된 회차가 없어 이전에 만든 파일을 사용합니다.")
+            except Exception as e:
+                st.error(f"⚠️ 내보내기 중 오류가 발생했습니다: {e}")
+
+        export_path = export_paths.get(export_key)
+        extension, mime = FORMATS[export_format]
+        if export_path and os.path.exists(export_path):
+            with open(export_path, "rb") as export_file:
+                st.download_button(
+                    f"⬇️ {os.path.basename(export_path)} 다운로드",
+                    data=export_file,
+                    file_name=f"{export_title}.{extension}",
+                    mime=mime,
+                )
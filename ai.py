@@ -3,6 +3,7 @@ import requests
 import json
 import os # os 모듈 임포트
 from dotenv import load_dotenv # dotenv 라이브러리 임포트
+from gemini_cache import ResponseCache, make_cache_key
 
 # .env 파일에서 환경 변수 로드
 load_dotenv()
@@ -86,6 +87,16 @@ with st.expander("⚙️ 설정 (필수 사항)", expanded=True): # 기본적으
     )
 st.markdown("---")
 
+# 프로세스 전체에서 공유하는 응답 캐시
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache()
+
+GEMINI_MODEL = "gemini-2.5-flash-preview-05-20"
+
+# 정상 응답만 캐시에 저장하기 위한 오류 메시지 접두어
+ERROR_PREFIXES = ("오류:", "API 호출 중", "예상치 못한 오류")
+
 # Gemini API 호출 함수 정의
 def call_gemini_api(prompt_text: str, api_key: str) -> str:
     """
@@ -95,7 +106,7 @@ def call_gemini_api(prompt_text: str, api_key: str) -> str:
         return "오류: Gemini API 키가 입력되지 않았습니다."
 
     # Gemini API 엔드포인트 URL 및 모델 설정 (예시: gemini-2.5-flash-preview-05-20)
-    api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash-preview-05-20:generateContent?key={api_key}"
+    api_url = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key={api_key}"
 
     headers = {
         "Content-Type": "application/json"
@@ -132,6 +143,9 @@ def call_gemini_api(prompt_text: str, api_key: str) -> str:
         return f"예상치 못한 오류가 발생했습니다: {e}"
 
 # 3. 소설 생성 버튼 및 결과 표시 섹션
+use_cache = st.checkbox("동일한 설정이면 저장된 결과 재사용 (API 호출 절약)", value=False)
+response_cache = get_response_cache()
+
 if st.button("소설 프롤로그 생성하기 ✨"):
     if not gemini_api_key:
         st.error("⚠️ Gemini API 키가 설정되지 않아 프롤로그를 생성할 수 없습니다.")
@@ -150,10 +164,21 @@ if st.button("소설 프롤로그 생성하기 ✨"):
 """
         # 로딩 스피너 표시
         with st.spinner("프롤로그를 생성 중입니다... 잠시만 기다려주세요."):
-            generated_prologue = call_gemini_api(user_prompt_to_llm, gemini_api_key)
+            if use_cache:
+                generated_prologue, cache_hit = response_cache.get_or_compute(
+                    make_cache_key(GEMINI_MODEL, [user_prompt_to_llm]),
+                    lambda: call_gemini_api(user_prompt_to_llm, gemini_api_key),
+                    cacheable=lambda text: not text.startswith(ERROR_PREFIXES),
+                )
+                if cache_hit:
+                    st.info("💾 캐시된 결과를 불러왔습니다.")
+            else:
+                generated_prologue = call_gemini_api(user_prompt_to_llm, gemini_api_key)
             st.markdown("---")
             st.subheader("3. 생성된 소설 프롤로그")
             st.write(generated_prologue)
 
 # 앱 하단 정보
-st.markdown("---")
\ No newline at end of file
+st.markdown("---")
+if use_cache:
+    st.caption(response_cache.stats_caption())
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""
+의존 구문 호(arc) 그림을 matplotlib 없이 SVG로 바로 만듭니다.
+
+호 하나는 3차 베지어 곡선 하나(<path>)이고, 문장 전체가 문자열 하나로 만들어지므로
+60단어 문장도 몇 ms 안에 그려집니다. 같은 분석 결과는 lru_cache로 재사용합니다.
+호 높이는 의존 트리의 중첩 단계로 정하고, 긴 문장은 여러 줄로 나눠 그립니다.
+"""
+import html
+from functools import lru_cache
+
+# matplotlib tab20 + 추가 10가지 (간격 1~30에 대응)
+COLORS_30 = (
+    "#1f77b4", "#aec7e8", "#ff7f0e", "#ffbb78", "#2ca02c", "#98df8a", "#d62728", "#ff9896",
+    "#9467bd", "#c5b0d5", "#8c564b", "#c49c94", "#e377c2", "#f7b6d2", "#7f7f7f", "#c7c7c7",
+    "#bcbd22", "#dbdb8d", "#17becf", "#9edae5",
+    "#e61a1a", "#1ae61a", "#1a1ae6", "#e6801a", "#801ae6", "#1ae680",
+    "#993333", "#339933", "#333399", "#cc4c66",
+)
+ROOT_COLOR = "red"
+
+FONT_SIZE = 14
+CHAR_WIDTH = 8.5      # 글자 하나의 대략적인 폭 (px)
+MIN_GAP = 70          # 단어 사이 최소 간격 (px)
+LEVEL_HEIGHT = 22     # 중첩 단계 1당 호 높이 (px)
+PAGE_WORDS = 30       # 이보다 긴 문장은 여러 줄로 나눠 그림
+MARGIN = 20
+
+
+def get_color_by_distance(dist, colors=COLORS_30):
+    """
+    간격 차이에 따라 색상 반환 (1 이상 30 이하)
+    """
+    return colors[min(max(dist, 1), len(colors)) - 1]
+
+
+def sentence_key(words):
+    """
+    캐시 키로 쓸 (단어, 헤드, 의존 관계) 튜플
+    """
+    return tuple((w["text"], w["head"], w["deprel"]) for w in words)
+
+
+def word_positions(texts):
+    """
+    단어 길이에 맞춘 x 좌표(단어 중심) 목록과 전체 폭
+    """
+    positions, x = [], MARGIN
+    for text in texts:
+        width = max(MIN_GAP, len(text) * CHAR_WIDTH + 20)
+        positions.append(x + width / 2)
+        x += width
+    return positions, x + MARGIN
+
+
+def dependency_arcs(key):
+    """
+    (헤드 위치, 의존어 위치) 목록 (0부터 시작, ROOT 제외)
+    """
+    return [(head - 1, dep) for dep, (_, head, _) in enumerate(key) if head and head > 0]
+
+
+def arc_levels(arcs, n_words):
+    """
+    호마다 중첩 단계(1부터)를 구합니다. 구간 안에 끝이 있는 호들보다 한 단계 높게 그리면 겹치지 않습니다.
+    짧은 호부터 처리하면서 "왼쪽 끝 위치 -> 최대 단계", "오른쪽 끝 위치 -> 최대 단계"를
+    구간 최댓값 트리 두 개에 넣으므로 O(n log n)입니다. 오른쪽 끝만 구간 안에 있는
+    교차(비투사) 호도 안쪽으로 보므로 교차하는 두 호는 다른 높이에 그려집니다.
+    """
+    size = 1
+    while size < max(n_words, 1) + 1:
+        size *= 2
+    by_left = [0] * (2 * size)
+    by_right = [0] * (2 * size)
+
+    def query(tree, lo, hi):  # [lo, hi) 구간 최댓값
+        best = 0
+        lo += size
+        hi += size
+        while lo < hi:
+            if lo & 1:
+                best = max(best, tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                best = max(best, tree[hi])
+            lo //= 2
+            hi //= 2
+        return best
+
+    def update(tree, pos, value):
+        pos += size
+        while pos and tree[pos] < value:
+            tree[pos] = value
+            pos //= 2
+
+    levels = [0] * len(arcs)
+    for i in sorted(range(len(arcs)), key=lambda i: abs(arcs[i][1] - arcs[i][0])):
+        left, right = sorted(arcs[i])
+        # 구간 양 끝에서 맞닿기만 하는 호(right에서 시작하거나 left에서 끝나는 호)는 바깥
+        levels[i] = max(query(by_left, left, right), query(by_right, left + 1, right + 1)) + 1
+        update(by_left, left, levels[i])
+        update(by_right, right, levels[i])
+    return levels
+
+
+@lru_cache(maxsize=512)
+def layout_sentence(key):
+    """
+    문장 전체의 호와 중첩 단계 (페이지를 나눠도 같은 높이를 쓰도록 한 번만 계산)
+    """
+    arcs = dependency_arcs(key)
+    return tuple(zip(arcs, arc_levels(arcs, len(key))))
+
+
+@lru_cache(maxsize=1024)
+def render_dependency_svg(key, start=0, end=None, title="Dependency Structure"):
+    """
+    sentence_key()로 만든 키의 [start, end) 단어 구간을 SVG 문자열로 그립니다.
+    호 높이는 간격이 아니라 중첩 단계에 비례하므로 긴 문장도 낮게 그려집니다.
+    head < dep(왼쪽 → 오른쪽)는 점선, 반대는 실선, ROOT에 의존한 호는 빨간색입니다.
+    헤드가 구간 밖에 있는 단어는 위로 짧은 선과 헤드 번호를 표시합니다.
+    """
+    end = len(key) if end is None else end
+    texts = [text for text, _, _ in key[start:end]]
+    xs, width = word_positions(texts)
+    inside = [(h, d, level) for (h, d), level in layout_sentence(key) if start <= h < end and start <= d < end]
+    outside = [(h, d) for (h, d), _ in layout_sentence(key) if start <= d < end and not start <= h < end]
+
+    max_height = max([level for _, _, level in inside] + [1]) * LEVEL_HEIGHT
+    title_y = MARGIN + FONT_SIZE
+    base_y = title_y + 10 + max_height
+    height = base_y + FONT_SIZE * 2 + MARGIN
+
+    paths = []
+    for head, dep, level in inside:
+        distance = abs(dep - head) or 1
+        color = ROOT_COLOR if key[head][2] == "root" else get_color_by_distance(distance)
+        dash = ' stroke-dasharray="6 4"' if head < dep else ""
+        x1, x2 = xs[head - start], xs[dep - start]
+        # 제어점을 높이의 4/3에 두면 곡선 꼭대기가 정확히 높이 h가 됩니다.
+        control_y = base_y - level * LEVEL_HEIGHT * 4 / 3
+        paths.append(
+            f'<path d="M{x1:.1f},{base_y} C{x1:.1f},{control_y:.1f} {x2:.1f},{control_y:.1f} {x2:.1f},{base_y}" '
+            f'stroke="{color}"{dash}><title>{html.escape(key[dep][2] or "")}</title></path>'
+        )
+    stubs = []
+    for head, dep in outside:
+        x = xs[dep - start]
+        color = ROOT_COLOR if key[head][2] == "root" else get_color_by_distance(abs(dep - head))
+        arrow = "←" if head < dep else "→"
+        stubs.append(
+            f'<path d="M{x:.1f},{base_y} V{base_y - LEVEL_HEIGHT}" stroke="{color}" stroke-dasharray="2 3"/>'
+            f'<text x="{x:.1f}" y="{base_y - LEVEL_HEIGHT - 4}" font-size="{FONT_SIZE - 3}" fill="{color}">'
+            f'{arrow} {head + 1}. {html.escape(key[head][0])}</text>'
+        )
+    labels = [
+        f'<text x="{x:.1f}" y="{base_y + FONT_SIZE + 4}">{html.escape(text)}</text>'
+        for x, text in zip(xs, texts)
+    ]
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}" '
+        f'viewBox="0 0 {width:.0f} {height:.0f}" font-family="sans-serif">'
+        f'<text x="{width / 2:.1f}" y="{title_y}" font-size="{FONT_SIZE + 2}" text-anchor="middle">{html.escape(title)}</text>'
+        f'<g fill="none" stroke-width="2">{"".join(paths)}</g>'
+        f'<g stroke-width="1.5" text-anchor="middle">{"".join(stubs)}</g>'
+        f'<g font-size="{FONT_SIZE}" text-anchor="middle">{"".join(labels)}</g>'
+        "</svg>"
+    )
+
+
+def render_sentence_html(key, page_words=PAGE_WORDS):
+    """
+    Streamlit st.markdown(unsafe_allow_html=True)에 넣을 HTML.
+    key는 sentence_key() 또는 TokenTable.arc_key()의 (단어, 헤드, 의존 관계) 튜플입니다.
+    page_words보다 긴 문장은 여러 줄(페이지)로 나눠 그립니다.
+    """
+    pages = max(1, -(-len(key) // page_words))
+    svgs = []
+    for page in range(pages):
+        start = page * page_words
+        title = "Dependency Structure" if pages == 1 else f"Dependency Structure ({page + 1}/{pages})"
+        svgs.append(render_dependency_svg(key, start, min(start + page_words, len(key)), title))
+    return f'<div style="overflow-x:auto">{"".join(svgs)}</div>'
@@ -0,0 +1,104 @@
+"""
+프롬프트 고정 앞부분 재사용 벤치마크.
+
+로컬 가짜 Gemini 엔드포인트(benchmarks/fake_llm.py)를 상대로 30화를 연속 생성하면서
+1) 매번 전체 앞부분을 보내는 기존 방식(baseline)
+2) 사용자가 압축 형식을 선택했을 때 설정을 압축해 보내는 로컬 대체(compact)
+3) 컨텍스트 캐시를 한 번 만들고 달라진 부분만 보내는 제공자 캐시(provider)
+의 전송 토큰 수와 회차당 지연 시간을 비교합니다.
+
+앱의 설정 앞부분은 Gemini 최소 캐시 크기보다 작으므로, provider 모드는
+PROVIDER_MIN_TOKENS를 0으로 낮춰 캐시 경로 자체의 효과만 측정합니다.
+
+    python benchmarks/bench_prompt_prefix.py --chapters 30
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import prompt_prefix  # noqa: E402
+from benchmarks.fake_llm import FakeLLMServer, FakeModel, fake_cached_model_factory  # noqa: E402
+from prompt_prefix import PromptPrefixCache  # noqa: E402
+from story_settings import StorySettings, build_chapter_request, build_settings_prefix  # noqa: E402
+from token_budget import estimate_tokens  # noqa: E402
+
+MODEL_NAME = "gemini-2.5-flash"
+SYSTEM_PROMPT = "당신은 초인기 소설 작가입니다."
+
+SETTINGS = StorySettings(
+    perspective="3인칭 전지적 작가 시점",
+    novel_genre=("판타지", "모험"),
+    literary_style=("서정적인", "묘사적인"),
+    theme=("성장", "우정", "희생"),
+    background_time=("중세",),
+    background_space=("왕국", "숲"),
+    background_social=("계급 사회",),
+    name="이서준", age=17, gender="남성", job="견습 기사",
+    main_character_background=("고아", "평민 출신"),
+    main_character_appearance=("큰 키", "검은 머리"),
+    main_character_ability=("검술", "관찰력"),
+    main_character_superpower=("시간 정지",),
+    main_character_personality=("대담한", "배려하는", "고집이 센"),
+    main_character_relationship=("스승", "친구", "악당"),
+)
+
+
+def _run(mode, server, chapters):
+    full_prefix = build_settings_prefix(SETTINGS)
+    compact_prefix = build_settings_prefix(SETTINGS, compact=True)
+    base_model = FakeModel(server.url, MODEL_NAME)
+    cache = PromptPrefixCache(create_cached_model=fake_cached_model_factory(server.url))
+
+    latencies, sent_tokens, previous = [], 0, ""
+    for chapter in range(1, chapters + 1):
+        delta = build_chapter_request(chapter, previous)
+        if mode == "baseline":
+            model, parts = base_model, [SYSTEM_PROMPT, full_prefix, delta]
+        else:
+            model, parts, _ = cache.prepare(
+                base_model, MODEL_NAME, SYSTEM_PROMPT, full_prefix, compact_prefix, delta, compact=mode == "compact"
+            )
+        start = time.perf_counter()
+        response = model.generate_content(parts)
+        latencies.append(time.perf_counter() - start)
+        sent_tokens += estimate_tokens(parts)
+        previous = response.text  # 직전 회차만 이어 붙여 앞부분 효과만 비교
+    return {
+        "prompt_tokens_sent": sent_tokens,
+        "total_s": round(sum(latencies), 3),
+        "per_chapter_mean_ms": round(statistics.mean(latencies) * 1000, 3),
+        "per_chapter_p95_ms": round(sorted(latencies)[int(len(latencies) * 0.95) - 1] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chapters", type=int, default=30)
+    parser.add_argument("--base-ms", type=float, default=20.0, help="요청당 고정 지연")
+    parser.add_argument("--per-token-ms", type=float, default=0.01, help="입력 토큰당 처리 지연")
+    args = parser.parse_args()
+
+    results = {}
+    original_min_tokens = dict(prompt_prefix.PROVIDER_MIN_TOKENS)
+    for mode in ("baseline", "compact", "provider"):
+        prompt_prefix.PROVIDER_MIN_TOKENS[MODEL_NAME] = 0 if mode == "provider" else 10 ** 9
+        with FakeLLMServer(base_ms=args.base_ms, per_token_ms=args.per_token_ms) as server:
+            results[mode] = _run(mode, server, args.chapters)
+    prompt_prefix.PROVIDER_MIN_TOKENS.update(original_min_tokens)
+
+    baseline = results["baseline"]
+    for mode in ("compact", "provider"):
+        results[mode]["token_reduction"] = round(
+            1 - results[mode]["prompt_tokens_sent"] / baseline["prompt_tokens_sent"], 4
+        )
+        results[mode]["latency_reduction"] = round(1 - results[mode]["total_s"] / baseline["total_s"], 4)
+    print(json.dumps({"chapters": args.chapters, "results": results}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Stanza 분석 경로 벤치마크 (nlp_analysis_app.py / stanza_test.py).
+
+로컬에 내려받은 네덜란드어 모델만 사용합니다(download_method=None, 네트워크 없음).
+- load: 처리기 조합별 파이프라인 로드 시간과 RSS (조합마다 새 프로세스에서 측정, import 직후 대비 증가량 포함)
+- processors: 처리기별 지연 (tokenize -> mwt -> pos -> lemma -> depparse -> ner 순서로 하나씩 실행)
+- throughput: 묶음 크기 x torch 스레드 수별 bulk_process 문장/초
+- arc_render: 문장 길이별 의존 구문 SVG 생성 시간 (처음 / 캐시 적중)
+- peak_rss_mb: 프로세스 최대 RSS
+
+결과 JSON은 버전 간에 diff할 수 있도록 키 순서가 고정되어 있습니다.
+
+    python benchmarks/bench_stanza.py --sentences 256 --out .cache/bench_stanza.json
+    python benchmarks/bench_stanza.py --skip-stanza    # 모델 없이 그림 그리기만 측정
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arc_renderer import layout_sentence, render_dependency_svg, render_sentence_html  # noqa: E402
+from corpus_batch import read_corpus  # noqa: E402
+from parse_cache import split_sentences  # noqa: E402
+
+PROCESSOR_SETS = (
+    "tokenize,mwt,pos,lemma",
+    "tokenize,mwt,pos,lemma,depparse",
+    "tokenize,mwt,pos,lemma,depparse,ner",
+)
+PROCESSOR_ORDER = ("tokenize", "mwt", "pos", "lemma", "depparse", "ner")
+
+SAMPLE_SENTENCES = (
+    "Dit is een voorbeeldtekst in het Nederlands.",
+    "De minister heeft gisteren in Den Haag een nieuw plan voor betaalbare woningen gepresenteerd.",
+    "Ik loop elke ochtend met de hond door het park.",
+    "Volgens het KNMI wordt het morgen in het noorden van het land opnieuw erg nat.",
+    "Hij belde haar op, maar ze nam niet op omdat ze in een vergadering zat.",
+    "Het kabinet wil dat gemeenten sneller vergunningen verlenen voor zonnepanelen op daken.",
+    "Waarom heb je dat boek, dat ik je vorige week gaf, nog steeds niet gelezen?",
+    "Ajax won zondag met 3-1 van Feyenoord in een uitverkochte Johan Cruijff ArenA.",
+    "De onderzoekers van de Universiteit Utrecht publiceerden hun resultaten in het tijdschrift Nature.",
+    "Wij gaan morgen naar Amsterdam.",
+    "Omdat de trein vertraging had, kwamen de studenten te laat voor het tentamen dat om negen uur begon.",
+    "Het Rijksmuseum trekt jaarlijks miljoenen bezoekers uit de hele wereld.",
+)
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except OSError:
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _peak_rss_mb():
+    # 리눅스의 ru_maxrss 단위는 KB
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def load_sentences(path, count):
+    """
+    말뭉치 파일(없으면 내장 예문)의 문장을 count개가 될 때까지 반복해서 채웁니다.
+    """
+    if path:
+        with open(path, "rb") as f:
+            documents = read_corpus(f.read(), path)
+        sentences = [s for _, text in documents for s in split_sentences(text)]
+    else:
+        sentences = list(SAMPLE_SENTENCES)
+    return [sentences[i % len(sentences)] for i in range(count)]
+
+
+def _pipeline(stanza, processors):
+    return stanza.Pipeline("nl", processors=processors, use_gpu=False, download_method=None, verbose=False)
+
+
+def _measure_load(processors):
+    """
+    새 프로세스에서 실행: stanza import 직후 RSS를 기준으로 파이프라인 하나의 로드 시간과 메모리를 잽니다.
+    """
+    import stanza
+
+    baseline = _rss_mb()
+    start = time.perf_counter()
+    pipeline = _pipeline(stanza, processors)  # RSS를 읽을 때까지 살아 있도록 참조 유지
+    seconds = time.perf_counter() - start
+    rss = _rss_mb()
+    del pipeline
+    return {"seconds": round(seconds, 3), "rss_mb": rss, "rss_delta_mb": round(rss - baseline, 1)}
+
+
+def bench_load():
+    """
+    앞선 로드의 메모리가 섞이지 않도록 조합마다 새 프로세스(spawn)에서 측정합니다.
+    (운영체제 파일 캐시는 공유되므로 첫 조합만 모델 파일을 디스크에서 읽을 수 있습니다.)
+    """
+    results = {}
+    for processors in PROCESSOR_SETS:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            results[processors] = pool.submit(_measure_load, processors).result()
+    return results
+
+
+def bench_processors(stanza, pipeline, sentences, repeat):
+    """
+    처리기를 파이프라인 순서대로 하나씩 실행해 처리기별 평균 시간(ms)을 잽니다.
+    """
+    text = " ".join(sentences)
+    totals = dict.fromkeys((name for name in PROCESSOR_ORDER if name in pipeline.processors), 0.0)
+    for _ in range(repeat):
+        doc = stanza.Document([], text=text)
+        for name in totals:
+            start = time.perf_counter()
+            doc = pipeline.processors[name].process(doc)
+            totals[name] += time.perf_counter() - start
+    n = len(sentences)
+    return {
+        name: {"ms_per_call": round(total / repeat * 1000, 2), "ms_per_sentence": round(total / repeat / n * 1000, 3)}
+        for name, total in totals.items()
+    }
+
+
+def bench_throughput(stanza, pipeline, sentences, batch_sizes, thread_counts):
+    import torch
+
+    results = []
+    for threads in thread_counts:
+        torch.set_num_threads(threads)
+        for batch_size in batch_sizes:
+            # 첫 묶음으로 예열
+            pipeline.bulk_process([stanza.Document([], text=s) for s in sentences[:batch_size]])
+            start = time.perf_counter()
+            for i in range(0, len(sentences), batch_size):
+                pipeline.bulk_process([stanza.Document([], text=s) for s in sentences[i:i + batch_size]])
+            seconds = time.perf_counter() - start
+            results.append({
+                "threads": threads,
+                "batch_size": batch_size,
+                "seconds": round(seconds, 3),
+                "sentences_per_second": round(len(sentences) / seconds, 2),
+            })
+    return results
+
+
+def synthetic_key(n_words, rng):
+    """
+    길이 n_words의 (단어, 헤드, 의존 관계) 키. 헤드는 대부분 가까운 단어라 실제 문장과 비슷한 모양입니다.
+    """
+    root = rng.randrange(n_words)
+    key = []
+    for i in range(n_words):
+        if i == root:
+            key.append((f"w{i + 1}", 0, "root"))
+            continue
+        head = min(max(i + rng.choice((-3, -2, -1, 1, 2, 3, root - i)), 0), n_words - 1)
+        key.append((f"w{i + 1}", (head if head != i else root) + 1, "dep"))
+    return tuple(key)
+
+
+def bench_arc_render(lengths, repeat, seed=0):
+    rng = random.Random(seed)
+    results = {}
+    for n_words in lengths:
+        keys = [synthetic_key(n_words, rng) for _ in range(repeat)]
+        layout_sentence.cache_clear()
+        render_dependency_svg.cache_clear()
+        start = time.perf_counter()
+        for key in keys:
+            html = render_sentence_html(key)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        for key in keys:
+            render_sentence_html(key)
+        cached = time.perf_counter() - start
+        results[str(n_words)] = {
+            "ms_first": round(cold / repeat * 1000, 3),
+            "ms_cached": round(cached / repeat * 1000, 4),
+            "svg_kb": round(len(html.encode("utf-8")) / 1024, 1),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=None, help="텍스트/CSV 말뭉치 (없으면 내장 예문)")
+    parser.add_argument("--sentences", type=int, default=256, help="처리량 측정에 쓸 문장 수")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32, 128])
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--repeat", type=int, default=5, help="처리기별 지연/그림 측정 반복 횟수")
+    parser.add_argument("--arc-lengths", nargs="+", type=int, default=[5, 10, 20, 40, 80])
+    parser.add_argument("--skip-stanza", action="store_true", help="Stanza 측정 없이 그림 그리기만 측정")
+    parser.add_argument("--out", default=None, help="결과 JSON을 저장할 경로")
+    args = parser.parse_args()
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+    }
+    if not args.skip_stanza:
+        import stanza
+        import torch
+
+        report["environment"].update({"stanza": stanza.__version__, "torch": torch.__version__})
+        sentences = load_sentences(args.corpus, args.sentences)
+        report["load"] = bench_load()
+        pipeline = _pipeline(stanza, PROCESSOR_SETS[-1])
+        report["processors"] = bench_processors(stanza, pipeline, sentences[:32], args.repeat)
+        report["throughput"] = bench_throughput(stanza, pipeline, sentences, args.batch_sizes, args.threads)
+    report["arc_render"] = bench_arc_render(args.arc_lengths, args.repeat)
+    report["peak_rss_mb"] = _peak_rss_mb()
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        directory = os.path.dirname(args.out)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+소설 생성 앱 종단 간 벤치마크 (재현 가능한 헤드리스 실행).
+
+GenStory_deploy.py, genstory.py, tt.py, nondeployment_GenerateStory.py를
+Streamlit AppTest로 그대로 실행하면서, 모델 호출은 녹화된 응답을 돌려주는 가짜 Gemini
+엔드포인트(benchmarks/fake_llm.py)로, Supabase는 로컬 PostgREST 스텁으로 보냅니다.
+회차 수(기본 1, 10, 50, 100)마다 새 세션으로 처음부터 생성하고 다음을 보고합니다.
+
+- rerun_ms: 생성 버튼 클릭 한 번의 스크립트 재실행 시간 (평균 / 마지막 회차)
+- prompt_build_ms: 프롬프트 구성 함수에서 쓴 시간 합계
+- llm_ms: 가짜 모델 호출 시간 합계
+- io_ms: 로컬 저장소, 아카이브 파일, Supabase 호출 시간 합계
+- rate_limit_wait_ms: 공유 호출 제한(RateLimiter)에서 기다린 시간 합계
+- last_prompt_tokens: 마지막 회차 요청의 입력 토큰 수 (프롬프트 증가 추적)
+- rss_mb / session_state_kb: 프로세스 메모리와 세션 상태 크기
+
+--think-ms는 클릭 사이에 사용자가 회차를 읽는 시간을 흉내 냅니다. GenStory_deploy의 상태 추출은
+백그라운드에서 호출 제한(분당 15회)을 따르므로, 쉬지 않고 누르면 다음 회차가 이전 회차 전체를 보냅니다.
+
+    python benchmarks/bench_story_apps.py --apps GenStory_deploy tt --chapters 1 10 50 100
+"""
+import argparse
+import functools
+import json
+import os
+import pickle
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from unittest import mock
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import draft_generator  # noqa: E402
+import history_manager  # noqa: E402
+import novel_archive  # noqa: E402
+import prompt_prefix  # noqa: E402
+import story_settings  # noqa: E402
+import story_store  # noqa: E402
+import supabase_pool  # noqa: E402
+import world_state  # noqa: E402
+from benchmarks.bench_supabase_client import FAKE_KEY  # noqa: E402
+from benchmarks.fake_llm import FakeLLMServer, FakeModel, patch_genai, recorded_responses  # noqa: E402
+from benchmarks.postgrest_stub import PostgrestStub, story_browser_rpcs  # noqa: E402
+
+APPS = ("GenStory_deploy", "genstory", "tt", "nondeployment_GenerateStory")
+TIMEOUT_S = 120
+
+
+class Timers:
+    """
+    감싼 함수들의 누적 실행 시간 (백그라운드 동기화/상태 추출 스레드는 제외)
+    """
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+
+    def wrap(self, category, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            if threading.current_thread().name.startswith(("supabase-replicator", "world-state")):
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.totals[category] += time.perf_counter() - start
+        return timed
+
+    def instrument(self, stack):
+        """
+        앱이 다시 실행될 때마다 모듈에서 이름을 새로 가져오므로 모듈 속성만 바꾸면 됩니다.
+        """
+        targets = [
+            ("prompt", story_settings, "build_chapter_request"),
+            ("prompt", story_settings, "build_settings_prefix"),
+            ("prompt", prompt_prefix.PromptPrefixCache, "prepare"),
+            ("prompt", history_manager.HistoryManager, "build_context"),
+            ("prompt", world_state.WorldState, "render_table"),
+            ("io", story_store.StoryStore, "save_chapter"),
+            ("io", story_store.StoryStore, "load_chapter"),
+            ("io", story_store.StoryStore, "save_world_state"),
+            ("io", story_store.StoryStore, "load_world_state"),
+            ("io", novel_archive.NovelArchive, "append_chapter"),
+            ("io", supabase_pool.SupabasePool, "run"),
+            ("llm", FakeModel, "generate_content"),
+            ("rate_limit", draft_generator.RateLimiter, "__enter__"),
+        ]
+        for category, owner, name in targets:
+            stack.enter_context(mock.patch.object(owner, name, self.wrap(category, getattr(owner, name))))
+
+
+class FakeVectorStore:
+    """
+    nondeployment_GenerateStory.py의 FAISS 인덱스 대체품 (녹화된 회차를 문맥으로 반환)
+    """
+
+    class _Doc:
+        def __init__(self, text):
+            self.page_content = text
+
+    def __init__(self, timers):
+        self.timers = timers
+        self.docs = [self._Doc(text[:500]) for text in recorded_responses()]
+
+    def similarity_search(self, query, k=4):
+        start = time.perf_counter()
+        docs = self.docs[:k]
+        self.timers.totals["prompt"] += time.perf_counter() - start
+        return docs
+
+
+def _button(at, prefix):
+    return next(b for b in at.button if b.label.startswith(prefix))
+
+
+def _text_input(at, label):
+    return next(w for w in [*at.sidebar.text_input, *at.text_input] if w.label.startswith(label))
+
+
+def _check(at):
+    if at.exception:
+        raise RuntimeError(f"앱 실행 중 예외: {at.exception[0].message}")
+
+
+def _prepare(app, at, timers):
+    """
+    앱별로 생성 버튼을 누르기 직전 상태까지 진행합니다.
+    """
+    if app in ("GenStory_deploy", "tt"):
+        at.run()
+        _text_input(at, "🔑 Gemini API Key").input("fake-key")
+        at.run()
+        _text_input(at, "소설 제목을 입력하세요").input("벤치마크 소설")
+        _text_input(at, "이름을 입력하세요").input("이서준")
+        _text_input(at, "직업을 입력하세요").input("견습 기사")
+        at.run()
+    elif app == "genstory":
+        at.run()
+        _text_input(at, "Gemini API Key").input("fake-key")
+        at.run()
+    else:
+        at.session_state["db"] = FakeVectorStore(timers)
+        at.session_state["storylines"] = "1. 견습 기사가 왕국의 음모를 파헤친다."
+        at.run()
+    _check(at)
+
+
+def _generate(app, at, chapter):
+    if app in ("GenStory_deploy", "tt"):
+        _button(at, "소설 ").click().run()
+    elif app == "genstory":
+        _button(at, "🚀 프롤로그 생성하기").click().run()
+    elif chapter == 1:
+        _button(at, "전체 소설 작성 시작").click().run()
+    else:
+        _button(at, "이어하기").click().run()
+    _check(at)
+
+
+def _session_state_kb(at):
+    size = 0
+    for key in ("history", "messages"):
+        if key in at.session_state:
+            try:
+                size += len(pickle.dumps(at.session_state[key]))
+            except Exception:
+                pass
+    return round(size / 1024, 1)
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except OSError:
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_app(app, chapters, server, stub, think_s=0.0):
+    # 회차 수마다 새 작업 디렉터리와 빈 캐시에서 시작
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    with tempfile.TemporaryDirectory() as workdir, ExitStack() as stack:
+        previous_cwd = os.getcwd()
+        os.chdir(workdir)
+        stack.callback(os.chdir, previous_cwd)
+        timers = Timers()
+        timers.instrument(stack)
+
+        at = AppTest.from_file(os.path.join(REPO_ROOT, f"{app}.py"), default_timeout=TIMEOUT_S)
+        at.secrets["supabase"] = {"url": stub.url, "key": FAKE_KEY}
+        _prepare(app, at, timers)
+
+        timers.totals.clear()
+        reruns = []
+        for chapter in range(1, chapters + 1):
+            requests_before = server.requests
+            start = time.perf_counter()
+            _generate(app, at, chapter)
+            reruns.append(time.perf_counter() - start)
+            time.sleep(think_s)
+            if server.requests == requests_before:
+                raise RuntimeError(f"{app}: {chapter}화에서 모델 호출이 일어나지 않았습니다.")
+        return {
+            "rerun_ms_mean": round(sum(reruns) / len(reruns) * 1000, 2),
+            "rerun_ms_last": round(reruns[-1] * 1000, 2),
+            "prompt_build_ms": round(timers.totals["prompt"] * 1000, 2),
+            "llm_ms": round(timers.totals["llm"] * 1000, 2),
+            "io_ms": round(timers.totals["io"] * 1000, 2),
+            "rate_limit_wait_ms": round(timers.totals["rate_limit"] * 1000, 2),
+            "last_prompt_tokens": server.last_prompt_tokens,
+            "rss_mb": _rss_mb(),
+            "session_state_kb": _session_state_kb(at),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", nargs="+", choices=APPS, default=list(APPS))
+    parser.add_argument("--chapters", nargs="+", type=int, default=[1, 10, 50, 100])
+    parser.add_argument("--llm-base-ms", type=float, default=20.0, help="가짜 모델 요청당 고정 지연")
+    parser.add_argument("--handshake-ms", type=float, default=30.0, help="Supabase 스텁 연결당 지연")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="생성 버튼 클릭 사이 대기 시간")
+    args = parser.parse_args()
+
+    os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+    report = {}
+    for app in args.apps:
+        report[app] = {}
+        for chapters in args.chapters:
+            with FakeLLMServer(base_ms=args.llm_base_ms) as server, \
+                    PostgrestStub(args.handshake_ms) as stub, patch_genai(server.url):
+                stub.state.rpcs.update(story_browser_rpcs())
+                report[app][chapters] = run_app(app, chapters, server, stub, args.think_ms / 1000)
+            print(f"{app} {chapters}화: {report[app][chapters]}", file=sys.stderr)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
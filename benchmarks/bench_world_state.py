@@ -0,0 +1,98 @@
+"""
+인물·세계 상태 표 벤치마크.
+
+녹화된 회차(MyGreatNovel/chapter_*.txt)를 이어 붙여 N화까지 진행하면서
+1) 이전 회차 전체를 보내는 기존 방식(full)
+2) 상태 표 + 직전 회차만 보내는 방식(state)
+의 회차별 요청 토큰 수를 비교합니다.
+
+앱은 모델로 추출한 상태만 프롬프트에 쓰므로, 상태 추출도 앱과 같은 경로
+(update_world_state + 추출 프롬프트)로 모델 응답을 받아 진행합니다. 응답은 회차마다
+인물/관계/장소/사건을 갱신하는 고정된 JSON(scripted_extraction)이며, 추출 요청의
+입력/출력 토큰도 state 방식의 비용에 더합니다.
+--extraction local은 모델 호출 없는 로컬 추출로 진행합니다 (앱에서는 상태 표를 쓰지 않는 경로).
+
+    python benchmarks/bench_world_state.py --chapters 30
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_prompt_prefix import SETTINGS  # noqa: E402
+from benchmarks.fake_llm import recorded_responses  # noqa: E402
+from story_settings import build_chapter_request  # noqa: E402
+from token_budget import estimate_tokens  # noqa: E402
+from world_state import WorldState, update_world_state  # noqa: E402
+
+SUPPORTING_CAST = ("한서윤", "강도현", "윤하린", "백승호", "류지안", "마르쿠스 경", "엘레나 공주", "검은 기사")
+PLACES = ("왕도 성문", "기사단 훈련장", "북쪽 요새", "안개 숲 오두막", "지하 서고", "국경 마을")
+
+
+def scripted_extraction(prompt):
+    """
+    추출 모델 응답 대신 쓰는 고정 JSON. 회차마다 인물 3명, 관계 1개, 장소 1곳을 갱신하고
+    사건 하나를 새로 열며, 열린 사건이 4개를 넘으면 가장 오래된 사건을 닫습니다.
+    """
+    chapter = int(re.search(r"--- (\d+)화 ---", prompt).group(1))
+    threads = re.search(r"진행 중인 사건: (.*)", prompt).group(1)
+    open_threads = [] if threads == "없음" else threads.split("; ")
+    cast = [SETTINGS.name] + [SUPPORTING_CAST[(chapter + i) % len(SUPPORTING_CAST)] for i in range(2)]
+    return json.dumps({
+        "characters": [{"name": name, "desc": f"{chapter}화에서 새로운 단서를 쫓으며 결심을 굳힘"} for name in cast],
+        "relationships": [{"a": cast[0], "b": cast[1], "relation": f"{chapter}화 이후 서로 믿는 동료"}],
+        "locations": [{"name": PLACES[chapter % len(PLACES)], "desc": f"{chapter}화의 주요 무대"}],
+        "new_threads": [f"{chapter}화에서 드러난 왕국의 음모"],
+        "resolved_threads": open_threads[:1] if len(open_threads) >= 4 else [],
+    }, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chapters", type=int, default=30)
+    parser.add_argument("--extraction", choices=("model", "local"), default="model")
+    args = parser.parse_args()
+
+    extraction = {"input": 0, "output": 0}
+
+    def generate(prompt):
+        response = scripted_extraction(prompt)
+        extraction["input"] += estimate_tokens(prompt)
+        extraction["output"] += estimate_tokens(response)
+        return response
+
+    responses = recorded_responses()
+    texts = [responses[i % len(responses)] for i in range(args.chapters)]
+    state = WorldState.seed(SETTINGS)
+    full_tokens, state_tokens = [], []
+    for chapter in range(1, args.chapters + 1):
+        previous = texts[:chapter - 1]
+        full_tokens.append(estimate_tokens(build_chapter_request(chapter, "\n\n".join(previous))))
+        state_tokens.append(estimate_tokens(build_chapter_request(
+            chapter, previous[-1] if previous else "", state.render_table()
+        )))
+        state, _ = update_world_state(
+            state, chapter, texts[chapter - 1], generate if args.extraction == "model" else None
+        )
+
+    state_total = sum(state_tokens) + extraction["input"] + extraction["output"]
+    print(json.dumps({
+        "chapters": args.chapters,
+        "extraction": args.extraction,
+        "full": {"last_request_tokens": full_tokens[-1], "total_tokens": sum(full_tokens)},
+        "state": {
+            "last_request_tokens": state_tokens[-1],
+            "request_tokens": sum(state_tokens),
+            "extraction_input_tokens": extraction["input"],
+            "extraction_output_tokens": extraction["output"],
+            "total_tokens": state_total,
+        },
+        "token_reduction": round(1 - state_total / sum(full_tokens), 4),
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
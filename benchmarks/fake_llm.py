@@ -0,0 +1,201 @@
+"""
+벤치마크용 로컬 가짜 Gemini 엔드포인트.
+
+녹화된 응답(기본값: MyGreatNovel/chapter_*.txt)을 순서대로 돌려주고,
+전송된 바이트와 처리한 토큰 수에 비례하는 지연을 흉내 냅니다.
+컨텍스트 캐시(cachedContents)도 흉내 내어, 캐시된 앞부분은 전송되지 않고
+처리 비용도 할인됩니다.
+
+FakeModel은 genai.GenerativeModel처럼 generate_content(parts)를 제공하므로
+앱의 생성 함수에 그대로 넣을 수 있습니다.
+"""
+import glob
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from contextlib import ExitStack
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from token_budget import estimate_tokens  # noqa: E402
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def recorded_responses(pattern=os.path.join(REPO_ROOT, "MyGreatNovel", "chapter_*.txt")):
+    responses = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding="utf-8") as f:
+            responses.append(f.read())
+    return responses or ["가짜 응답입니다."]
+
+
+class FakeLLMServer:
+    """
+    with FakeLLMServer() as server: 형태로 사용합니다.
+    latency = base_ms + 전송 KB * per_kb_ms + 처리 토큰 * per_token_ms (캐시 토큰은 cached_discount 적용)
+    """
+
+    def __init__(self, responses=None, base_ms=20.0, per_kb_ms=0.5, per_token_ms=0.01, cached_discount=0.25):
+        self.responses = itertools.cycle(responses or recorded_responses())
+        self.base_ms = base_ms
+        self.per_kb_ms = per_kb_ms
+        self.per_token_ms = per_token_ms
+        self.cached_discount = cached_discount
+        self.lock = threading.Lock()
+        self.caches = {}
+        self.bytes_received = 0
+        self.requests = 0
+        self.prompt_tokens = 0       # 서버가 처리한 입력 토큰 합계 (캐시 토큰 포함)
+        self.last_prompt_tokens = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length))
+                with fake.lock:
+                    fake.bytes_received += length
+                    fake.requests += 1
+                    if self.path == "/cachedContents":
+                        cache_id = f"cache-{len(fake.caches) + 1}"
+                        fake.caches[cache_id] = estimate_tokens(body["parts"])
+                        payload = {"name": cache_id}
+                        delay_ms = fake.base_ms
+                    else:
+                        cached_tokens = fake.caches.get(body.get("cached"), 0)
+                        prompt_tokens = estimate_tokens(body["parts"])
+                        # JSON 응답을 요청한 호출(상태 추출 등)에는 빈 갱신을 돌려줌
+                        text = "{}" if body.get("json") else next(fake.responses)
+                        fake.prompt_tokens += prompt_tokens + cached_tokens
+                        if not body.get("json"):
+                            fake.last_prompt_tokens = prompt_tokens + cached_tokens
+                        payload = {
+                            "text": text,
+                            "prompt_token_count": prompt_tokens + cached_tokens,
+                            "cached_content_token_count": cached_tokens,
+                            "candidates_token_count": estimate_tokens(text),
+                        }
+                        delay_ms = (
+                            fake.base_ms
+                            + length / 1024 * fake.per_kb_ms
+                            + (prompt_tokens + cached_tokens * fake.cached_discount) * fake.per_token_ms
+                        )
+                time.sleep(delay_ms / 1000)
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
+
+
+class _Usage:
+    def __init__(self, payload):
+        self.prompt_token_count = payload["prompt_token_count"]
+        self.candidates_token_count = payload["candidates_token_count"]
+        self.cached_content_token_count = payload["cached_content_token_count"]
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.text = payload["text"]
+        self.usage_metadata = _Usage(payload)
+
+
+def _post(url, payload):
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+class FakeModel:
+    """
+    genai.GenerativeModel 대체품
+    """
+
+    def __init__(self, server_url, model_name="gemini-2.5-flash", cached=None, generation_config=None):
+        self.server_url = server_url
+        self.model_name = model_name
+        self.cached = cached
+        self.generation_config = generation_config
+
+    def generate_content(self, parts, generation_config=None):
+        if isinstance(parts, str):
+            parts = [parts]
+        config = generation_config or self.generation_config
+        wants_json = isinstance(config, dict) and config.get("response_mime_type") == "application/json"
+        return FakeResponse(_post(f"{self.server_url}/generate", {
+            "parts": list(parts), "cached": self.cached, "json": wants_json,
+        }))
+
+
+def fake_cached_model_factory(server_url):
+    """
+    PromptPrefixCache(create_cached_model=...)에 넣을 가짜 컨텍스트 캐시 생성 함수
+    """
+    def create(model_name, system_prompt, prefix_text, ttl_seconds):
+        cache = _post(f"{server_url}/cachedContents", {"parts": [system_prompt, prefix_text]})
+        return FakeModel(server_url, model_name, cached=cache["name"])
+    return create
+
+
+def patch_genai(server_url):
+    """
+    google.generativeai의 configure / GenerativeModel / CachedContent.create를 가짜 엔드포인트로 바꿉니다.
+    앱 스크립트를 그대로 실행하면서 모델 호출만 로컬로 돌릴 때 사용합니다. (ExitStack 반환)
+    """
+    from unittest import mock
+
+    import google.generativeai as genai
+    from google.generativeai import caching
+
+    class PatchedModel(FakeModel):
+        def __init__(self, model_name="gemini-2.5-flash", generation_config=None, **kwargs):
+            super().__init__(server_url, model_name, generation_config=generation_config)
+
+        @classmethod
+        def from_cached_content(cls, cached_content, **kwargs):
+            return FakeModel(server_url, cached_content["model"], cached=cached_content["name"])
+
+    def create_cached_content(model, system_instruction="", contents=(), ttl=None, **kwargs):
+        cache = _post(f"{server_url}/cachedContents", {"parts": [system_instruction, *contents]})
+        return {"name": cache["name"], "model": model.split("/")[-1]}
+
+    stack = ExitStack()
+    stack.enter_context(mock.patch.object(genai, "configure", lambda **kwargs: None))
+    stack.enter_context(mock.patch.object(genai, "GenerativeModel", PatchedModel))
+    stack.enter_context(mock.patch.object(caching.CachedContent, "create", create_cached_content))
+    return stack
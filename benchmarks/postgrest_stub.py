@@ -0,0 +1,188 @@
+"""
+벤치마크용 로컬 PostgREST 호환 스텁 서버.
+
+supabase-py가 사용하는 /rest/v1/<table> 경로의 select, insert(upsert), eq 필터,
+limit/offset/order만 메모리 안에서 흉내 냅니다.
+새 TCP 연결마다 handshake_ms만큼 지연을 넣어 TLS 핸드셰이크 비용을 재현합니다.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+
+class StubState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tables = {}
+        self.rpcs = {}
+        self.connections = 0
+        self.requests = 0
+
+
+def _parse_value(raw):
+    try:
+        return int(raw)
+    except ValueError:
+        return raw
+
+
+def _apply_query(rows, params):
+    """
+    PostgREST 쿼리 파라미터 일부(select, eq, order, limit, offset)를 적용합니다.
+    """
+    select = "*"
+    order = None
+    limit = None
+    offset = 0
+    for key, value in params:
+        if key == "select":
+            select = value
+        elif key == "order":
+            order = value
+        elif key == "limit":
+            limit = int(value)
+        elif key == "offset":
+            offset = int(value)
+        elif key == "on_conflict":
+            continue
+        elif value.startswith("eq."):
+            target = _parse_value(value[3:])
+            rows = [row for row in rows if row.get(key) == target]
+    if order:
+        column, _, direction = order.partition(".")
+        rows = sorted(rows, key=lambda row: row.get(column), reverse=direction == "desc")
+    rows = rows[offset:]
+    if limit is not None:
+        rows = rows[:limit]
+    if select != "*":
+        columns = [c.strip() for c in select.split(",")]
+        rows = [{c: row.get(c) for c in columns} for row in rows]
+    return rows
+
+
+def make_handler(state, handshake_ms):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # 헤더와 본문을 따로 쓰므로 Nagle + 지연 ACK(약 40ms)가 keep-alive 요청마다 끼지 않게 함
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with state.lock:
+                state.connections += 1
+            time.sleep(handshake_ms / 1000)
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _target(self):
+            parts = urlsplit(self.path)
+            segments = [s for s in parts.path.split("/") if s]
+            return segments[2:], parse_qsl(parts.query)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"null")
+
+        def do_GET(self):
+            (name, *_), params = self._target()
+            with state.lock:
+                state.requests += 1
+                rows = list(state.tables.get(name, []))
+            self._send(200, _apply_query(rows, params))
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_POST(self):
+            segments, params = self._target()
+            body = self._body()
+            with state.lock:
+                state.requests += 1
+                if segments[0] == "rpc":
+                    handler = state.rpcs.get(segments[1])
+                    if handler is None:
+                        self._send(404, {"message": f"function {segments[1]} not found"})
+                        return
+                    self._send(200, handler(state.tables, body or {}))
+                    return
+
+                table = state.tables.setdefault(segments[0], [])
+                rows = body if isinstance(body, list) else [body]
+                conflict = dict(params).get("on_conflict")
+                inserted = []
+                for row in rows:
+                    if conflict:
+                        keys = conflict.split(",")
+                        table[:] = [r for r in table if any(r.get(k) != row.get(k) for k in keys)]
+                    row = dict(row)
+                    row.setdefault("id", len(table) + 1)
+                    table.append(row)
+                    inserted.append(row)
+            self._send(201, inserted)
+
+    return Handler
+
+
+def story_browser_rpcs():
+    """
+    sql/story_browser.sql의 story_titles / story_chapters 함수를 흉내 내는 RPC 처리기
+    """
+    def story_titles(tables, args):
+        counts = {}
+        for row in tables.get("stories", []):
+            counts[row["title"]] = counts.get(row["title"], 0) + 1
+        offset = args.get("p_offset", 0)
+        titles = sorted(counts)[offset:offset + args.get("p_limit", 20)]
+        return [{"title": t, "chapter_count": counts[t], "total_titles": len(counts)} for t in titles]
+
+    def story_chapters(tables, args):
+        rows = [r for r in tables.get("stories", []) if r["title"] == args.get("p_title")]
+        return [
+            {"chapter": r["chapter"], "length": len(r.get("contents") or "")}
+            for r in sorted(rows, key=lambda r: r["chapter"])
+        ]
+
+    return {"story_titles": story_titles, "story_chapters": story_chapters}
+
+
+class PostgrestStub:
+    """
+    with PostgrestStub() as stub: 형태로 사용합니다. stub.url을 supabase URL로 넘기면 됩니다.
+    """
+
+    def __init__(self, handshake_ms=30.0, port=0):
+        self.state = StubState()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(self.state, handshake_ms))
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def seed(self, table, rows):
+        with self.state.lock:
+            self.state.tables.setdefault(table, []).extend(dict(r) for r in rows)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
@@ -0,0 +1,184 @@
+"""
+네덜란드어 말뭉치 일괄 분석.
+
+텍스트/CSV 말뭉치(예: nos_nieuws_scrap.py에서 내려받은 기사 본문)를 문서 묶음 단위로
+Stanza bulk_process에 넣고, 프로세스 풀의 각 작업자가 자기 파이프라인 하나를 재사용합니다.
+결과는 CoNLL-U 파일과 품사/의존 관계 빈도 요약(CSV)으로 저장하고 문장/초를 보고합니다.
+
+    python corpus_batch.py nos_nieuws.csv --out .cache/corpus --workers 4 --batch-size 32
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from multiprocessing import get_context
+
+from parse_cache import sentence_to_dict
+from token_table import TokenTable
+
+DEFAULT_PROCESSORS = "tokenize,mwt,pos,lemma,depparse"
+TEXT_COLUMNS = ("body", "text", "contents", "tekst")
+
+
+def read_corpus(data, filename, text_column=None):
+    """
+    업로드된 말뭉치를 [(문서 id, 본문)]으로 읽습니다.
+    CSV는 text_column(없으면 body/text/contents/tekst 중 있는 열)을,
+    텍스트 파일은 빈 줄로 구분된 문단을 문서 하나로 봅니다.
+    """
+    text = data.decode("utf-8-sig") if isinstance(data, bytes) else data
+    if filename.lower().endswith(".csv"):
+        reader = csv.DictReader(io.StringIO(text))
+        column = text_column or next((c for c in TEXT_COLUMNS if c in (reader.fieldnames or [])), None)
+        if column is None:
+            raise ValueError(f"본문 열을 찾을 수 없습니다. 사용할 수 있는 열: {reader.fieldnames}")
+        return [
+            (row.get("index") or str(i), row[column].strip())
+            for i, row in enumerate(reader, 1) if (row.get(column) or "").strip()
+        ]
+    paragraphs = [p.strip() for p in text.replace("\r\n", "\n").split("\n\n")]
+    return [(str(i), p) for i, p in enumerate((p for p in paragraphs if p), 1)]
+
+
+# ---------- 작업자 프로세스 ----------
+
+_pipeline = None
+
+
+def _init_worker(processors, threads_per_worker):
+    """
+    작업자마다 한 번만 파이프라인을 만듭니다 (로컬에 받은 모델만 사용).
+    """
+    global _pipeline
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+    import stanza
+    _pipeline = stanza.Pipeline("nl", processors=processors, use_gpu=False, download_method=None, verbose=False)
+
+
+def _parse_batch(batch):
+    import stanza
+
+    docs = _pipeline.bulk_process([stanza.Document([], text=text) for _, text in batch])
+    results = []
+    for (doc_id, _), doc in zip(batch, docs):
+        table = TokenTable([sentence_to_dict(s) for s in doc.sentences])
+        results.append((
+            doc_id,
+            table.to_conllu(doc_id),
+            len(table),
+            len(table.ids),
+            table.label_counts(table.pos, table.pos_codes),
+            table.label_counts(table.deprel, table.deprel_codes),
+        ))
+    return results
+
+
+def make_pool(processors=DEFAULT_PROCESSORS, workers=2, threads_per_worker=1):
+    """
+    작업자마다 파이프라인을 한 번 올려 두는 프로세스 풀.
+    여러 번 run_batch를 호출할 때 같은 풀을 넘기면 모델을 다시 로드하지 않습니다.
+    """
+    # torch는 fork 후 스레드 상태가 꼬일 수 있으므로 spawn으로 작업자를 띄웁니다.
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=get_context("spawn"),
+        initializer=_init_worker, initargs=(processors, threads_per_worker),
+    )
+
+
+# ---------- 일괄 실행 ----------
+
+def _batches(documents, batch_size):
+    for i in range(0, len(documents), batch_size):
+        yield documents[i:i + batch_size]
+
+
+def write_summary(path, pos_counts, deprel_counts):
+    """
+    품사/의존 관계 빈도 요약 CSV (종류, 코드, 개수, 비율)
+    """
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(["kind", "label", "count", "ratio"])
+        for kind, counts in (("pos", pos_counts), ("deprel", deprel_counts)):
+            total = sum(counts.values()) or 1
+            for label, count in counts.most_common():
+                writer.writerow([kind, label, count, round(count / total, 4)])
+
+
+def run_batch(documents, out_dir, name="corpus", processors=DEFAULT_PROCESSORS,
+              workers=2, batch_size=32, threads_per_worker=1, progress=None, pool=None):
+    """
+    documents([(문서 id, 본문)])를 분석해 out_dir에 CoNLL-U와 요약을 씁니다.
+    progress(처리한 문서 수, 전체 문서 수)가 주어지면 묶음이 끝날 때마다 호출합니다.
+    pool(make_pool)을 넘기면 그 풀을 재사용하고 닫지 않습니다. 없으면 이번 실행용 풀을 만듭니다.
+    결과 보고 dict를 반환합니다.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    conllu_path = os.path.join(out_dir, f"{name}.conllu")
+    summary_path = os.path.join(out_dir, f"{name}_summary.csv")
+    pos_counts, deprel_counts = Counter(), Counter()
+    sentence_count = word_count = done = 0
+
+    start = time.perf_counter()
+    owned = pool is None
+    if owned:
+        pool = make_pool(processors, workers, threads_per_worker)
+    with (pool if owned else nullcontext(pool)), open(conllu_path, "w", encoding="utf-8") as out:
+        # map은 입력 순서대로 결과를 돌려주므로 CoNLL-U도 문서 순서대로 쓰입니다.
+        for results in pool.map(_parse_batch, _batches(documents, batch_size)):
+            for _, conllu, n_sentences, n_words, pos, deprel in results:
+                out.write(conllu)
+                sentence_count += n_sentences
+                word_count += n_words
+                pos_counts.update(pos)
+                deprel_counts.update(deprel)
+            done += len(results)
+            if progress:
+                progress(done, len(documents))
+    seconds = time.perf_counter() - start  # 새 풀이면 작업자의 모델 로드 시간 포함
+    write_summary(summary_path, pos_counts, deprel_counts)
+
+    return {
+        "documents": len(documents),
+        "sentences": sentence_count,
+        "words": word_count,
+        "workers": workers,
+        "batch_size": batch_size,
+        "seconds": round(seconds, 3),
+        "sentences_per_second": round(sentence_count / seconds, 2) if seconds else 0.0,
+        "conllu_path": conllu_path,
+        "summary_path": summary_path,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", help="텍스트(.txt) 또는 CSV(.csv) 말뭉치 파일")
+    parser.add_argument("--out", default=os.path.join(".cache", "corpus"))
+    parser.add_argument("--column", default=None, help="CSV 본문 열 이름")
+    parser.add_argument("--processors", default=DEFAULT_PROCESSORS)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    args = parser.parse_args()
+
+    with open(args.corpus, "rb") as f:
+        documents = read_corpus(f.read(), args.corpus, args.column)
+    name = os.path.splitext(os.path.basename(args.corpus))[0]
+    report = run_batch(
+        documents, args.out, name, args.processors, args.workers, args.batch_size, args.threads_per_worker
+    )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class RateLimiter:
+    """
+    여러 세션이 공유하는 API 호출 제한.
+    동시에 진행되는 호출 수(max_concurrent)와 분당 호출 수(per_minute)를 함께 제한합니다.
+    """
+
+    def __init__(self, max_concurrent=4, per_minute=15):
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._interval = 60.0 / per_minute if per_minute else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self._interval
+        if wait > 0:
+            time.sleep(wait)
+        return self
+
+    def __exit__(self, *exc):
+        self._semaphore.release()
+        return False
+
+
+def _repetition_ratio(text, n=4):
+    """
+    글자 n-gram 중 중복된 비율 (0이면 반복 없음)
+    """
+    text = re.sub(r"\s+", "", text)
+    grams = [text[i:i + n] for i in range(len(text) - n + 1)]
+    if not grams:
+        return 0.0
+    counts = Counter(grams)
+    repeated = sum(c - 1 for c in counts.values() if c > 1)
+    return repeated / len(grams)
+
+
+def score_draft(text, target_chars=2500, character_names=()):
+    """
+    초안을 간단한 휴리스틱으로 점수화합니다 (높을수록 좋음).
+    - 목표 분량에 얼마나 가까운지
+    - 같은 표현이 얼마나 반복되는지
+    - 설정된 인물 이름이 본문에 등장하는지
+    """
+    length_score = max(0.0, 1.0 - abs(len(text) - target_chars) / target_chars)
+    repetition_score = 1.0 - min(1.0, _repetition_ratio(text) * 2)
+    names = [name for name in character_names if name]
+    name_score = sum(1 for name in names if name in text) / len(names) if names else 1.0
+    score = 0.4 * length_score + 0.4 * repetition_score + 0.2 * name_score
+    return {
+        "score": round(score, 3),
+        "length": len(text),
+        "repetition": round(_repetition_ratio(text), 3),
+        "names_found": name_score,
+    }
+
+
+def generate_drafts(generate, k, rate_limiter=None):
+    """
+    generate()를 k번 동시에 호출하고, 완료되는 순서대로 (초안 번호, 결과)를 내보냅니다.
+    실패한 초안은 결과 자리에 예외 객체가 들어갑니다.
+    """
+    def run():
+        if rate_limiter is None:
+            return generate()
+        with rate_limiter:
+            return generate()
+
+    with ThreadPoolExecutor(max_workers=k) as executor:
+        futures = {executor.submit(run): idx for idx in range(k)}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+
+
+def rank_drafts(drafts, target_chars=2500, character_names=()):
+    """
+    초안 텍스트 리스트를 점수 순으로 정렬해 [(점수 정보, 텍스트)]로 반환합니다.
+    """
+    scored = [(score_draft(text, target_chars, character_names), text) for text in drafts]
+    return sorted(scored, key=lambda item: item[0]["score"], reverse=True)
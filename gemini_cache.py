@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, is_dataclass
+
+# 기본 캐시 위치 및 정책
+DEFAULT_CACHE_PATH = os.path.join(".cache", "gemini_responses.sqlite3")
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60      # 7일
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024         # 50MB
+
+
+def _config_to_dict(generation_config):
+    """
+    GenerationConfig(dict, dataclass, proto 등)를 해시 가능한 dict로 변환합니다.
+    """
+    if generation_config is None:
+        return None
+    if isinstance(generation_config, dict):
+        return generation_config
+    if is_dataclass(generation_config):
+        return asdict(generation_config)
+    if hasattr(generation_config, "to_dict"):
+        return generation_config.to_dict()
+    return repr(generation_config)
+
+
+def make_cache_key(model_name, prompt_parts, generation_config=None):
+    """
+    (모델, 프롬프트 파트, 생성 설정)의 내용 해시로 캐시 키를 만듭니다.
+    """
+    if isinstance(prompt_parts, str):
+        prompt_parts = [prompt_parts]
+    payload = json.dumps(
+        {
+            "model": model_name,
+            "parts": list(prompt_parts),
+            "config": _config_to_dict(generation_config),
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Gemini 응답을 SQLite 파일에 저장하는 내용 주소 기반 캐시.
+    TTL이 지난 항목은 무시되고, 전체 크기가 max_bytes를 넘으면
+    가장 오래 사용되지 않은 항목부터 삭제합니다.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Streamlit은 세션마다 다른 스레드에서 실행되므로 check_same_thread를 끕니다.
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                latency REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        """
+        캐시된 응답을 반환합니다. 없거나 만료되었으면 None.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, latency, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            self.saved_seconds += row[1]
+            return row[0]
+
+    def put(self, key, response, latency=0.0):
+        """
+        응답을 저장하고 필요하면 오래된 항목을 정리합니다.
+        """
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, response, size, latency, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        # 만료된 항목 삭제
+        self._conn.execute("DELETE FROM responses WHERE ? - created_at > ?", (now, self.ttl_seconds))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 최근 사용 시각이 오래된 순서로 크기 한도 아래가 될 때까지 삭제
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def get_or_compute(self, key, compute, cacheable=None):
+        """
+        캐시에 있으면 바로 반환하고, 없으면 compute()를 호출해 결과를 저장합니다.
+        cacheable(text)가 False이면(예: 오류 메시지) 저장하지 않습니다.
+        (응답 텍스트, 캐시 적중 여부)를 반환합니다.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached, True
+
+        start = time.perf_counter()
+        text = compute()
+        latency = time.perf_counter() - start
+        if cacheable is None or cacheable(text):
+            self.put(key, text, latency)
+        return text, False
+
+    def stats(self):
+        """
+        적중률과 절약된 대기 시간을 반환합니다.
+        """
+        total = self.hits + self.misses
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def stats_caption(self):
+        """
+        화면 하단에 표시할 한 줄 요약을 만듭니다.
+        """
+        s = self.stats()
+        return (
+            f"💾 응답 캐시 적중률 {s['hit_rate']:.0%} "
+            f"({s['hits']}/{s['hits'] + s['misses']}), "
+            f"절약된 대기 시간 {s['saved_seconds']:.1f}초, 저장 항목 {s['entries']}개"
+        )
+
+
+def generate_with_cache(model, prompt_parts, cache=None, generation_config=None):
+    """
+    genai.GenerativeModel 호출을 캐시를 거쳐 수행합니다.
+    cache가 None이면 캐시 없이 그대로 호출합니다.
+    (응답 텍스트, 캐시 적중 여부)를 반환합니다.
+    """
+    def compute():
+        if generation_config is None:
+            return model.generate_content(prompt_parts).text
+        return model.generate_content(prompt_parts, generation_config=generation_config).text
+
+    if cache is None:
+        return compute(), False
+
+    key = make_cache_key(getattr(model, "model_name", str(model)), prompt_parts, generation_config)
+    return cache.get_or_compute(key, compute)
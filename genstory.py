@@ -1,7 +1,14 @@
 import streamlit as st
 import google.generativeai as genai
+from gemini_cache import ResponseCache, generate_with_cache
+from history_manager import HistoryManager
 
 
+# 프로세스 전체에서 공유하는 응답 캐시
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache()
+
 
 # Google Gemini API 키 입력란
 gemini_api_key = st.text_input("Gemini API Key를 입력하세요", type="password")
@@ -13,9 +20,10 @@ model_choice = st.selectbox(
 )
 
 
-# 응답 히스토리 추적
+# 응답 히스토리 추적 (토큰 예산을 넘는 오래된 대화는 요약으로 압축)
 if "history" not in st.session_state:
-    st.session_state.history = []  # 히스토리가 없으면 초기화
+    st.session_state.history = HistoryManager(token_budget=3000, keep_recent=2)  # 히스토리가 없으면 초기화
+history = st.session_state.history
 
 
 if gemini_api_key:
@@ -91,7 +99,7 @@ st.write(f"""선택 결과:
 n = st.number_input("생성하려는 프롤로그의 길이를 자연수로 입력하세요.: ", min_value=1, step=1)
 
 # 프롤로그 생성 요청을 위한 프로프트 구성
-prompt = (
+request = (
     f'주어진 정보를 바탕으로 {n}자 분량의 소설 프롤로그를 작성해줘'
     f"""선택 결과: 
         시점: {point_of_view}  
@@ -105,27 +113,44 @@ prompt = (
         주변인물: {sub_character}"""
 )
 
-# 이전 응답 히스토리를 포함한 프롬프트 구성
-if st.session_state.history:
-    prompt = "\n".join(st.session_state.history) + "\n" + prompt
-
 # 결과 초기화
 results = ""
 
+# 동일한 설정으로 다시 누르면 저장된 결과를 재사용 (선택)
+use_cache = st.checkbox("동일한 요청이면 저장된 결과 재사용 (API 호출 절약)", value=False)
+response_cache = get_response_cache()
+
 # 프롤로그 생성 버튼
 if st.button("🚀 프롤로그 생성하기"):
-    response = model.generate_content(prompt)
-    results = response.text  # 버튼 클릭 후 결과를 저장
+    # 이전 응답 히스토리(예산 내 최근 원문 + 오래된 대화 요약)를 포함한 프롬프트 구성
+    prompt = request
+    if len(history):
+        prompt = history.build_context() + "\n" + request
+
+    results, cache_hit = generate_with_cache(model, prompt, response_cache if use_cache else None)
+    if cache_hit:
+        st.info("💾 캐시된 결과를 불러왔습니다.")
     
-    # 새로운 결과를 히스토리에 추가
-    st.session_state.history.append(f"프롤로그 생성 요청: {prompt}")
-    st.session_state.history.append(f"모델 응답: {results}")
+    # 새로운 결과를 히스토리에 추가 (이전 문맥을 제외한 요청만 저장)
+    history.add_turn(request, results)
 
 # 출력 결과
 if results:  # 결과가 있을 경우에만 출력
     st.markdown(f"**출력 결과:**\n\n {results}")
 
-# 히스토리 보기 (디버깅용)
+if use_cache:
+    st.caption(response_cache.stats_caption())
+
+# 히스토리 보기 (디버깅용) - 현재 페이지의 항목만 렌더링
 st.write("### 출력 히스토리")
-for entry in st.session_state.history:
-    st.write(entry)
\ No newline at end of file
+if len(history):
+    page_size = 5
+    page_number = st.number_input(
+        f"페이지 (총 {history.page_count(page_size)}쪽, 최신순)",
+        min_value=1, max_value=history.page_count(page_size), value=1, step=1
+    )
+    st.caption(f"전체 {len(history)}개 중 {history.compacted}개는 프롬프트에 요약으로만 포함됩니다.")
+    for idx, turn in history.page(page_number, page_size):
+        with st.expander(f"{idx}번째 프롤로그" + (" (요약됨)" if turn["summary"] else "")):
+            st.write(f"프롤로그 생성 요청: {turn['request']}")
+            st.write(f"모델 응답: {turn['response']}")
\ No newline at end of file
@@ -0,0 +1,111 @@
+import math
+import re
+
+from token_budget import estimate_tokens
+
+
+def summarize_locally(text, max_chars=200):
+    """
+    모델 호출 없이 앞부분 문장만 잘라 간단한 요약을 만듭니다.
+    """
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    sentences = re.split(r"(?<=[.!?。])\s+", text)
+    summary = ""
+    for sentence in sentences:
+        if len(summary) + len(sentence) > max_chars:
+            break
+        summary += sentence + " "
+    return (summary.strip() or text[:max_chars]) + " …"
+
+
+class HistoryManager:
+    """
+    요청/응답 대화 기록을 관리합니다.
+    프롬프트에는 토큰 예산 안에 들어가는 최근 대화만 원문으로 넣고,
+    그보다 오래된 대화는 요약으로 압축합니다.
+    """
+
+    def __init__(self, token_budget=3000, keep_recent=2, summarizer=None):
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.summarizer = summarizer or summarize_locally
+        self.turns = []          # {"request", "response", "summary", "tokens"}
+        self.compacted = 0       # 앞에서부터 요약으로만 남은 대화 수
+
+    def __len__(self):
+        return len(self.turns)
+
+    def add_turn(self, request, response):
+        """
+        새 대화를 추가하고 필요하면 오래된 대화를 압축합니다.
+        """
+        self.turns.append({
+            "request": request,
+            "response": response,
+            "summary": None,
+            "tokens": estimate_tokens(request) + estimate_tokens(response),
+        })
+        self.compact()
+
+    def _raw_tokens(self):
+        return sum(turn["tokens"] for turn in self.turns[self.compacted:])
+
+    def compact(self):
+        """
+        원문으로 유지되는 대화가 토큰 예산을 넘으면, 최근 keep_recent개를 제외한
+        오래된 대화부터 요약으로 바꿉니다.
+        """
+        while (self._raw_tokens() > self.token_budget
+               and len(self.turns) - self.compacted > self.keep_recent):
+            turn = self.turns[self.compacted]
+            turn["summary"] = self.summarizer(turn["response"])
+            self.compacted += 1
+
+    def build_context(self):
+        """
+        다음 프롬프트 앞에 붙일 문맥을 만듭니다.
+        (압축된 대화 요약) + (예산 안에 들어가는 최근 대화 원문)
+        예산에 들어가지 않는 오래된 대화는 버리지 않고 요약으로 넣습니다.
+        """
+        raw_turns = self.turns[self.compacted:]
+        recent = []
+        used = sum(estimate_tokens(turn["summary"]) for turn in self.turns[:self.compacted])
+        for turn in reversed(raw_turns):
+            if recent and used + turn["tokens"] > self.token_budget:
+                break
+            recent.append(turn)
+            used += turn["tokens"]
+        skipped = raw_turns[:len(raw_turns) - len(recent)]
+
+        lines = []
+        if self.compacted or skipped:
+            lines.append("이전 내용 요약:")
+            for idx, turn in enumerate(self.turns[:self.compacted], start=1):
+                lines.append(f"{idx}. {turn['summary']}")
+            for idx, turn in enumerate(skipped, start=self.compacted + 1):
+                lines.append(f"{idx}. {self._context_summary(turn)}")
+        for turn in reversed(recent):
+            lines.append(f"프롤로그 생성 요청: {turn['request']}")
+            lines.append(f"모델 응답: {turn['response']}")
+        return "\n".join(lines)
+
+    def _context_summary(self, turn):
+        """
+        아직 압축되지 않은 대화의 문맥용 요약. 한 번만 만들고, 압축 표시(summary)와는 따로 둡니다.
+        """
+        if turn.get("context_summary") is None:
+            turn["context_summary"] = self.summarizer(turn["response"])
+        return turn["context_summary"]
+
+    def page_count(self, page_size):
+        return max(1, math.ceil(len(self.turns) / page_size))
+
+    def page(self, page_number, page_size):
+        """
+        1부터 시작하는 페이지 번호에 해당하는 (번호, 대화) 목록을 최신순으로 반환합니다.
+        """
+        newest_first = list(enumerate(self.turns, start=1))[::-1]
+        start = (page_number - 1) * page_size
+        return newest_first[start:start + page_size]
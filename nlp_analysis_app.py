@@ -1,10 +1,36 @@
-import stanza
-import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
+import time
+_script_start = time.perf_counter()
+
+import logging
 import os
-import google.generativeai as genai
+import streamlit as st
+from parse_cache import SentenceParseCache, fetch_server_info, make_remote_parser, make_stanza_parser, split_sentences
+from concurrent.futures.process import BrokenProcessPool
+from corpus_batch import DEFAULT_PROCESSORS, make_pool, read_corpus, run_batch
+from arc_renderer import render_sentence_html
+from token_table import NER_match, POS_match, TokenTable, deprel_match
+from translation_memory import TRANSLATION_CONFIG, TranslationMemory, translate_sentences
+from draft_generator import RateLimiter
+from warm_start import BackgroundLoader, StartupTimings
+
+# stanza, pandas, google.generativeai는 무거우므로 처음 필요할 때 import합니다.
+# 시작 시간 로그는 전용 핸들러로만 출력 (루트 로거와 Streamlit 로그 설정은 건드리지 않음)
+startup_logger = logging.getLogger("startup")
+if not startup_logger.handlers:
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    startup_logger.addHandler(_log_handler)
+    startup_logger.setLevel(logging.INFO)
+    startup_logger.propagate = False
+
+# 시작 단계별 소요 시간 (서버 프로세스 전체에서 공유)
+@st.cache_resource
+def get_startup_timings():
+    return StartupTimings()
+
+startup_timings = get_startup_timings()
+if "앱 모듈 import" not in startup_timings.steps:
+    startup_timings.record("앱 모듈 import", time.perf_counter() - _script_start)
 
 def is_stanza_model_downloaded(lang_code='nl'):
     """
@@ -12,72 +38,92 @@ def is_stanza_model_downloaded(lang_code='nl'):
     """
     home = os.path.expanduser("~")
     model_path = os.path.join(home, 'stanza_resources', lang_code)
-    return os.path.isdir(model_path) and bool(os.listdir(model_path))
+    return os.path.isdir(model_path) and any(os.scandir(model_path))
 
 # Streamlit 앱 시작
 st.title("🇳🇱 Stanza 네덜란드어 모델 확인 및 다운로드")
 
-if is_stanza_model_downloaded('nl'):
+model_downloaded = is_stanza_model_downloaded('nl')
+if model_downloaded:
     st.success("✅ 네덜란드어 모델이 이미 다운로드되어 있습니다.")
 else:
     st.warning("⚠️ 네덜란드어 모델이 없습니다. 다운로드가 필요합니다.")
     
     if st.button("📥 모델 다운로드"):
         with st.spinner("네덜란드어 모델을 다운로드 중입니다..."):
-            stanza.download('nl')
+            startup_timings.import_module("stanza").download('nl')
         st.success("✅ 다운로드 완료! 앱을 새로고침하세요.")
 
-# 네덜란드어 모델 초기화 (캐싱)
+# 공유 분석 서버 (parse_server.py). 설정하면 이 프로세스는 모델을 올리지 않고 서버에 분석을 맡김 (서버를 쓸 수 없으면 직접 분석)
+PARSE_SERVER_URL = os.environ.get("PARSE_SERVER_URL", "").rstrip("/")
+
+# 화면에 필요한 처리기만 실행 (표: 품사/표제어, 시각화: +depparse, 개체명: +ner)
+BASE_PROCESSORS = 'tokenize,mwt,pos,lemma'
+# 메모리에는 모든 처리기를 올린 파이프라인 한 벌만 두고, 분석할 때 필요한 처리기만 골라 실행
+ALL_PROCESSORS = BASE_PROCESSORS + ',depparse,ner'
+
+def required_processors(show_dependencies, show_entities):
+    processors = BASE_PROCESSORS
+    if show_dependencies:
+        processors += ',depparse'
+    if show_entities:
+        processors += ',ner'
+    return processors
+
+def _load_pipeline():
+    stanza = startup_timings.import_module("stanza")
+    # 모델이 이미 있으면 시작할 때마다 resources.json을 내려받지 않음
+    options = {"download_method": None} if is_stanza_model_downloaded('nl') else {}
+    return stanza.Pipeline('nl', processors=ALL_PROCESSORS, **options)
+
+# 네덜란드어 모델 초기화 (백그라운드 스레드에서 로드 시작)
+# 세션마다 체크박스 상태가 달라도 같은 파이프라인을 공유하므로 서로 캐시를 밀어내지 않음
 @st.cache_resource
+def get_model_loader():
+    return BackgroundLoader("파이프라인 로드", _load_pipeline, startup_timings)
+
 def load_model():
-    return stanza.Pipeline('nl', processors='tokenize,mwt,pos,lemma,depparse,ner')
-
-nlp = load_model()
-
-# 품사 매핑
-POS_match = {
-    "ADJ"  : "형용사", "ADV"  : "부사", "ADP"  : "전치사", "AUX"  : "조동사",
-    "CCONJ": "접속사", "DET"  : "정관사", "NUM"  : "숫자", "NOUN" : "명사",
-    "PRON" : "대명사", "PROPN" : "고유명사", "PUNCT": "구두점", "VERB" : "동사"
-}
-
-# 의존 관계 매핑
-deprel_match = {
-    "nsubj": "주어", "obj": "목적어", "obl": "부사어", "root": "중심 동사", "amod": "형용사 수식",
-    "advmod": "부사 수식", "case": "격 표시", "compound": "복합어", "det": "한정사",
-    "nmod": "명사 수식", "conj": "접속", "cc": "접속사", "xcomp": "보어", "mark": "절 표지",
-    "cop": "연결 동사", "appos": "동격", "punct": "구두점", "parataxis": "병렬", "acl": "형용사절",
-    "acl:relcl":"명사 수식",
-    "expl:pv": "가주어",
-    "obl:arg": "필수 부사구",
-    "nmod:poss":"소유격 명사 수식어",
-    "aux": "보조 동사",
-    "flat" : "구성 요소",
-    "compound:prt":"분리전철",
-    "nummod":"수사의 명사 수식",
-    "nsubj:pass" : "수동태 명사 주어",
-    "aux:pass" : "수동태 조동사"
-}
-
-# 30가지 색상 리스트 준비 (matplotlib tab20 + 추가 10가지)
-base_colors = plt.get_cmap('tab20').colors  # 20가지
-extra_colors = [
-    (0.9, 0.1, 0.1), (0.1, 0.9, 0.1), (0.1, 0.1, 0.9),
-    (0.9, 0.5, 0.1), (0.5, 0.1, 0.9), (0.1, 0.9, 0.5),
-    (0.6, 0.2, 0.2), (0.2, 0.6, 0.2), (0.2, 0.2, 0.6),
-    (0.8, 0.3, 0.4)
-]
-colors_30 = list(base_colors) + extra_colors
-
-def get_color_by_distance(dist, colors=colors_30):
     """
-    간격 차이에 따라 색상 반환 (1 이상 30 이하)
+    로드가 끝날 때까지 기다려 파이프라인을 반환합니다. 실패하면 다음 실행에서 다시 시도합니다.
     """
-    if dist < 1:
-        dist = 1
-    if dist > len(colors):
-        dist = len(colors)
-    return colors[dist - 1]
+    try:
+        return get_model_loader().result()
+    except Exception:
+        get_model_loader.clear()
+        raise
+
+# 공유 분석 서버를 쓰는 문장 캐시 (서버 확인에 실패하면 캐시되지 않아 다음 실행에서 다시 확인)
+@st.cache_resource
+def get_remote_parse_cache():
+    # 서버는 모든 처리기를 한 번에 실행하므로 캐시 키도 서버 설정을 따름
+    info = fetch_server_info(PARSE_SERVER_URL)
+    config_key = f"nl|{info['processors']}|stanza {info['stanza']}"
+    return SentenceParseCache(make_remote_parser(PARSE_SERVER_URL), config_key)
+
+# 문장 단위 분석 캐시 (바뀐 문장만 Stanza로 분석, 디스크에 영구 저장)
+# 처리기 조합(최대 4가지)마다 하나씩 두지만 모두 같은 파이프라인을 참조함
+@st.cache_resource
+def get_parse_cache(processors):
+    pipeline = load_model()
+    config_key = f"nl|{processors}|stanza {startup_timings.import_module('stanza').__version__}"
+    return SentenceParseCache(make_stanza_parser(pipeline, processors), config_key)
+
+# 말뭉치 일괄 분석용 작업자 풀 (버튼을 누를 때마다 작업자와 모델을 다시 띄우지 않도록 하나만 유지)
+@st.cache_resource(max_entries=1)
+def get_corpus_pool(workers):
+    return make_pool(DEFAULT_PROCESSORS, workers)
+
+TRANSLATION_MODEL = 'gemini-2.5-flash'
+
+# 문장 단위 번역 메모리 (번역은 결정적 작업이므로 항상 사용, 디스크에 영구 저장)
+@st.cache_resource
+def get_translation_memory():
+    return TranslationMemory(TRANSLATION_MODEL)
+
+# 모든 세션이 공유하는 번역 요청 제한
+@st.cache_resource
+def get_rate_limiter():
+    return RateLimiter(max_concurrent=4, per_minute=15)
 
 # 페이지 설정
 st.set_page_config(page_title="네덜란드어 의존 구문 분석기", layout="wide")
@@ -85,97 +131,123 @@ st.title("🇳🇱 네덜란드어 의존 구문 분석기")
 
 # 사용자 입력
 user_input = st.text_area("분석할 네덜란드어 문장을 입력한 후 Ctrl+Enter로 분석을 시작하세요.", height=150)
+option_cols = st.columns(2)
+show_dependencies = option_cols[0].checkbox("의존 구문 분석 (헤드/의존 관계 + 시각화)", value=True)
+show_entities = option_cols[1].checkbox("개체명 보기 (NER)", value=False)
+processors = required_processors(show_dependencies, show_entities)
+
+# 모델이 있으면 문장을 입력하는 동안 미리 로드
+if PARSE_SERVER_URL:
+    st.caption(f"🔌 공유 분석 서버 사용: {PARSE_SERVER_URL}")
+elif model_downloaded and not get_model_loader().ready():
+    st.caption("⏳ 분석 모델을 백그라운드에서 불러오는 중입니다. 문장을 먼저 입력해도 됩니다.")
 
 # 분석 처리
+analysed_sentences = []
 if user_input:
     with st.spinner("분석 중..."):
-        doc = nlp(user_input)
-
-        for i, sentence in enumerate(doc.sentences, start=1):
-            sentence_data = []
-            arcs = []
-            word_list = [word.text for word in sentence.words]
-
-            for word in sentence.words:
-                head_word = sentence.words[word.head - 1].text if word.head > 0 else 'ROOT'
-                sentence_data.append([
-                    word.text,
-                    word.lemma,
-                    POS_match.get(word.pos, word.pos),
-                    word.pos,
-                    head_word,
-                    deprel_match.get(word.deprel, word.deprel),
-                    word.deprel
-                ])
-
-                if word.head > 0:
-                    arcs.append((word.head - 1, word.id - 1))  # (head idx, dependent idx)
-
+        sentences = None
+        if PARSE_SERVER_URL:
+            try:
+                parse_cache = get_remote_parse_cache()
+                sentences = parse_cache.parse(user_input)
+            except Exception as e:
+                # 서버가 없거나 응답하지 않으면 이 프로세스의 파이프라인으로 분석
+                get_remote_parse_cache.clear()
+                st.warning(f"⚠️ 공유 분석 서버를 사용할 수 없어 이 앱에서 직접 분석합니다: {e}")
+        if sentences is None:
+            parse_cache = get_parse_cache(processors)
+            sentences = parse_cache.parse(user_input)
+        analysed_sentences = sentences
+        st.caption(parse_cache.stats_caption())
+
+        # 문서 하나를 열 단위 표로 한 번만 만들고, 표/시각화/내보내기가 모두 이 표를 사용
+        table = TokenTable(sentences)
+
+        for i, sentence in enumerate(sentences, start=1):
             # 결과 표
-            if sentence_data:
-                st.subheader(f"📝 문장 {i}: {sentence.text}")
-                df = pd.DataFrame(
-                    sentence_data,
-                    columns=["단어", "표제어", "품사", "품사 코드", "헤드 단어", "의존 관계", "의존 관계 코드"]
-                )
-                
-                # 인덱스를 1부터 시작하도록 수정
-                df.index = df.index + 1  # 인덱스 값에 1을 더하여 1부터 시작하게 설정
-                
-                st.dataframe(df)
+            if sentence['words']:
+                st.subheader(f"📝 문장 {i}: {sentence['text']}")
+                st.dataframe(table.sentence_frame(i - 1, with_dependencies=show_dependencies))
+
+            # 개체명 (NER을 요청한 경우에만 실행됨)
+            if show_entities:
+                if sentence['entities']:
+                    st.markdown("🏷️ **개체명**: " + ", ".join(
+                        f"{ent['text']} ({NER_match.get(ent['type'], ent['type'])})" for ent in sentence['entities']
+                    ))
+                else:
+                    st.caption("🏷️ 인식된 개체명이 없습니다.")
 
             # 시각화
-            if arcs:
+            arc_key = table.arc_key(i - 1) if show_dependencies else ()
+            if any(head > 0 for _, head, _ in arc_key):
                 st.markdown("🎯 **의존 구문 시각화**")
 
-                fig, ax = plt.subplots(figsize=(len(word_list) * 2.0, 3))
-
-                # 단어 개수가 15개를 초과하면 시각화 높이를 2배로 설정
-                if len(word_list) > 15:
-                    fig, ax = plt.subplots(figsize=(len(word_list) * 2.0, 6))  # 높이를 2배로 설정
-
-                positions = list(range(len(word_list)))
-
-                # 단어 라벨
-                ax.set_xticks(positions)
-                ax.set_xticklabels(word_list, fontsize=14)
-                ax.set_yticks([])
-                ax.set_ylim(0, max(4, max(abs(dep - head) for head, dep in arcs) + 1))  # y축 범위 자동조절
-                ax.set_xlim(-1, len(word_list))
-
-                # 곡선 그리기 (간격에 따라 색상 지정)
-                for head, dep in arcs:
-                    x_vals = np.linspace(min(head, dep), max(head, dep), 500)
-                    amplitude = abs(dep - head)
-                    if amplitude == 0:
-                        amplitude = 1
-
-                    height = amplitude * np.abs(np.sin(np.pi * (x_vals - min(head, dep)) / (max(head, dep) - min(head, dep))))
-
-                    
-                    # root 여부 확인
-                    if sentence.words[head].deprel == "root":
-                        color = 'red'
-                    else:
-                        color = get_color_by_distance(amplitude)
-
-                    if head < dep:
-                        linestyle = '--'   # 왼쪽 -> 오른쪽 : 실선
-                    else:
-                        linestyle = '-'  # 오른쪽 -> 왼쪽 : 점선
-
-                    ax.plot(x_vals, height, color=color, linestyle=linestyle, linewidth=2)
-
-                ax.set_title("Dependency Structure", fontsize=16)
-                st.pyplot(fig)
+                # 문장 전체를 SVG 하나로 그림 (같은 분석 결과면 캐시된 SVG 재사용)
+                st.markdown(render_sentence_html(arc_key), unsafe_allow_html=True)
 
                 st.markdown("""
                 **범례**  
-                - 실선 : 왼쪽   → 오른쪽  
-                - 점선 : 오른쪽 → 왼쪽  
+                - 점선 : 왼쪽   → 오른쪽 (헤드가 왼쪽)  
+                - 실선 : 오른쪽 → 왼쪽 (헤드가 오른쪽)  
                 - ROOT에 의존한 단어는 빨간색 선
                 """)
 
+        # 내보내기 (같은 열 단위 표에서 바로 생성)
+        if len(table):
+            export_cols = st.columns(2)
+            export_cols[0].download_button("📥 결과 표 CSV", table.to_csv(), file_name="analysis.csv", mime="text/csv")
+            export_cols[1].download_button("📥 CoNLL-U", table.to_conllu().encode("utf-8"), file_name="analysis.conllu")
+
+
+# --- 말뭉치 일괄 분석 ---
+st.markdown("---")
+st.header("📚 말뭉치 일괄 분석")
+
+with st.expander("텍스트/CSV 말뭉치를 한 번에 분석하고 CoNLL-U로 내려받기"):
+    corpus_file = st.file_uploader(
+        "말뭉치 파일 (.txt: 빈 줄로 구분된 문서, .csv: body/text 열)", type=["txt", "csv"]
+    )
+    batch_cols = st.columns(2)
+    corpus_workers = batch_cols[0].number_input("작업자 프로세스 수", min_value=1, max_value=os.cpu_count() or 1, value=min(2, os.cpu_count() or 1))
+    corpus_batch_size = batch_cols[1].number_input("묶음 크기 (문서 수)", min_value=1, max_value=256, value=32)
+
+    if corpus_file is not None and st.button("🚀 일괄 분석 시작"):
+        try:
+            documents = read_corpus(corpus_file.getvalue(), corpus_file.name)
+        except ValueError as e:
+            st.error(f"⚠️ {e}")
+            documents = []
+        if documents:
+            progress_bar = st.progress(0.0, text=f"문서 0/{len(documents)}")
+            name = f"{os.path.splitext(corpus_file.name)[0]}-{time.strftime('%Y%m%d_%H%M%S')}"
+            try:
+                report = run_batch(
+                    documents, os.path.join(".cache", "corpus"), name,
+                    workers=int(corpus_workers), batch_size=int(corpus_batch_size),
+                    progress=lambda done, total: progress_bar.progress(done / total, text=f"문서 {done}/{total}"),
+                    pool=get_corpus_pool(int(corpus_workers)),
+                )
+            except BrokenProcessPool:
+                # 작업자가 죽은 풀은 다시 쓸 수 없으므로 버리고 다음 실행에서 새로 만듦
+                get_corpus_pool.clear()
+                raise
+            st.success(
+                f"✅ 문서 {report['documents']}개, 문장 {report['sentences']:,}개, 단어 {report['words']:,}개 분석 완료 "
+                f"({report['seconds']:.1f}초, 초당 {report['sentences_per_second']:.1f}문장)"
+            )
+            pd = startup_timings.import_module("pandas")
+            summary = pd.read_csv(report['summary_path'])
+            summary['한국어'] = [
+                (POS_match if kind == 'pos' else deprel_match).get(label, label)
+                for kind, label in zip(summary['kind'], summary['label'])
+            ]
+            st.dataframe(summary)
+            with open(report['conllu_path'], 'rb') as f:
+                st.download_button("📥 CoNLL-U 다운로드", f, file_name=os.path.basename(report['conllu_path']))
+            with open(report['summary_path'], 'rb') as f:
+                st.download_button("📥 빈도 요약 CSV 다운로드", f, file_name=os.path.basename(report['summary_path']), mime="text/csv")
 
 # --- Gemini 번역 기능 추가 ---
 st.markdown("---")
@@ -185,25 +257,48 @@ st.header("✨ 네덜란드어 문장 번역 (Gemini 2.5-flash)")
 gemini_api_key = st.text_input("Gemini API Key를 입력하세요", type="password")
 
 if gemini_api_key:
+    genai = startup_timings.import_module("google.generativeai")
     genai.configure(api_key=gemini_api_key)
     try:
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        
-        # 번역할 문장 입력
-        dutch_text_for_translation = st.text_area("번역할 네덜란드어 문장을 입력하세요", height=100)
-        
+        model = genai.GenerativeModel(TRANSLATION_MODEL)
+
+        # 번역할 문장 입력 (기본값은 위에서 분석한 문장)
+        dutch_text_for_translation = st.text_area("번역할 네덜란드어 문장을 입력하세요", value=user_input, height=100)
+
         if st.button("🚀 번역하기"):
             if not dutch_text_for_translation:
                 st.warning("번역할 문장을 입력해주세요.")
             else:
                 with st.spinner("Gemini가 번역 중입니다..."):
-                    prompt = f"다음 네덜란드어 문장을 자연스러운 한국어로 번역해줘. 문맥을 고려하여 정확하게 번역해줘. 오역은 하지 말아줘.\n네덜란드어: {dutch_text_for_translation}\n한국어:"
-                    
+                    # 분석한 글이면 분석 결과의 문장 단위를 그대로 써서 문장 번호를 맞춤
+                    if dutch_text_for_translation == user_input and analysed_sentences:
+                        source_sentences = [s['text'] for s in analysed_sentences]
+                    else:
+                        source_sentences = split_sentences(dutch_text_for_translation)
+
                     try:
-                        response = model.generate_content(prompt)
-                        translated_text = response.text
-                        st.success("✅ 번역 완료!")
-                        st.markdown(f"**번역 결과:**\n\n> {translated_text}")
+                        translations = translate_sentences(
+                            source_sentences, get_translation_memory(),
+                            lambda prompt: model.generate_content(prompt, generation_config=TRANSLATION_CONFIG).text,
+                            rate_limiter=get_rate_limiter(),
+                        )
+                        new_count = sum(1 for _, origin in translations if origin == "new")
+                        failed_count = sum(1 for _, origin in translations if origin == "failed")
+                        memory_count = len(translations) - new_count - failed_count
+                        st.success(f"✅ 번역 완료! (새로 번역 {new_count}문장, 번역 메모리 {memory_count}문장)")
+                        if failed_count:
+                            st.warning(f"⚠️ {failed_count}문장은 응답 형식이 올바르지 않아 번역하지 못했습니다. 다시 번역하면 해당 문장만 요청합니다.")
+                        st.markdown("**번역 결과:**\n\n> " + " ".join(t for t, _ in translations))
+                        pd = startup_timings.import_module("pandas")
+                        origin_labels = {"exact": "메모리", "normalized": "메모리(정규화)", "new": "새 번역", "failed": "번역 실패"}
+                        translation_table = pd.DataFrame({
+                            "네덜란드어": source_sentences,
+                            "한국어": [t for t, _ in translations],
+                            "출처": [origin_labels[origin] for _, origin in translations],
+                        })
+                        translation_table.index = [f"문장 {i}" for i in range(1, len(translations) + 1)]
+                        st.dataframe(translation_table)
+                        st.caption(get_translation_memory().stats_caption())
                     except Exception as e:
                         st.error(f"번역 중 오류가 발생했습니다: {e}")
                         st.info("API 키가 올바른지 확인하거나, 입력 문장이 부적절한지 확인해주세요.")
@@ -211,4 +306,8 @@ if gemini_api_key:
         st.error(f"API 키 설정에 오류가 있습니다: {e}")
         st.info("올바른 Gemini API 키를 입력했는지 확인해주세요.")
 else:
-    st.info("번역 기능을 사용하려면 Gemini API 키를 입력하세요.")
\ No newline at end of file
+    st.info("번역 기능을 사용하려면 Gemini API 키를 입력하세요.")
+
+# --- 시작 시간 기록 ---
+with st.expander("⏱️ 시작 시간 기록 (import / 모델 로드)"):
+    st.caption(startup_timings.caption())
@@ -6,6 +6,7 @@ from langchain.embeddings import HuggingFaceEmbeddings
 from langchain.vectorstores import FAISS
 import google.generativeai as genai
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from token_budget import MetricsTable, check_context, estimate_tokens, timed_generate
 
 # 1. 환경변수 & Gemini API 설정
 load_dotenv()
@@ -51,14 +52,30 @@ def create_faiss_index(text, embedding_model):
     db = FAISS.from_texts(chunks, embedding_model)
     return db
 
+# 생성 지표(토큰 수, 지연 시간, 추정 비용) 기록용 로컬 테이블
+@st.cache_resource
+def get_metrics_table():
+    return MetricsTable()
+
 # 4. Gemini 텍스트 생성 함수
+MODEL_NAME = "gemini-1.5-flash"
+
 def generate_text_with_gemini(prompt: str, token_limit=300) -> str:
-    model = genai.GenerativeModel("gemini-1.5-flash")
+    model = genai.GenerativeModel(MODEL_NAME)
     generation_config = genai.GenerationConfig(max_output_tokens=token_limit)
-    response = model.generate_content(
-        prompt,
-        generation_config=generation_config
+
+    # 요청 전 컨텍스트 초과 여부 확인
+    context_warning = check_context(MODEL_NAME, estimate_tokens(prompt), token_limit)
+    if context_warning:
+        st.warning(f"⚠️ {context_warning}")
+
+    response, latency, prompt_tokens, completion_tokens = timed_generate(model, prompt, generation_config)
+    # 이어쓰기 횟수를 회차로 기록해 스토리 길이에 따른 생성 시간 변화를 추적
+    get_metrics_table().record(
+        "nondeployment_GenerateStory", MODEL_NAME, prompt_tokens, completion_tokens, latency,
+        chapter=len(st.session_state.get("messages", [])) + 1
     )
+    st.caption(f"🧮 입력 {prompt_tokens:,} 토큰 / 출력 {completion_tokens:,} 토큰 (요청 {token_limit:,}), {latency:.1f}초")
     return response.text
 
 # 5. 스토리라인 생성
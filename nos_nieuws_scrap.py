@@ -164,7 +164,7 @@ def generate_csv_bytes(result):
     if not result:
         return None
     output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=['index', 'title', 'url', 'keywords', 'lange_woorden'])
+    writer = csv.DictWriter(output, fieldnames=['index', 'title', 'url', 'keywords', 'lange_woorden', 'body'])
     writer.writeheader()
     for idx, news in enumerate(result, 1):
         writer.writerow({
@@ -172,7 +172,8 @@ def generate_csv_bytes(result):
             'title': news['title'],
             'url': news['url'],
             'keywords': ', '.join(news['keywords']),
-            'lange_woorden': ', '.join(news['lange_woorden'])
+            'lange_woorden': ', '.join(news['lange_woorden']),
+            'body': news['body']
         })
     return output.getvalue().encode('utf-8-sig')
 
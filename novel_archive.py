@@ -0,0 +1,252 @@
+"""
+소설 한 편을 하나의 파일로 저장하는 압축 아카이브 (.nva)
+
+파일 구조
+    [헤더: MAGIC(4) + 압축 코덱(1)]
+    [회차 블록 1][회차 블록 2] ...          각 회차 본문을 따로 압축해 이어 붙임
+    [인덱스 블록]                            {회차: [오프셋, 길이]} JSON (압축)
+    [푸터: 인덱스 오프셋(8) + 인덱스 길이(8) + FOOTER_MAGIC(4)]
+
+회차를 추가할 때는 파일 끝에 새 블록 → 새 인덱스 → 푸터 순서로 덧붙이고, 기존 인덱스와
+푸터는 건드리지 않습니다(이전 인덱스는 쓰지 않는 공간으로 남음). 쓰는 도중 실패하면 추가한
+부분을 잘라내고, 프로세스가 죽어 끝이 잘린 파일은 열 때 마지막으로 온전한 푸터를 찾아 복구합니다.
+이미 저장된 회차는 다시 쓰지 않으며, 회차 읽기는 인덱스로 바로 찾아가는 O(1) 접근입니다.
+
+마이그레이션:
+    python novel_archive.py migrate MyGreatNovel MyGreatNovel/MyGreatNovel.nva
+    python novel_archive.py list MyGreatNovel/MyGreatNovel.nva
+    python novel_archive.py cat MyGreatNovel/MyGreatNovel.nva 3
+"""
+import argparse
+import json
+import os
+import re
+import struct
+import sys
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstandard가 없으면 zlib 사용
+    zstandard = None
+
+MAGIC = b"NVA1"
+FOOTER_MAGIC = b"NVAI"
+_FOOTER = struct.Struct("<QQ4s")
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+# 같은 파일에 여러 세션이 동시에 회차를 추가하지 않도록 경로별 잠금
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+_CHAPTER_FILE_RE = re.compile(r"chapter_0*(\d+)\.txt$")
+
+
+def _lock_for(path):
+    with _path_locks_guard:
+        return _path_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+def _compress(codec, data):
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return zlib.compress(data, 9)
+
+
+def _decompress(codec, data):
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd로 압축된 아카이브입니다. zstandard 패키지를 설치해주세요.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def archive_path_for(title, directory="./MyGreatNovel"):
+    """
+    소설 제목으로 아카이브 파일 경로를 만듭니다 (파일명에 쓸 수 없는 문자는 _로 바꿈).
+    """
+    safe = re.sub(r'[\\/:*?"<>|\s]+', "_", title.strip()) or "untitled"
+    return os.path.join(directory, f"{safe}.nva")
+
+
+class NovelArchive:
+    """
+    .nva 아카이브 읽기/쓰기
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = _lock_for(path)
+        self._index = None
+        self._end = None  # 마지막으로 온전한 푸터가 끝나는 위치
+        self.codec = None
+        if os.path.exists(path):
+            self._load_index()
+
+    def _load_index(self):
+        with open(self.path, "rb") as f:
+            header = f.read(5)
+            if header[:4] != MAGIC:
+                raise ValueError(f"{self.path}: 소설 아카이브 파일이 아닙니다.")
+            self.codec = header[4]
+            end = f.seek(0, os.SEEK_END)
+            # 헤더만 있는 파일은 첫 회차를 쓰다 실패한 빈 아카이브
+            raw = {} if end == len(MAGIC) + 1 else self._read_index(f, end)
+            if raw is None:
+                # 추가 도중 끝이 잘린 파일: 앞쪽의 마지막 온전한 푸터를 찾음
+                f.seek(0)
+                data = f.read()
+                magic_at = data.rfind(FOOTER_MAGIC, 0, end)
+                while raw is None and magic_at >= 0:
+                    end = magic_at + len(FOOTER_MAGIC)
+                    raw = self._read_index(f, end)
+                    magic_at = data.rfind(FOOTER_MAGIC, 0, magic_at)
+                if raw is None:
+                    raise ValueError(f"{self.path}: 인덱스가 손상되었습니다.")
+        self._index = {int(chapter): tuple(entry) for chapter, entry in raw.items()}
+        self._end = end
+
+    def _read_index(self, f, end):
+        """
+        end에서 끝나는 푸터와 그 인덱스를 읽습니다. 온전하지 않으면 None.
+        """
+        footer_at = end - _FOOTER.size
+        if footer_at < len(MAGIC) + 1:
+            return None
+        f.seek(footer_at)
+        offset, length, magic = _FOOTER.unpack(f.read(_FOOTER.size))
+        if magic != FOOTER_MAGIC or offset + length != footer_at:
+            return None
+        f.seek(offset)
+        try:
+            return json.loads(_decompress(self.codec, f.read(length)))
+        except Exception:
+            return None
+
+    def chapters(self):
+        """
+        저장된 회차 번호 목록 (오름차순)
+        """
+        return sorted(self._index or {})
+
+    def __contains__(self, chapter):
+        return bool(self._index) and chapter in self._index
+
+    def read_chapter(self, chapter):
+        """
+        회차 본문을 읽습니다. 해당 회차 블록만 읽어 압축을 풉니다.
+        """
+        if chapter not in self:
+            raise KeyError(chapter)
+        offset, length = self._index[chapter]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return _decompress(self.codec, f.read(length)).decode("utf-8")
+
+    def iter_chapters(self):
+        """
+        (회차, 본문)을 회차 순서로 하나씩 내보냅니다. 전체를 한 번에 메모리에 올리지 않습니다.
+        """
+        for chapter in self.chapters():
+            yield chapter, self.read_chapter(chapter)
+
+    def append_chapter(self, chapter, text):
+        """
+        회차를 추가합니다. 이미 있는 회차 번호면 새 블록을 가리키도록 인덱스만 바꿉니다.
+        푸터를 마지막에 쓰므로 중간에 실패해도 이전 회차들은 그대로 읽을 수 있습니다.
+        """
+        with self._lock:
+            if os.path.exists(self.path):
+                self._load_index()  # 다른 세션이 추가한 회차 반영
+                mode = "r+b"
+            else:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self.codec = CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+                self._index = {}
+                self._end = len(MAGIC) + 1
+                mode = "w+b"
+
+            block = _compress(self.codec, text.encode("utf-8"))
+            index = dict(self._index)
+            index[chapter] = (self._end, len(block))
+            index_offset = self._end + len(block)
+            index_block = _compress(
+                self.codec,
+                json.dumps({str(k): list(v) for k, v in index.items()}).encode("utf-8"),
+            )
+            with open(self.path, mode) as f:
+                if mode == "w+b":
+                    f.write(MAGIC + bytes([self.codec]))
+                try:
+                    # 온전한 푸터 뒤(잘린 이전 추가의 잔여물 제거)에 새 블록 → 새 인덱스, 마지막에 푸터
+                    f.seek(self._end)
+                    f.truncate()
+                    f.write(block)
+                    f.write(index_block)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    f.write(_FOOTER.pack(index_offset, len(index_block), FOOTER_MAGIC))
+                    f.flush()
+                    os.fsync(f.fileno())
+                except BaseException:
+                    # 디스크 부족 등: 덧붙인 부분을 잘라내 이전 푸터가 다시 파일 끝이 되도록 함
+                    f.seek(self._end)
+                    f.truncate()
+                    raise
+            self._index = index
+            self._end = index_offset + len(index_block) + _FOOTER.size
+
+
+def migrate_directory(source_dir, archive_path):
+    """
+    chapter_NN.txt / chapter_00N.txt 파일들을 회차 번호 순서로 아카이브에 가져옵니다.
+    가져온 회차 번호 목록을 반환합니다.
+    """
+    found = []
+    for name in os.listdir(source_dir):
+        match = _CHAPTER_FILE_RE.match(name)
+        if match:
+            found.append((int(match.group(1)), name))
+
+    archive = NovelArchive(archive_path)
+    for chapter, name in sorted(found):
+        with open(os.path.join(source_dir, name), encoding="utf-8") as f:
+            archive.append_chapter(chapter, f.read())
+    return [chapter for chapter, _ in sorted(found)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="소설 아카이브(.nva) 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    migrate = sub.add_parser("migrate", help="chapter_*.txt 디렉터리를 아카이브로 가져오기")
+    migrate.add_argument("source_dir")
+    migrate.add_argument("archive")
+
+    list_cmd = sub.add_parser("list", help="회차 목록 보기")
+    list_cmd.add_argument("archive")
+
+    cat = sub.add_parser("cat", help="회차 본문 출력")
+    cat.add_argument("archive")
+    cat.add_argument("chapter", type=int)
+
+    args = parser.parse_args(argv)
+    if args.command == "migrate":
+        chapters = migrate_directory(args.source_dir, args.archive)
+        size = os.path.getsize(args.archive)
+        print(f"{len(chapters)}개 회차를 {args.archive}에 저장했습니다 ({size:,} bytes).")
+    elif args.command == "list":
+        archive = NovelArchive(args.archive)
+        for chapter in archive.chapters():
+            offset, length = archive._index[chapter]
+            print(f"{chapter:>4}화  offset={offset:<10} compressed={length:,} bytes")
+    elif args.command == "cat":
+        sys.stdout.write(NovelArchive(args.archive).read_chapter(args.chapter))
+
+
+if __name__ == "__main__":
+    main()
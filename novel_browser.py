@@ -0,0 +1,54 @@
+import math
+
+# 한 페이지에 보여줄 소설 제목 수
+PAGE_SIZE = 20
+
+
+def fetch_title_page(client, page=1, page_size=PAGE_SIZE):
+    """
+    중복 없는 소설 제목 한 페이지를 서버에서 가져옵니다 (story_titles RPC, sql/story_browser.sql).
+    ([{"title", "chapter_count"}], 전체 페이지 수)를 반환합니다.
+    """
+    response = client.rpc(
+        'story_titles', {"p_limit": page_size, "p_offset": (page - 1) * page_size}
+    ).execute()
+    rows = response.data or []
+    total = rows[0]["total_titles"] if rows else 0
+    return rows, max(1, math.ceil(total / page_size))
+
+
+def local_title_page(store, page=1, page_size=PAGE_SIZE):
+    """
+    Supabase 없이 로컬 저장소(StoryStore)에서 fetch_title_page와 같은 형태로 제목 한 페이지를 만듭니다.
+    """
+    titles = store.titles()
+    start = (page - 1) * page_size
+    rows = [
+        {"title": title, "chapter_count": len(store.list_chapters(title))}
+        for title in titles[start:start + page_size]
+    ]
+    return rows, max(1, math.ceil(len(titles) / page_size))
+
+
+def fetch_chapter_list(client, title):
+    """
+    한 소설의 회차 번호와 글자 수를 한 번의 요청으로 가져옵니다 (story_chapters RPC).
+    [{"chapter", "length"}]를 반환합니다.
+    """
+    response = client.rpc('story_chapters', {"p_title": title}).execute()
+    return response.data or []
+
+
+def fetch_chapter_contents(client, title, chapter):
+    """
+    (제목, 회차)의 본문을 가져옵니다. 없으면 None.
+    """
+    response = (
+        client.table('stories')
+        .select('contents')
+        .eq('title', title)
+        .eq('chapter', chapter)
+        .limit(1)
+        .execute()
+    )
+    return response.data[0]['contents'] if response.data else None
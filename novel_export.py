@@ -0,0 +1,324 @@
+"""
+소설 한 편을 Markdown / EPUB / PDF로 내보냅니다.
+
+회차 본문은 (회차, 본문)을 하나씩 내보내는 이터레이터로 받아서
+한 번에 한 회차씩만 메모리에 올린 채 파일에 바로 씁니다.
+만든 파일은 소설의 회차 버전 지문(fingerprint)을 키로 캐시하므로
+내용이 바뀌지 않았다면 다시 만들지 않습니다.
+"""
+import hashlib
+import html
+import os
+import re
+import time
+import uuid
+import zipfile
+
+DEFAULT_EXPORT_DIR = os.path.join(".cache", "exports")
+DEFAULT_MAX_EXPORT_BYTES = 200 * 1024 * 1024   # 200MB
+DEFAULT_MAX_EXPORT_AGE = 7 * 24 * 60 * 60      # 7일
+STALE_TEMP_SECONDS = 60 * 60                   # 이보다 오래된 .tmp는 중단된 내보내기로 보고 삭제
+
+FORMATS = {
+    "Markdown": ("md", "text/markdown"),
+    "EPUB": ("epub", "application/epub+zip"),
+    "PDF": ("pdf", "application/pdf"),
+}
+
+
+def novel_fingerprint(versions):
+    """
+    [(회차, 갱신 시각)] 목록으로 소설 버전 지문을 만듭니다.
+    회차가 추가되거나 다시 저장되면 값이 바뀝니다.
+    """
+    payload = "|".join(f"{chapter}:{updated_at}" for chapter, updated_at in versions)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _paragraphs(text):
+    return [p.strip() for p in re.split(r"\n\s*\n|\n", text) if p.strip()]
+
+
+# ---------- Markdown ----------
+
+def write_markdown(out, title, chapters):
+    out.write(f"# {title}\n\n".encode("utf-8"))
+    for chapter, text in chapters:
+        out.write(f"## {chapter}화\n\n".encode("utf-8"))
+        for paragraph in _paragraphs(text):
+            out.write(f"{paragraph}\n\n".encode("utf-8"))
+
+
+# ---------- EPUB ----------
+
+_CONTAINER_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+
+
+def write_epub(out, title, chapters, chapter_numbers):
+    """
+    EPUB 3 파일을 씁니다. 목차와 매니페스트는 회차 번호만으로 만들고,
+    본문은 회차별 XHTML로 하나씩 압축해 넣습니다.
+    """
+    book_id = uuid.uuid5(uuid.NAMESPACE_URL, f"novel:{title}")
+    safe_title = html.escape(title)
+    with zipfile.ZipFile(out, "w") as epub:
+        # mimetype은 압축하지 않은 첫 번째 항목이어야 합니다.
+        epub.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        epub.writestr("META-INF/container.xml", _CONTAINER_XML, compress_type=zipfile.ZIP_DEFLATED)
+
+        manifest = "\n".join(
+            f'    <item id="c{n}" href="chapter_{n}.xhtml" media-type="application/xhtml+xml"/>'
+            for n in chapter_numbers
+        )
+        spine = "\n".join(f'    <itemref idref="c{n}"/>' for n in chapter_numbers)
+        epub.writestr("OEBPS/content.opf", f"""<?xml version="1.0" encoding="UTF-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id" xml:lang="ko">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+    <dc:identifier id="book-id">urn:uuid:{book_id}</dc:identifier>
+    <dc:title>{safe_title}</dc:title>
+    <dc:language>ko</dc:language>
+  </metadata>
+  <manifest>
+    <item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>
+{manifest}
+  </manifest>
+  <spine>
+{spine}
+  </spine>
+</package>
+""", compress_type=zipfile.ZIP_DEFLATED)
+
+        toc = "\n".join(f'      <li><a href="chapter_{n}.xhtml">{n}화</a></li>' for n in chapter_numbers)
+        epub.writestr("OEBPS/nav.xhtml", f"""<?xml version="1.0" encoding="UTF-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" xml:lang="ko">
+<head><title>{safe_title}</title></head>
+<body>
+  <nav epub:type="toc">
+    <h1>{safe_title}</h1>
+    <ol>
+{toc}
+    </ol>
+  </nav>
+</body>
+</html>
+""", compress_type=zipfile.ZIP_DEFLATED)
+
+        for chapter, text in chapters:
+            body = "\n".join(f"<p>{html.escape(p)}</p>" for p in _paragraphs(text))
+            epub.writestr(f"OEBPS/chapter_{chapter}.xhtml", f"""<?xml version="1.0" encoding="UTF-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="ko">
+<head><title>{chapter}화</title></head>
+<body>
+<h2>{chapter}화</h2>
+{body}
+</body>
+</html>
+""", compress_type=zipfile.ZIP_DEFLATED)
+
+
+# ---------- PDF ----------
+# 외부 라이브러리 없이 PDF를 직접 씁니다. 한글은 PDF 표준 CID 글꼴
+# (HYSMyeongJo-Medium, UniKS-UCS2-H)을 사용하므로 글꼴 파일을 넣지 않습니다.
+
+_PAGE_W, _PAGE_H = 595, 842          # A4 (pt)
+_MARGIN = 56
+_FONT_SIZE = 11
+_LEADING = 17
+
+
+def _char_width(ch):
+    # 한글/한자 등 전각 문자는 1em, 그 외는 0.5em으로 근사
+    return _FONT_SIZE if ord(ch) > 0x2E80 else _FONT_SIZE * 0.5
+
+
+def _wrap(text, width):
+    lines, line, used = [], "", 0.0
+    for ch in text:
+        w = _char_width(ch)
+        if used + w > width and line:
+            lines.append(line)
+            line, used = "", 0.0
+            if ch == " ":
+                continue
+        line += ch
+        used += w
+    if line:
+        lines.append(line)
+    return lines
+
+
+def _pdf_text(text):
+    # UCS-2 16진 문자열 (BMP 밖 문자는 ?로 대체)
+    return "<" + "".join(
+        f"{ord(ch):04X}" if ord(ch) <= 0xFFFF else "003F" for ch in text
+    ) + ">"
+
+
+class _PdfWriter:
+    def __init__(self, out):
+        self.out = out
+        self.offsets = {}
+        self.position = 0
+        self.next_id = 1
+
+    def reserve(self):
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def raw(self, data):
+        self.out.write(data)
+        self.position += len(data)
+
+    def obj(self, obj_id, body):
+        self.offsets[obj_id] = self.position
+        self.raw(f"{obj_id} 0 obj\n".encode("latin-1") + body + b"\nendobj\n")
+
+
+def write_pdf(out, title, chapters):
+    """
+    페이지가 채워질 때마다 바로 파일에 씁니다. 페이지 목록(Pages)과
+    상호 참조표(xref)만 마지막에 씁니다.
+    """
+    pdf = _PdfWriter(out)
+    pdf.raw(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    catalog_id, pages_id, font_id, cid_font_id, descriptor_id = (pdf.reserve() for _ in range(5))
+    page_ids = []
+
+    def flush_page(lines):
+        content = ["BT", f"/F1 {_FONT_SIZE} Tf", f"{_LEADING} TL", f"{_MARGIN} {_PAGE_H - _MARGIN} Td"]
+        for line in lines:
+            content.append(f"{_pdf_text(line)} Tj T*")
+        content.append("ET")
+        stream = "\n".join(content).encode("latin-1")
+        content_id, page_id = pdf.reserve(), pdf.reserve()
+        pdf.obj(content_id, b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        pdf.obj(page_id, (
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {_PAGE_W} {_PAGE_H}] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode("latin-1"))
+        page_ids.append(page_id)
+
+    lines_per_page = (_PAGE_H - 2 * _MARGIN) // _LEADING
+    text_width = _PAGE_W - 2 * _MARGIN
+    page = _wrap(title, text_width) + [""]
+    for chapter, text in chapters:
+        # 제목 페이지 다음부터 회차마다 새 페이지에서 시작
+        if page:
+            flush_page(page)
+            page = []
+        page.extend([f"{chapter}화", ""])
+        for paragraph in _paragraphs(text):
+            for line in _wrap(paragraph, text_width) + [""]:
+                if len(page) >= lines_per_page:
+                    flush_page(page)
+                    page = []
+                page.append(line)
+    if page:
+        flush_page(page)
+
+    pdf.obj(descriptor_id, (
+        b"<< /Type /FontDescriptor /FontName /HYSMyeongJo-Medium /Flags 6 "
+        b"/FontBBox [0 -148 1001 880] /ItalicAngle 0 /Ascent 880 /Descent -148 "
+        b"/CapHeight 880 /StemV 59 >>"
+    ))
+    pdf.obj(cid_font_id, (
+        f"<< /Type /Font /Subtype /CIDFontType0 /BaseFont /HYSMyeongJo-Medium "
+        f"/CIDSystemInfo << /Registry (Adobe) /Ordering (Korea1) /Supplement 1 >> "
+        f"/FontDescriptor {descriptor_id} 0 R /DW 1000 >>"
+    ).encode("latin-1"))
+    pdf.obj(font_id, (
+        f"<< /Type /Font /Subtype /Type0 /BaseFont /HYSMyeongJo-Medium-UniKS-UCS2-H "
+        f"/Encoding /UniKS-UCS2-H /DescendantFonts [{cid_font_id} 0 R] >>"
+    ).encode("latin-1"))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    pdf.obj(pages_id, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1"))
+    pdf.obj(catalog_id, f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode("latin-1"))
+
+    xref_position = pdf.position
+    size = pdf.next_id
+    xref = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+    for obj_id in range(1, size):
+        xref.append(f"{pdf.offsets[obj_id]:010d} 00000 n \n")
+    pdf.raw("".join(xref).encode("latin-1"))
+    pdf.raw(f"trailer\n<< /Size {size} /Root {catalog_id} 0 R >>\nstartxref\n{xref_position}\n%%EOF\n".encode("latin-1"))
+
+
+# ---------- 캐시 ----------
+
+def prune_exports(export_dir=DEFAULT_EXPORT_DIR, max_bytes=DEFAULT_MAX_EXPORT_BYTES,
+                  max_age=DEFAULT_MAX_EXPORT_AGE, keep=()):
+    """
+    오래된 파일과 남은 .tmp를 지우고, 전체 크기가 max_bytes를 넘으면
+    가장 오래 쓰이지 않은(수정 시각 기준) 파일부터 지웁니다. keep의 경로는 지우지 않습니다.
+    """
+    now = time.time()
+    keep = {os.path.abspath(p) for p in keep}
+    files = []
+    for entry in os.scandir(export_dir):
+        if not entry.is_file() or os.path.abspath(entry.path) in keep:
+            continue
+        stat = entry.stat()
+        limit = STALE_TEMP_SECONDS if entry.name.endswith(".tmp") else max_age
+        if now - stat.st_mtime > limit:
+            _remove(entry.path)
+        elif not entry.name.endswith(".tmp"):
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in files) + sum(os.path.getsize(p) for p in keep if os.path.exists(p))
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        _remove(path)
+        total -= size
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass  # 다른 세션이 먼저 지웠거나 사용 중
+
+
+def export_novel(title, fmt, chapter_numbers, read_chapter, fingerprint, export_dir=DEFAULT_EXPORT_DIR):
+    """
+    소설을 fmt("Markdown", "EPUB", "PDF") 형식 파일로 만들고 경로를 반환합니다.
+    같은 지문(fingerprint)으로 이미 만든 파일이 있으면 그대로 반환합니다.
+    read_chapter(회차)가 None을 반환하면(그 사이 저장소에서 사라진 회차) ValueError를 냅니다.
+    (경로, 캐시 적중 여부)
+    """
+    extension, _ = FORMATS[fmt]
+    os.makedirs(export_dir, exist_ok=True)
+    safe_title = re.sub(r'[\\/:*?"<>|\s]+', "_", title.strip()) or "untitled"
+    path = os.path.join(export_dir, f"{safe_title}-{fingerprint}.{extension}")
+    if os.path.exists(path):
+        os.utime(path)  # 최근 사용 표시 (정리할 때 뒤로 밀림)
+        return path, True
+
+    def read(chapter):
+        text = read_chapter(chapter)
+        if text is None:
+            raise ValueError(f"{chapter}화 본문을 저장소에서 찾을 수 없습니다.")
+        return text
+
+    chapters = ((n, read(n)) for n in chapter_numbers)
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temp_path, "wb") as out:
+            if fmt == "Markdown":
+                write_markdown(out, title, chapters)
+            elif fmt == "EPUB":
+                write_epub(out, title, chapters, chapter_numbers)
+            else:
+                write_pdf(out, title, chapters)
+        os.replace(temp_path, path)  # 다 쓴 뒤에만 캐시에 보이도록
+    except BaseException:
+        _remove(temp_path)
+        raise
+    prune_exports(export_dir, keep=(path,))
+    return path, False
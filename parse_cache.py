@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+DEFAULT_PARSE_CACHE_PATH = os.path.join(".cache", "stanza_parses.sqlite3")
+# 저장하는 문장 dict 형식이 바뀌면 올림 (이전 형식의 캐시 항목은 다시 분석)
+PARSE_FORMAT_VERSION = 2
+
+# 문장 끝 마침표로 오인하기 쉬운 네덜란드어 약어
+_ABBREVIATIONS = {
+    "bijv", "bv", "dhr", "mevr", "mr", "dr", "ir", "ing", "prof", "nr", "blz", "ca", "enz",
+    "etc", "jl", "st", "o.a", "m.a.w", "d.w.z", "i.p.v", "a.s", "z.g.a.n", "t.o.v",
+}
+# 문장부호 뒤 공백, 또는 빈 줄(문단 경계). 줄 하나만 바뀐 곳은 줄바꿈된 본문일 수 있으므로 공백으로 봅니다.
+_BOUNDARY_RE = re.compile(r"[.!?…]+[\"'»”)]*\s+|\n[^\S\n]*\n\s*")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_sentence(text):
+    """
+    공백만 정리합니다. 대소문자와 문장부호는 분석 결과에 영향을 주므로 그대로 둡니다.
+    """
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def split_sentences(text):
+    """
+    Stanza를 거치지 않는 가벼운 문장 분리. 빈 줄에서는 항상 나누고, 마침표 뒤는 대문자/숫자/따옴표로
+    시작하고 앞 단어가 약어가 아닐 때만 나눕니다. 줄 하나만 바뀐 곳은 공백으로 봅니다.
+    애매하면 나누지 않으며, 한 조각이 여러 문장이어도 Stanza가 조각 안에서 다시 나눕니다.
+    """
+    chunks, start = [], 0
+    for match in _BOUNDARY_RE.finditer(text):
+        end = match.end()
+        if match.group(0).count("\n") < 2:
+            following = text[end:end + 2]
+            if not following or not (following[0].isupper() or following[0].isdigit()
+                                     or following[0] in "\"'«“("):
+                continue
+            last_word = text[start:match.start()].rsplit(None, 1)[-1:] or [""]
+            if last_word[0].lower().lstrip("(") in _ABBREVIATIONS:
+                continue
+        chunk = normalize_sentence(text[start:end])
+        if chunk:
+            chunks.append(chunk)
+        start = end
+    tail = normalize_sentence(text[start:])
+    if tail:
+        chunks.append(tail)
+    return chunks
+
+
+def sentence_to_dict(sentence):
+    """
+    Stanza Sentence를 캐시에 저장할 수 있는 dict로 바꿉니다.
+    실행하지 않은 처리기(pos, depparse 등)의 값은 None입니다.
+    multiword는 mwt가 여러 단어로 나눈 토큰의 [첫 단어 id, 끝 단어 id, 원래 형태]입니다 (CoNLL-U 범위 줄).
+    """
+    return {
+        "text": sentence.text,
+        "words": [
+            {
+                "id": word.id, "text": word.text, "lemma": word.lemma,
+                "upos": word.upos, "head": word.head, "deprel": word.deprel,
+            }
+            for word in sentence.words
+        ],
+        "entities": [{"text": ent.text, "type": ent.type} for ent in getattr(sentence, "ents", [])],
+        "multiword": [
+            [token.id[0], token.id[-1], token.text] for token in sentence.tokens if len(token.id) > 1
+        ],
+    }
+
+
+def make_stanza_parser(pipeline, processors=None):
+    """
+    여러 조각을 한 번의 Stanza 호출(bulk_process)로 분석하는 함수를 만듭니다.
+    조각마다 [문장 dict] 목록을 반환합니다.
+    processors를 주면 파이프라인에 올라간 처리기 중 그 처리기만 실행합니다.
+    """
+    import stanza
+
+    def parse_batch(chunks):
+        docs = pipeline.bulk_process([stanza.Document([], text=chunk) for chunk in chunks], processors=processors)
+        return [[sentence_to_dict(s) for s in doc.sentences] for doc in docs]
+
+    return parse_batch
+
+
+def pack_sentence(sentence):
+    """
+    전송용 압축 형태: [문장, [[id, 단어, 표제어, 품사, 헤드, 의존 관계], ...], [[개체명, 유형], ...],
+    [[첫 단어 id, 끝 단어 id, 토큰], ...]]
+    """
+    return [
+        sentence["text"],
+        [[w["id"], w["text"], w["lemma"], w["upos"], w["head"], w["deprel"]] for w in sentence["words"]],
+        [[ent["text"], ent["type"]] for ent in sentence["entities"]],
+        sentence.get("multiword", []),
+    ]
+
+
+def unpack_sentence(packed):
+    text, words, entities, multiword = packed
+    return {
+        "text": text,
+        "words": [
+            {"id": i, "text": t, "lemma": lemma, "upos": upos, "head": head, "deprel": deprel}
+            for i, t, lemma, upos, head, deprel in words
+        ],
+        "entities": [{"text": t, "type": kind} for t, kind in entities],
+        "multiword": multiword,
+    }
+
+
+def fetch_server_info(url, timeout=3):
+    """
+    분석 서버의 처리기 설정과 Stanza 버전. 서버에 연결할 수 없거나, 모델 로드에 실패했거나,
+    아직 모델을 불러오는 중이면 기다리지 않고 RuntimeError를 냅니다.
+    """
+    import requests
+
+    try:
+        response = requests.get(f"{url}/health", timeout=timeout)
+        response.raise_for_status()
+        info = response.json()
+    except requests.RequestException as e:
+        raise RuntimeError(f"분석 서버에 연결할 수 없습니다 ({e})") from e
+    if info.get("error"):
+        raise RuntimeError(f"분석 서버가 모델을 불러오지 못했습니다 ({info['error']})")
+    if not info.get("ready"):
+        raise RuntimeError("분석 서버가 아직 모델을 불러오는 중입니다")
+    return info
+
+
+def make_remote_parser(url, timeout=120):
+    """
+    parse_server.py로 조각들을 보내 분석하는 함수 (make_stanza_parser와 같은 형태)
+    """
+    import requests
+
+    session = requests.Session()
+
+    def parse_batch(chunks):
+        response = session.post(f"{url}/parse", json={"chunks": chunks}, timeout=timeout)
+        response.raise_for_status()
+        return [[unpack_sentence(s) for s in doc] for doc in response.json()["docs"]]
+
+    return parse_batch
+
+
+class SentenceParseCache:
+    """
+    문장 단위 분석 결과 캐시 (메모리 LRU + SQLite 디스크).
+    입력을 문장으로 나눈 뒤 처음 보는 문장만 모아 한 번에 Stanza로 보내고,
+    결과를 원래 순서대로 다시 조립합니다. 키는 (파이프라인 설정, 정리된 문장)의 해시입니다.
+    """
+
+    def __init__(self, parse_batch, config_key, path=DEFAULT_PARSE_CACHE_PATH, capacity=2048):
+        self.parse_batch = parse_batch
+        self.config_key = config_key
+        self.capacity = capacity
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS parses (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def key(self, chunk):
+        payload = f"{PARSE_FORMAT_VERSION}\x00{self.config_key}\x00{normalize_sentence(chunk)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def parse(self, text):
+        """
+        텍스트 전체의 문장 dict 목록을 반환합니다.
+        """
+        chunks = split_sentences(text)
+        keys = [self.key(chunk) for chunk in chunks]
+        results = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    results[key] = self._memory[key]
+                    self.memory_hits += 1
+            missing = [k for k in dict.fromkeys(keys) if k not in results]
+            if missing:
+                placeholders = ",".join("?" * len(missing))
+                for key, result in self._conn.execute(
+                    f"SELECT key, result FROM parses WHERE key IN ({placeholders})", missing
+                ):
+                    results[key] = json.loads(result)
+                    self._remember(key, results[key])
+                    self.disk_hits += 1
+
+        # 새 문장만 한 번의 배치로 분석 (같은 문장이 여러 번 나와도 한 번만)
+        pending = {}
+        for chunk, key in zip(chunks, keys):
+            if key not in results:
+                pending.setdefault(key, chunk)
+        if pending:
+            parsed = self.parse_batch(list(pending.values()))
+            with self._lock, self._conn:
+                for key, result in zip(pending, parsed):
+                    results[key] = result
+                    self._remember(key, result)
+                    self.misses += 1
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO parses (key, result) VALUES (?, ?)",
+                    [(key, json.dumps(results[key], ensure_ascii=False)) for key in pending],
+                )
+
+        sentences = []
+        for key in keys:
+            sentences.extend(results[key])
+        return sentences
+
+    def stats_caption(self):
+        total = self.memory_hits + self.disk_hits + self.misses
+        return (
+            f"🧠 문장 분석 캐시: 메모리 {self.memory_hits} / 디스크 {self.disk_hits} / "
+            f"새로 분석 {self.misses} (전체 {total}문장)"
+        )
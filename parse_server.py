@@ -0,0 +1,130 @@
+"""
+여러 Streamlit 세션이 함께 쓰는 로컬 네덜란드어 분석 서버.
+
+Stanza 파이프라인을 프로세스 하나에 한 번만 올리고, 동시에 들어온 요청들을
+MicroBatcher로 모아 bulk_process 한 번으로 분석합니다. 응답은 키 없는 배열 형태(pack_sentence)입니다.
+모델을 한 벌만 두려면 작업자 1개로 실행하세요.
+
+    uvicorn parse_server:app --host 127.0.0.1 --port 8765 --workers 1
+    PARSE_SERVER_URL=http://127.0.0.1:8765 streamlit run nlp_analysis_app.py
+"""
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from fastapi import FastAPI, Query, Response
+from pydantic import BaseModel
+
+from parse_cache import make_stanza_parser, pack_sentence
+from warm_start import BackgroundLoader, StartupTimings
+
+# 모든 화면(표/시각화/개체명)에 필요한 처리기를 한 번에 실행
+PROCESSORS = os.environ.get("PARSE_SERVER_PROCESSORS", "tokenize,mwt,pos,lemma,depparse,ner")
+MAX_WAIT_MS = float(os.environ.get("PARSE_SERVER_MAX_WAIT_MS", "10"))
+MAX_CHUNKS = int(os.environ.get("PARSE_SERVER_MAX_CHUNKS", "64"))
+
+
+class MicroBatcher:
+    """
+    여러 스레드(요청)에서 들어온 조각을 잠깐(max_wait초) 모아 parse_batch 한 번으로 분석합니다.
+    분석 중에 들어온 요청은 다음 묶음으로 함께 처리됩니다. parse_batch처럼 호출할 수 있습니다.
+    """
+
+    def __init__(self, parse_batch, max_wait=0.01, max_chunks=64):
+        self.parse_batch = parse_batch
+        self.max_wait = max_wait
+        self.max_chunks = max_chunks
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name="parse-batcher", daemon=True).start()
+
+    def __call__(self, chunks):
+        if not chunks:
+            return []
+        future = Future()
+        self._queue.put((chunks, future))
+        return future.result()
+
+    def _collect(self):
+        pending = [self._queue.get()]
+        size = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_chunks:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            try:
+                results = self.parse_batch([chunk for chunks, _ in pending for chunk in chunks])
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += len(pending)
+            start = 0
+            for chunks, future in pending:
+                future.set_result(results[start:start + len(chunks)])
+                start += len(chunks)
+
+
+app = FastAPI()
+timings = StartupTimings()
+
+
+def load_parser():
+    stanza = timings.import_module("stanza")
+    pipeline = stanza.Pipeline("nl", processors=PROCESSORS, download_method=None, verbose=False)
+    return make_stanza_parser(pipeline)
+
+
+# 서버가 뜨자마자 백그라운드에서 모델 로드 시작
+loader = BackgroundLoader("파이프라인 로드", load_parser, timings)
+batcher = MicroBatcher(lambda chunks: loader.result()(chunks), MAX_WAIT_MS / 1000, MAX_CHUNKS)
+
+
+class ParseRequest(BaseModel):
+    chunks: list[str]
+
+
+@app.post("/parse")
+def parse(request: ParseRequest):
+    docs = batcher(request.chunks)
+    body = json.dumps(
+        {"docs": [[pack_sentence(s) for s in doc] for doc in docs]},
+        ensure_ascii=False, separators=(",", ":"),
+    )
+    return Response(body, media_type="application/json")
+
+
+@app.get("/health")
+def health(wait: bool = Query(False, description="모델 로드가 끝날 때까지 기다릴지 여부")):
+    if wait:
+        loader.wait()
+    error = loader.error()
+    ready = loader.ready() and error is None
+    stanza_version = timings.import_module("stanza").__version__ if ready else None
+    return {
+        "ready": ready,
+        # 로드에 실패했으면 클라이언트가 기다리지 않고 바로 포기하도록 원인을 알림
+        "error": f"{type(error).__name__}: {error}" if error is not None else None,
+        "processors": PROCESSORS,
+        "stanza": stanza_version,
+        "batches": batcher.batches,
+        "requests": batcher.requests,
+        "timings": timings.steps,
+    }
@@ -0,0 +1,119 @@
+import datetime
+import hashlib
+import threading
+import time
+
+from token_budget import estimate_tokens
+
+# 제공자 측 컨텍스트 캐시를 만들 수 있는 최소 토큰 수 (모델별)
+PROVIDER_MIN_TOKENS = {
+    "gemini-1.5-flash": 32_768,
+    "gemini-2.5-flash": 1_024,
+    "gemini-2.5-pro": 2_048,
+}
+DEFAULT_TTL_SECONDS = 60 * 60
+
+
+def _create_gemini_cached_model(model_name, system_prompt, prefix_text, ttl_seconds):
+    """
+    Gemini 컨텍스트 캐시(CachedContent)를 만들고 그 캐시를 사용하는 모델을 반환합니다.
+    """
+    import google.generativeai as genai
+    from google.generativeai import caching
+
+    cached_content = caching.CachedContent.create(
+        model=f"models/{model_name}",
+        system_instruction=system_prompt,
+        contents=[prefix_text],
+        ttl=datetime.timedelta(seconds=ttl_seconds),
+    )
+    return genai.GenerativeModel.from_cached_content(cached_content=cached_content)
+
+
+class PromptPrefixCache:
+    """
+    매 회차 요청마다 반복되는 고정 앞부분(시스템 프롬프트 + 소설 설정)을 재사용합니다.
+
+    1. 제공자 캐시: 앞부분이 모델의 최소 캐시 크기 이상이면 Gemini 컨텍스트 캐시를
+       (계정, 모델, 앞부분)마다 한 번 만들고, 이후 요청에는 달라진 부분(delta)만 보냅니다.
+    2. 로컬 대체: 제공자 캐시를 쓸 수 없으면 앞부분을 그대로 보냅니다.
+       사용자가 압축 형식을 선택했을 때(compact=True)만 설정 블록을 압축 형식(JSON)으로 보냅니다.
+    """
+
+    def __init__(self, create_cached_model=_create_gemini_cached_model, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.create_cached_model = create_cached_model
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._provider = {}         # prefix_key -> (cached model, 만료 시각)
+        self._provider_failed = set()
+        self._creating = {}         # prefix_key -> 만드는 중인 스레드들이 공유하는 잠금
+        self.sent_tokens = 0
+        self.saved_tokens = 0
+
+    @staticmethod
+    def prefix_key(model_name, system_prompt, prefix_text, account=""):
+        payload = "\x00".join([account, model_name, system_prompt, prefix_text])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _cached(self, key):
+        with self._lock:
+            cached = self._provider.get(key)
+            if cached and cached[1] > time.time():
+                return cached[0]
+            return None
+
+    def _provider_model(self, key, model_name, system_prompt, prefix_text):
+        min_tokens = PROVIDER_MIN_TOKENS.get(model_name)
+        if min_tokens is None or estimate_tokens([system_prompt, prefix_text]) < min_tokens:
+            return None
+        with self._lock:
+            if key in self._provider_failed:
+                return None
+            creating = self._creating.setdefault(key, threading.Lock())
+        cached_model = self._cached(key)
+        if cached_model is not None:
+            return cached_model
+
+        # 네트워크 호출은 전역 잠금 밖에서 (같은 앞부분을 만드는 요청끼리만 기다림)
+        with creating:
+            cached_model = self._cached(key)
+            if cached_model is not None:
+                return cached_model
+            try:
+                model = self.create_cached_model(model_name, system_prompt, prefix_text, self.ttl_seconds)
+            except Exception:
+                with self._lock:
+                    self._provider_failed.add(key)  # 지원되지 않으면 이 앞부분은 로컬 대체만 사용
+                return None
+            with self._lock:
+                # 만료 직전의 캐시를 쓰지 않도록 여유를 둠
+                self._provider[key] = (model, time.time() + self.ttl_seconds * 0.9)
+            return model
+
+    def prepare(self, model, model_name, system_prompt, prefix_text, compact_prefix_text, delta,
+                compact=False, account=""):
+        """
+        요청에 사용할 (모델, 프롬프트 파트, 방식)을 반환합니다.
+        방식은 "provider", "compact", "full" 중 하나입니다.
+        compact는 사용자의 압축 형식 설정, account는 API 키 등 계정 구분 값입니다.
+        """
+        full_tokens = estimate_tokens([system_prompt, prefix_text, delta])
+        prefix = compact_prefix_text if compact else prefix_text
+        key = self.prefix_key(model_name, system_prompt, prefix, account)
+        cached_model = self._provider_model(key, model_name, system_prompt, prefix)
+        if cached_model is not None:
+            model, parts, mode = cached_model, [delta], "provider"
+        else:
+            parts, mode = [system_prompt, prefix, delta], "compact" if compact else "full"
+        sent = estimate_tokens(parts)
+        with self._lock:
+            self.sent_tokens += sent
+            self.saved_tokens += full_tokens - sent
+        return model, parts, mode
+
+    @staticmethod
+    def context_tokens(system_prompt, prefix_text, compact_prefix_text, delta, compact=False):
+        """
+        모델 컨텍스트에 실제로 들어가는 토큰 수 (제공자 캐시에 올린 앞부분 포함)
+        """
+        return estimate_tokens([system_prompt, compact_prefix_text if compact else prefix_text, delta])
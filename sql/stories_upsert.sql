@@ -0,0 +1,5 @@
+-- 로컬 저장소(story_store.py)의 동기화 upsert를 위한 제약 조건
+-- (title, chapter)가 같은 행은 하나만 존재하도록 합니다.
+-- 기존에 중복 행이 있으면 먼저 정리한 뒤 실행해야 합니다.
+alter table stories
+    add constraint stories_title_chapter_key unique (title, chapter);
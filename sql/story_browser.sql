@@ -0,0 +1,27 @@
+-- 소설 불러오기 화면용 조회 함수
+-- Supabase SQL Editor에서 한 번 실행하면 됩니다.
+
+-- (title, chapter) 조회와 제목별 집계를 위한 인덱스
+create index if not exists stories_title_chapter_idx on stories (title, chapter);
+
+-- 중복 없는 제목 목록을 서버에서 페이지 단위로 반환합니다.
+-- total_titles는 전체 제목 수 (페이지 수 계산용)
+create or replace function story_titles(p_limit integer default 20, p_offset integer default 0)
+returns table (title text, chapter_count bigint, total_titles bigint)
+language sql stable as $$
+    select title, count(*) as chapter_count, count(*) over () as total_titles
+    from stories
+    group by title
+    order by title
+    limit p_limit offset p_offset;
+$$;
+
+-- 한 소설의 회차 목록과 각 회차의 글자 수를 한 번에 반환합니다.
+create or replace function story_chapters(p_title text)
+returns table (chapter integer, length integer)
+language sql stable as $$
+    select chapter::integer, char_length(contents) as length
+    from stories
+    where title = p_title
+    order by chapter;
+$$;
@@ -0,0 +1,238 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # 의미 검색에만 필요
+    np = None
+
+DEFAULT_INDEX_PATH = os.path.join(".cache", "story_search.sqlite3")
+
+# 의미 검색용 다국어 문장 임베딩 모델 (sentence-transformers 설치 시에만 사용)
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+PASSAGE_CHARS = 400
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize(text):
+    """
+    공백을 하나로 합치고 소문자로 바꿉니다.
+    """
+    return _SPACE_RE.sub(" ", text).strip().lower()
+
+
+def bigrams(text):
+    """
+    한국어는 조사가 붙어 띄어쓰기 단위 검색이 잘 맞지 않으므로
+    공백을 제외한 글자 2-gram을 색인 단위로 사용합니다.
+    """
+    grams = set()
+    for token in normalize(text).split(" "):
+        for i in range(len(token) - 1):
+            grams.add(token[i:i + 2])
+    return grams
+
+
+def split_passages(text, size=PASSAGE_CHARS):
+    """
+    문단/문장 경계를 따라 의미 검색용 구간으로 나눕니다.
+    """
+    sentences = re.split(r"(?<=[.!?。…])\s+|\n+", text)
+    passages, current = [], ""
+    for sentence in sentences:
+        if current and len(current) + len(sentence) > size:
+            passages.append(current.strip())
+            current = ""
+        current += sentence + " "
+    if current.strip():
+        passages.append(current.strip())
+    return passages
+
+
+def _snippet(contents, phrase, width=60):
+    flat = normalize(contents)
+    position = flat.find(normalize(phrase))
+    if position < 0:
+        return flat[:width * 2]
+    start = max(0, position - width)
+    return ("…" if start else "") + flat[start:position + len(phrase) + width] + "…"
+
+
+class StorySearchIndex:
+    """
+    저장된 모든 회차에 대한 검색 색인.
+    - 정확한 구절 검색: 글자 2-gram 역색인으로 후보 회차를 좁힌 뒤 원문에서 확인
+    - 의미 검색(선택): 구간별 문장 임베딩과 코사인 유사도
+    회차를 저장할 때마다 index_chapter()로 해당 회차만 다시 색인합니다.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, embedding_model=None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                doc_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                chapter INTEGER NOT NULL,
+                contents TEXT NOT NULL,
+                UNIQUE (title, chapter)
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                gram TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                PRIMARY KEY (gram, doc_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS passages (
+                doc_id INTEGER NOT NULL,
+                passage TEXT NOT NULL,
+                embedding BLOB NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+        self.embedding_model = embedding_model
+        self._encoder = None
+        self._matrix = None  # 의미 검색용 임베딩 행렬 (메모리 캐시)
+        self._meta = []
+
+    @property
+    def semantic_available(self):
+        return self.embedding_model is not None and np is not None
+
+    def _encode(self, texts):
+        if self._encoder is None:
+            from sentence_transformers import SentenceTransformer
+            self._encoder = SentenceTransformer(self.embedding_model)
+        return self._encoder.encode(texts, normalize_embeddings=True).astype("float32")
+
+    def doc_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def index_chapter(self, title, chapter, contents):
+        """
+        한 회차를 (다시) 색인합니다.
+        """
+        embeddings = None
+        passages = []
+        if self.semantic_available:
+            passages = split_passages(contents)
+            embeddings = self._encode(passages) if passages else None
+
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT doc_id FROM docs WHERE title = ? AND chapter = ?", (title, chapter)
+            ).fetchone()
+            if row:
+                doc_id = row[0]
+                self._conn.execute("UPDATE docs SET contents = ? WHERE doc_id = ?", (contents, doc_id))
+                self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+                self._conn.execute("DELETE FROM passages WHERE doc_id = ?", (doc_id,))
+            else:
+                doc_id = self._conn.execute(
+                    "INSERT INTO docs (title, chapter, contents) VALUES (?, ?, ?)", (title, chapter, contents)
+                ).lastrowid
+            self._conn.executemany(
+                "INSERT INTO postings (gram, doc_id) VALUES (?, ?)",
+                [(gram, doc_id) for gram in bigrams(contents)],
+            )
+            if embeddings is not None:
+                self._conn.executemany(
+                    "INSERT INTO passages (doc_id, passage, embedding) VALUES (?, ?, ?)",
+                    [(doc_id, p, e.tobytes()) for p, e in zip(passages, embeddings)],
+                )
+            self._matrix = None
+
+    def index_missing(self, keys, load_contents):
+        """
+        (제목, 회차) 목록 중 아직 색인되지 않은 회차만 본문을 읽어(load_contents(제목, 회차)) 색인합니다.
+        """
+        with self._lock:
+            indexed = set(self._conn.execute("SELECT title, chapter FROM docs").fetchall())
+        count = 0
+        for title, chapter in keys:
+            if (title, chapter) in indexed:
+                continue
+            contents = load_contents(title, chapter)
+            if contents is not None:
+                self.index_chapter(title, chapter, contents)
+                count += 1
+        return count
+
+    def search_phrase(self, phrase, limit=20):
+        """
+        구절이 그대로 등장하는 회차를 찾습니다.
+        [{"title", "chapter", "count", "snippet"}]와 소요 시간(ms)을 반환합니다.
+        """
+        start = time.perf_counter()
+        target = normalize(phrase)
+        grams = sorted(bigrams(phrase))
+        with self._lock:
+            if grams:
+                # 2-gram이 모두 등장하는 회차만 후보로 (역색인 교집합)
+                placeholders = ",".join("?" * len(grams))
+                candidates = self._conn.execute(
+                    f"SELECT d.title, d.chapter, d.contents FROM docs d WHERE d.doc_id IN ("
+                    f"SELECT doc_id FROM postings WHERE gram IN ({placeholders}) "
+                    f"GROUP BY doc_id HAVING COUNT(*) = ?)",
+                    (*grams, len(grams)),
+                ).fetchall()
+            else:
+                # 한 글자 검색은 역색인을 쓸 수 없으므로 본문을 직접 확인 (%, _는 글자 그대로 찾음)
+                escaped = phrase.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                candidates = self._conn.execute(
+                    "SELECT title, chapter, contents FROM docs WHERE contents LIKE ? ESCAPE '\\'", (f"%{escaped}%",)
+                ).fetchall()
+
+        matches = []
+        for title, chapter, contents in candidates:
+            count = normalize(contents).count(target)
+            if count:
+                matches.append((count, title, chapter, contents))
+        matches.sort(key=lambda m: (-m[0], m[1], m[2]))
+        # 미리보기 문장은 화면에 보여줄 상위 결과에 대해서만 만듭니다.
+        results = [
+            {"title": title, "chapter": chapter, "count": count, "snippet": _snippet(contents, phrase)}
+            for count, title, chapter, contents in matches[:limit]
+        ]
+        return results, (time.perf_counter() - start) * 1000
+
+    def search_semantic(self, query, limit=10):
+        """
+        "…하는 장면" 같은 질의와 의미가 가까운 구간을 찾습니다.
+        [{"title", "chapter", "score", "snippet"}]와 소요 시간(ms)을 반환합니다.
+        """
+        if not self.semantic_available:
+            raise RuntimeError("의미 검색을 사용하려면 numpy와 sentence-transformers가 필요합니다.")
+        start = time.perf_counter()
+        with self._lock:
+            if self._matrix is None:
+                rows = self._conn.execute(
+                    "SELECT d.title, d.chapter, p.passage, p.embedding "
+                    "FROM passages p JOIN docs d ON d.doc_id = p.doc_id"
+                ).fetchall()
+                self._meta = [(r[0], r[1], r[2]) for r in rows]
+                self._matrix = (
+                    np.vstack([np.frombuffer(r[3], dtype="float32") for r in rows])
+                    if rows else np.zeros((0, 1), dtype="float32")
+                )
+            matrix, meta = self._matrix, self._meta
+        if not meta:
+            return [], (time.perf_counter() - start) * 1000
+
+        scores = matrix @ self._encode([query])[0]
+        top = np.argsort(-scores)[:limit]
+        results = [
+            {"title": meta[i][0], "chapter": meta[i][1], "score": float(scores[i]), "snippet": meta[i][2]}
+            for i in top
+        ]
+        return results, (time.perf_counter() - start) * 1000
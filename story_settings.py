@@ -0,0 +1,141 @@
+import hashlib
+import json
+from dataclasses import asdict, dataclass, fields
+from functools import lru_cache
+
+# 세션 상태에서 그대로 가져오는 설정 키 (다중 선택 항목은 리스트)
+SESSION_KEYS = (
+    'perspective', 'novel_genre', 'literary_style', 'theme',
+    'background_time', 'background_space', 'background_social',
+    'main_character_background', 'main_character_appearance',
+    'main_character_ability', 'main_character_superpower',
+    'main_character_personality', 'main_character_relationship',
+)
+
+
+@dataclass(frozen=True)
+class StorySettings:
+    """
+    소설의 기본 설정 14개 항목.
+    불변(frozen) 객체이므로 해시가 가능하고, 렌더링 결과를 설정 단위로 캐시할 수 있습니다.
+    """
+    perspective: str
+    novel_genre: tuple
+    literary_style: tuple
+    theme: tuple
+    background_time: tuple
+    background_space: tuple
+    background_social: tuple
+    name: str
+    age: int
+    gender: str
+    job: str
+    main_character_background: tuple
+    main_character_appearance: tuple
+    main_character_ability: tuple
+    main_character_superpower: tuple
+    main_character_personality: tuple
+    main_character_relationship: tuple
+
+    @classmethod
+    def from_session(cls, session_state, name, age, gender, job):
+        """
+        st.session_state와 주인공 입력값으로 설정 객체를 만듭니다.
+        """
+        values = {}
+        for key in SESSION_KEYS:
+            value = session_state[key]
+            values[key] = tuple(value) if isinstance(value, list) else value
+        return cls(name=name, age=int(age), gender=gender, job=job, **values)
+
+    @property
+    def settings_hash(self):
+        """
+        설정 내용의 안정적인 해시. 생성 결과 캐시 키로 사용할 수 있습니다.
+        """
+        payload = json.dumps(asdict(self), ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+# 사람이 읽는 설정 블록 템플릿 (모듈 로드 시 한 번만 구성)
+_SETTINGS_TEMPLATE = "\n".join([
+    "1. 시점: {perspective}",
+    "2. 장르: {novel_genre}",
+    "3. 문체: {literary_style}",
+    "4. 주제: {theme}",
+    "5. 시간적 배경: {background_time}",
+    "6. 공간적 배경: {background_space}",
+    "7. 사회적 환경: {background_social}",
+    "8. 주인공 이름: {name}, 나이: {age}, 성별: {gender}, 직업: {job}",
+    "9. 주인공 배경: {main_character_background}",
+    "10. 주인공 외모: {main_character_appearance}",
+    "11. 주인공 능력: {main_character_ability}",
+    "12. 주인공 초능력: {main_character_superpower}",
+    "13. 주인공 성격: {main_character_personality}",
+    "14. 주인공 주변 관계: {main_character_relationship}",
+])
+
+# 압축 형식에서 사용할 짧은 키
+_COMPACT_KEYS = {
+    'perspective': "시점", 'novel_genre': "장르", 'literary_style': "문체", 'theme': "주제",
+    'background_time': "시대", 'background_space': "공간", 'background_social': "사회",
+    'name': "이름", 'age': "나이", 'gender': "성별", 'job': "직업",
+    'main_character_background': "배경", 'main_character_appearance': "외모",
+    'main_character_ability': "능력", 'main_character_superpower': "초능력",
+    'main_character_personality': "성격", 'main_character_relationship': "관계",
+}
+
+
+@lru_cache(maxsize=64)
+def render_settings_block(settings, compact=False):
+    """
+    설정 블록 문자열을 만듭니다. 같은 설정이면 캐시된 결과를 재사용합니다.
+    compact=True이면 토큰을 줄인 한 줄짜리 JSON을 반환합니다.
+    """
+    if compact:
+        data = {}
+        for f in fields(settings):
+            value = getattr(settings, f.name)
+            if value in ("", (), None):
+                continue  # 비어 있는 항목은 생략
+            data[_COMPACT_KEYS[f.name]] = list(value) if isinstance(value, tuple) else value
+        return "설정(JSON): " + json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    values = {
+        f.name: ", ".join(getattr(settings, f.name)) if f.type is tuple else getattr(settings, f.name)
+        for f in fields(settings)
+    }
+    return _SETTINGS_TEMPLATE.format(**values)
+
+
+def build_settings_prefix(settings, compact=False):
+    """
+    매 회차 요청에 반복되는 고정 앞부분 (소설 기본 설정)
+    """
+    return "다음은 소설의 기본 설정입니다.\n" + render_settings_block(settings, compact)
+
+
+def build_chapter_request(chapter_number, previous_content="", world_state_table=""):
+    """
+    회차마다 달라지는 요청 부분. 1화는 이전 내용 없이, 2화 이상은 이전 내용을 포함합니다.
+    world_state_table이 있으면 이전 회차 전체 대신 상태 표와 직전 회차(previous_content)만 넣습니다.
+    """
+    if chapter_number == 1 or not previous_content:
+        return f"위 설정을 기반으로 2500자 이내의 소설 {chapter_number}화를 작성해주세요."
+    if world_state_table:
+        return (
+            f"위 설정을 바탕으로 **바로 직전의 내용에 이어서** 소설 {chapter_number}화를 작성해주세요.\n"
+            "아래 상태 표의 인물·장소 이름을 그대로 사용하고, 진행 중인 사건이 자연스럽게 이어지도록 해주세요.\n\n"
+            "--- 현재까지의 인물·세계 상태 ---\n"
+            f"{world_state_table}\n"
+            "--- 직전 회차 내용 ---\n"
+            f"{previous_content}\n"
+            "---"
+        )
+    return (
+        f"위 설정을 바탕으로 **바로 직전의 내용에 이어서** 소설 {chapter_number}화를 작성해주세요.\n"
+        "이전 회차의 내용을 참고하여 스토리가 자연스럽게 이어지도록 해주세요.\n\n"
+        "--- 이전 회차 내용 ---\n"
+        f"{previous_content}\n"
+        "---"
+    )
@@ -0,0 +1,299 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_STORE_PATH = os.path.join(".cache", "stories.sqlite3")
+
+logger = logging.getLogger(__name__)
+
+
+class StoryStore:
+    """
+    생성된 소설 회차를 저장하는 로컬 SQLite 저장소 (원본 데이터).
+    회차를 저장하면 같은 트랜잭션에서 outbox에 동기화 작업이 쌓이고,
+    SupabaseReplicator가 이를 백그라운드에서 Supabase로 보냅니다.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chapters (
+                title TEXT NOT NULL,
+                chapter INTEGER NOT NULL,
+                contents TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (title, chapter)
+            );
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                chapter INTEGER NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT
+            );
+            CREATE TABLE IF NOT EXISTS world_states (
+                title TEXT NOT NULL,
+                chapter INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                trusted INTEGER NOT NULL DEFAULT 1,
+                PRIMARY KEY (title, chapter)
+            );
+            """
+        )
+        # 이전 버전 파일 갱신 (열이 없었거나 used_model이라는 이름이었음)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(world_states)")]
+        if "used_model" in columns:
+            self._conn.execute("ALTER TABLE world_states RENAME COLUMN used_model TO trusted")
+        elif "trusted" not in columns:
+            self._conn.execute("ALTER TABLE world_states ADD COLUMN trusted INTEGER NOT NULL DEFAULT 1")
+        self._conn.commit()
+        # 저장 시 동기화 스레드를 깨우기 위한 이벤트
+        self.changed = threading.Event()
+        # 회차 저장 후 호출할 함수들 - listener(title, chapter, contents)
+        # listeners는 저장 직후 바로(캐시 무효화처럼 가벼운 작업),
+        # background_listeners는 별도 스레드에서 차례로(검색 색인처럼 느린 작업) 호출합니다.
+        self.listeners = []
+        self.background_listeners = []
+        self.listener_error = None
+        self._events = queue.Queue()
+        self._dispatcher = None
+
+    def save_chapter(self, title, chapter, contents):
+        """
+        회차를 로컬에 저장(같은 회차면 덮어쓰기)하고 동기화 작업을 예약합니다.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO chapters (title, chapter, contents, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (title, chapter) DO UPDATE SET contents = excluded.contents, "
+                "updated_at = excluded.updated_at",
+                (title, chapter, contents, time.time()),
+            )
+            self._conn.execute("INSERT INTO outbox (title, chapter) VALUES (?, ?)", (title, chapter))
+        self.changed.set()
+        # 저장은 이미 커밋됐으므로 리스너 오류는 저장 실패로 보고하지 않고 기록만 합니다.
+        for listener in self.listeners:
+            self._notify(listener, title, chapter, contents)
+        if self.background_listeners:
+            self._start_dispatcher()
+            self._events.put((title, chapter, contents))
+
+    def _notify(self, listener, title, chapter, contents):
+        try:
+            listener(title, chapter, contents)
+        except Exception as e:
+            self.listener_error = e
+            logger.exception("회차 저장 리스너 오류 (%s %s화)", title, chapter)
+
+    def _start_dispatcher(self):
+        with self._lock:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name="story-listeners", daemon=True)
+                self._dispatcher.start()
+
+    def _dispatch(self):
+        while True:
+            title, chapter, contents = self._events.get()
+            for listener in self.background_listeners:
+                self._notify(listener, title, chapter, contents)
+
+    def chapter_keys(self):
+        """
+        저장된 모든 (제목, 회차) 목록 (본문은 읽지 않음)
+        """
+        with self._lock:
+            return self._conn.execute("SELECT title, chapter FROM chapters ORDER BY title, chapter").fetchall()
+
+    def load_chapter(self, title, chapter):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT contents FROM chapters WHERE title = ? AND chapter = ?", (title, chapter)
+            ).fetchone()
+        return row[0] if row else None
+
+    def list_chapters(self, title):
+        """
+        [(회차, 글자 수)]를 회차 순서로 반환합니다.
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT chapter, length(contents) FROM chapters WHERE title = ? ORDER BY chapter", (title,)
+            ).fetchall()
+
+    def chapter_versions(self, title):
+        """
+        [(회차, 갱신 시각)]을 회차 순서로 반환합니다 (본문은 읽지 않음).
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT chapter, updated_at FROM chapters WHERE title = ? ORDER BY chapter", (title,)
+            ).fetchall()
+
+    def iter_all(self):
+        """
+        저장된 모든 회차를 (제목, 회차, 본문)으로 하나씩 내보냅니다.
+        """
+        for title, chapter in self.chapter_keys():
+            yield title, chapter, self.load_chapter(title, chapter)
+
+    def save_world_state(self, title, chapter, state_json, trusted=True):
+        """
+        chapter화까지 반영한 인물/세계 상태(JSON)를 저장합니다.
+        trusted는 1화부터 이번 회차까지 모두 모델로 추출했는지 여부입니다.
+        False이면(로컬 추출이 섞임) 다음 추출의 기반으로만 쓰고 프롬프트에서 이전 회차를 대신하지 않습니다.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO world_states (title, chapter, state, trusted) VALUES (?, ?, ?, ?)",
+                (title, chapter, state_json, int(trusted)),
+            )
+
+    def load_world_state(self, title, before_chapter=None):
+        """
+        before_chapter 이전 회차까지 반영된 가장 최근 상태를 (회차, JSON, 신뢰 여부)로 반환합니다.
+        """
+        query = "SELECT chapter, state, trusted FROM world_states WHERE title = ?"
+        params = [title]
+        if before_chapter is not None:
+            query += " AND chapter < ?"
+            params.append(before_chapter)
+        with self._lock:
+            row = self._conn.execute(query + " ORDER BY chapter DESC LIMIT 1", params).fetchone()
+        return (row[0], row[1], bool(row[2])) if row else None
+
+    def titles(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT title FROM chapters ORDER BY title")]
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def due_batch(self, limit):
+        """
+        지금 보낼 수 있는 동기화 작업을 가져옵니다.
+        같은 (제목, 회차)가 여러 번 쌓였으면 최신 본문으로 한 번만 보냅니다.
+        ([outbox id], [행 dict])를 반환합니다.
+        """
+        with self._lock:
+            jobs = self._conn.execute(
+                "SELECT o.id, o.title, o.chapter, c.contents FROM outbox o "
+                "JOIN chapters c ON c.title = o.title AND c.chapter = o.chapter "
+                "WHERE o.next_attempt_at <= ? ORDER BY o.id LIMIT ?",
+                (time.time(), limit),
+            ).fetchall()
+        rows = {}
+        for _, title, chapter, contents in jobs:
+            rows[(title, chapter)] = {"title": title, "chapter": chapter, "contents": contents}
+        return [job[0] for job in jobs], list(rows.values())
+
+    def mark_synced(self, job_ids):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in job_ids])
+
+    def mark_failed(self, job_ids, error, max_backoff):
+        """
+        실패한 작업의 재시도 시각을 지수적으로 늦춥니다.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            for job_id in job_ids:
+                attempts = self._conn.execute(
+                    "SELECT attempts FROM outbox WHERE id = ?", (job_id,)
+                ).fetchone()[0] + 1
+                self._conn.execute(
+                    "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                    (attempts, now + min(max_backoff, 2 ** attempts), str(error), job_id),
+                )
+
+
+class ChapterCache:
+    """
+    최근에 본 회차 본문을 capacity개까지 보관하는 LRU 캐시.
+    세션마다 본문을 들고 있지 않고, 프로세스 전체가 이 캐시 하나를 공유합니다.
+    store.listeners에 등록되어 회차가 다시 저장되면 해당 항목을 비웁니다.
+    """
+
+    def __init__(self, store, capacity=32):
+        self.store = store
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        store.listeners.append(self._invalidate)
+
+    def _invalidate(self, title, chapter, contents):
+        with self._lock:
+            self._entries.pop((title, chapter), None)
+
+    def get(self, title, chapter):
+        key = (title, chapter)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        contents = self.store.load_chapter(title, chapter)
+        with self._lock:
+            self.misses += 1
+            if contents is not None:
+                self._entries[key] = contents
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+        return contents
+
+
+class SupabaseReplicator(threading.Thread):
+    """
+    outbox에 쌓인 회차를 묶어서 Supabase stories 테이블에 upsert하는 백그라운드 스레드.
+    (title, chapter) 기준 upsert이므로 같은 작업을 여러 번 보내도 결과가 같습니다.
+    """
+
+    def __init__(self, store, pool, batch_size=20, poll_interval=5.0, max_backoff=300):
+        super().__init__(name="supabase-replicator", daemon=True)
+        self.store = store
+        self.pool = pool
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self.last_error = None
+
+    def sync_once(self):
+        """
+        보낼 작업 한 묶음을 처리합니다. 처리한 outbox 작업 수를 반환합니다.
+        """
+        job_ids, rows = self.store.due_batch(self.batch_size)
+        if not job_ids:
+            return 0
+        try:
+            self.pool.run(lambda client: client.table('stories').upsert(
+                rows, on_conflict='title,chapter'
+            ).execute())
+        except Exception as e:
+            self.last_error = e
+            self.store.mark_failed(job_ids, e, self.max_backoff)
+            return 0
+        self.last_error = None
+        self.store.mark_synced(job_ids)
+        return len(job_ids)
+
+    def run(self):
+        while True:
+            self.store.changed.wait(self.poll_interval)
+            self.store.changed.clear()
+            while self.sync_once() == self.batch_size:
+                pass  # 밀린 작업이 남아 있으면 바로 다음 묶음 처리
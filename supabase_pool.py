@@ -0,0 +1,73 @@
+import threading
+import time
+
+import httpx
+from supabase import create_client
+
+# 헬스 체크 간격 (초). 이 시간 동안은 마지막으로 확인한 연결을 그대로 사용합니다.
+HEALTH_CHECK_INTERVAL = 60.0
+
+
+class SupabasePool:
+    """
+    프로세스 전체에서 하나의 Supabase 클라이언트를 공유합니다.
+    클라이언트 내부의 httpx 세션이 keep-alive 연결을 재사용하므로
+    요청마다 TLS 핸드셰이크를 다시 하지 않습니다.
+    일정 간격으로 헬스 체크를 하고, 실패하면 클라이언트를 새로 만듭니다.
+    """
+
+    def __init__(self, url, key, health_table='stories', health_interval=HEALTH_CHECK_INTERVAL):
+        self.url = url
+        self.key = key
+        self.health_table = health_table
+        self.health_interval = health_interval
+        self.reconnects = 0
+        self._lock = threading.Lock()
+        self._client = None
+        self._checked_at = 0.0
+
+    def _connect(self):
+        self._client = create_client(self.url, self.key)
+        self._checked_at = time.monotonic()
+
+    def _is_healthy(self):
+        try:
+            self._client.table(self.health_table).select('chapter').limit(1).execute()
+            return True
+        except Exception:
+            return False
+
+    def client(self):
+        """
+        공유 클라이언트를 반환합니다. 필요하면 헬스 체크 후 재연결합니다.
+        """
+        with self._lock:
+            if self._client is None:
+                self._connect()
+            elif time.monotonic() - self._checked_at > self.health_interval:
+                if self._is_healthy():
+                    self._checked_at = time.monotonic()
+                else:
+                    self.reconnects += 1
+                    self._connect()
+            return self._client
+
+    def reset(self):
+        """
+        다음 client() 호출에서 새 연결을 만들도록 합니다.
+        """
+        with self._lock:
+            self._client = None
+
+    def run(self, operation, retries=1):
+        """
+        operation(client)을 실행합니다. 연결 오류(httpx.TransportError)로 실패하면 재연결 후 다시 시도합니다.
+        """
+        for attempt in range(retries + 1):
+            try:
+                return operation(self.client())
+            except httpx.TransportError:
+                if attempt == retries:
+                    raise
+                self.reset()
+                self.reconnects += 1
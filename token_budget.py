@@ -0,0 +1,155 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# 토큰 수 근사치: 한글은 음절당 약 1토큰, 그 외 문자는 4자당 약 1토큰
+_HANGUL_RE = re.compile(r"[가-힣]")
+
+# 모델별 입력 컨텍스트 크기 (토큰)
+CONTEXT_WINDOWS = {
+    "gemini-1.5-flash": 1_048_576,
+    "gemini-1.5-pro": 2_097_152,
+    "gemini-2.5-flash": 1_048_576,
+    "gemini-2.5-pro": 1_048_576,
+}
+DEFAULT_CONTEXT_WINDOW = 1_048_576
+
+# 100만 토큰당 추정 비용 (USD, 입력/출력)
+PRICES_PER_MILLION = {
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-2.5-flash": (0.30, 2.50),
+}
+
+# 컨텍스트의 이 비율을 넘으면 경고
+WARN_RATIO = 0.9
+
+DEFAULT_METRICS_PATH = os.path.join(".cache", "story_metrics.sqlite3")
+
+
+def estimate_tokens(text):
+    """
+    네트워크 호출 없이 텍스트(또는 텍스트 리스트)의 토큰 수를 대략 계산합니다.
+    """
+    if not text:
+        return 0
+    if not isinstance(text, str):
+        return sum(estimate_tokens(part) for part in text)
+    hangul = len(_HANGUL_RE.findall(text))
+    return hangul + math.ceil((len(text) - hangul) / 4)
+
+
+def _base_model_name(model_name):
+    return model_name.split("/")[-1]
+
+
+def context_window(model_name):
+    return CONTEXT_WINDOWS.get(_base_model_name(model_name), DEFAULT_CONTEXT_WINDOW)
+
+
+def check_context(model_name, prompt_tokens, max_output_tokens=0):
+    """
+    프롬프트가 모델 컨텍스트를 넘거나 거의 다 채우면 경고 문구를 반환합니다.
+    문제가 없으면 None.
+    """
+    window = context_window(model_name)
+    needed = prompt_tokens + max_output_tokens
+    if needed > window:
+        return f"프롬프트가 모델 컨텍스트({window:,} 토큰)를 초과합니다: 약 {needed:,} 토큰"
+    if needed > window * WARN_RATIO:
+        return f"프롬프트가 모델 컨텍스트의 {needed / window:.0%}를 사용합니다 (약 {needed:,} 토큰)"
+    return None
+
+
+def estimate_cost(model_name, prompt_tokens, completion_tokens):
+    """
+    토큰 수로 추정 비용(USD)을 계산합니다. 가격 정보가 없으면 0.
+    """
+    price_in, price_out = PRICES_PER_MILLION.get(_base_model_name(model_name), (0.0, 0.0))
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+
+
+def usage_from_response(response, prompt_parts):
+    """
+    응답의 usage_metadata가 있으면 실제 토큰 수를, 없으면 추정치를 반환합니다.
+    (prompt_tokens, completion_tokens)
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None and getattr(usage, "prompt_token_count", 0):
+        return usage.prompt_token_count, usage.candidates_token_count
+    return estimate_tokens(prompt_parts), estimate_tokens(response.text)
+
+
+class MetricsTable:
+    """
+    생성 호출별 토큰 수, 지연 시간, 추정 비용을 로컬 SQLite에 기록합니다.
+    """
+
+    def __init__(self, path=DEFAULT_METRICS_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS generation_metrics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL NOT NULL,
+                app TEXT NOT NULL,
+                title TEXT,
+                chapter INTEGER,
+                model TEXT NOT NULL,
+                prompt_tokens INTEGER NOT NULL,
+                completion_tokens INTEGER NOT NULL,
+                latency REAL NOT NULL,
+                cost_usd REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def record(self, app, model, prompt_tokens, completion_tokens, latency, title=None, chapter=None):
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO generation_metrics "
+                "(created_at, app, title, chapter, model, prompt_tokens, completion_tokens, latency, cost_usd) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), app, title, chapter, model, prompt_tokens, completion_tokens, latency, cost),
+            )
+            self._conn.commit()
+        return cost
+
+    def rows(self, app=None, title=None):
+        """
+        기록을 회차 순서로 dict 리스트로 반환합니다.
+        """
+        query = ("SELECT chapter, model, prompt_tokens, completion_tokens, latency, cost_usd "
+                 "FROM generation_metrics WHERE 1 = 1")
+        params = []
+        if app is not None:
+            query += " AND app = ?"
+            params.append(app)
+        if title is not None:
+            query += " AND title = ?"
+            params.append(title)
+        query += " ORDER BY chapter, id"
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def timed_generate(model, prompt_parts, generation_config=None):
+    """
+    모델을 호출하고 (응답, 지연 시간, 입력 토큰, 출력 토큰)을 반환합니다.
+    """
+    start = time.perf_counter()
+    if generation_config is None:
+        response = model.generate_content(prompt_parts)
+    else:
+        response = model.generate_content(prompt_parts, generation_config=generation_config)
+    latency = time.perf_counter() - start
+    prompt_tokens, completion_tokens = usage_from_response(response, prompt_parts)
+    return response, latency, prompt_tokens, completion_tokens
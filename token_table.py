@@ -0,0 +1,214 @@
+"""
+문서 하나의 분석 결과를 열(column) 단위로 보관하는 토큰 표.
+
+id/헤드/품사 코드/의존 관계 코드는 NumPy 배열로, 품사와 의존 관계는 범주형 사전
+(코드 -> 라벨, 한국어 라벨)으로 한 번만 저장합니다. 결과 표, 의존 구문 그림의 키,
+CSV/CoNLL-U 내보내기가 모두 이 표에서 만들어지므로 분석 결과를 다시 순회하지 않습니다.
+"""
+import csv
+import io
+import re
+from collections import Counter
+
+import numpy as np
+
+# 품사 매핑
+POS_match = {
+    "ADJ"  : "형용사", "ADV"  : "부사", "ADP"  : "전치사", "AUX"  : "조동사",
+    "CCONJ": "접속사", "DET"  : "정관사", "NUM"  : "숫자", "NOUN" : "명사",
+    "PRON" : "대명사", "PROPN" : "고유명사", "PUNCT": "구두점", "VERB" : "동사"
+}
+
+# 의존 관계 매핑
+deprel_match = {
+    "nsubj": "주어", "obj": "목적어", "obl": "부사어", "root": "중심 동사", "amod": "형용사 수식",
+    "advmod": "부사 수식", "case": "격 표시", "compound": "복합어", "det": "한정사",
+    "nmod": "명사 수식", "conj": "접속", "cc": "접속사", "xcomp": "보어", "mark": "절 표지",
+    "cop": "연결 동사", "appos": "동격", "punct": "구두점", "parataxis": "병렬", "acl": "형용사절",
+    "acl:relcl":"명사 수식",
+    "expl:pv": "가주어",
+    "obl:arg": "필수 부사구",
+    "nmod:poss":"소유격 명사 수식어",
+    "aux": "보조 동사",
+    "flat" : "구성 요소",
+    "compound:prt":"분리전철",
+    "nummod":"수사의 명사 수식",
+    "nsubj:pass" : "수동태 명사 주어",
+    "aux:pass" : "수동태 조동사"
+}
+
+# 개체명 유형 매핑
+NER_match = {"PER": "인물", "LOC": "장소", "ORG": "기관", "MISC": "기타"}
+
+_SPACE_RE = re.compile(r"\s+")
+
+TABLE_COLUMNS = ["단어", "표제어", "품사", "품사 코드", "헤드 단어", "의존 관계", "의존 관계 코드"]
+
+
+class Categories:
+    """
+    라벨 <-> 정수 코드 사전. 코드 0은 값 없음(처리기를 실행하지 않음)입니다.
+    """
+
+    def __init__(self, korean):
+        self.korean = korean
+        self.labels = [None]
+        self._codes = {None: 0}
+
+    def code(self, label):
+        code = self._codes.get(label)
+        if code is None:
+            code = self._codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+    def label_array(self):
+        return np.array(self.labels, dtype=object)
+
+    def korean_array(self):
+        return np.array([self.korean.get(label, label) for label in self.labels], dtype=object)
+
+
+class TokenTable:
+    """
+    문장 dict 목록(parse_cache의 결과)으로 만드는 문서 단위 열 저장소.
+    sentence_offsets[i]:sentence_offsets[i + 1]이 i번째 문장의 행 범위입니다.
+    """
+
+    def __init__(self, sentences):
+        self.pos = Categories(POS_match)
+        self.deprel = Categories(deprel_match)
+        self.sentence_texts = [s["text"] for s in sentences]
+        self.entities = [s.get("entities", []) for s in sentences]
+        # 문장별 {첫 단어 id: (끝 단어 id, 토큰)} (CoNLL-U 범위 줄)
+        self.multiword = [{start: (end, text) for start, end, text in s.get("multiword", [])} for s in sentences]
+
+        lengths = [len(s["words"]) for s in sentences]
+        self.sentence_offsets = np.zeros(len(sentences) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.sentence_offsets[1:])
+        n = int(self.sentence_offsets[-1])
+
+        self.sentence_index = np.repeat(np.arange(len(sentences), dtype=np.int32), lengths)
+        self.ids = np.empty(n, dtype=np.int32)
+        self.heads = np.empty(n, dtype=np.int32)       # 0 = ROOT, -1 = 의존 분석 안 함
+        self.pos_codes = np.empty(n, dtype=np.int16)
+        self.deprel_codes = np.empty(n, dtype=np.int16)
+        self.texts = np.empty(n, dtype=object)
+        self.lemmas = np.empty(n, dtype=object)
+
+        row = 0
+        for sentence in sentences:
+            for word in sentence["words"]:
+                self.ids[row] = word["id"]
+                self.heads[row] = -1 if word["head"] is None else word["head"]
+                self.pos_codes[row] = self.pos.code(word["upos"])
+                self.deprel_codes[row] = self.deprel.code(word["deprel"])
+                self.texts[row] = word["text"]
+                self.lemmas[row] = word["lemma"]
+                row += 1
+
+    def __len__(self):
+        return len(self.sentence_texts)
+
+    @property
+    def has_dependencies(self):
+        return bool(len(self.heads)) and bool((self.heads >= 0).all())
+
+    def _rows(self, i):
+        return slice(int(self.sentence_offsets[i]), int(self.sentence_offsets[i + 1]))
+
+    def head_texts(self, rows=slice(None)):
+        """
+        각 행의 헤드 단어 (ROOT이면 'ROOT'). 문장 시작 행 + (헤드 - 1)로 한 번에 찾습니다.
+        """
+        heads = self.heads[rows]
+        starts = self.sentence_offsets[self.sentence_index[rows]]
+        targets = np.where(heads > 0, starts + heads - 1, 0)
+        return np.where(heads > 0, self.texts[targets], "ROOT")
+
+    def columns(self, rows=slice(None), with_dependencies=True):
+        """
+        결과 표의 열들을 TABLE_COLUMNS 순서대로 반환합니다.
+        """
+        pos = self.pos_codes[rows]
+        columns = [
+            self.texts[rows], self.lemmas[rows],
+            self.pos.korean_array()[pos], self.pos.label_array()[pos],
+        ]
+        if with_dependencies:
+            deprel = self.deprel_codes[rows]
+            columns += [
+                self.head_texts(rows),
+                self.deprel.korean_array()[deprel], self.deprel.label_array()[deprel],
+            ]
+        return columns
+
+    def sentence_frame(self, i, with_dependencies=True):
+        """
+        i번째 문장의 결과 표 (인덱스는 1부터)
+        """
+        import pandas as pd
+
+        columns = self.columns(self._rows(i), with_dependencies)
+        df = pd.DataFrame(dict(zip(TABLE_COLUMNS, columns)))
+        df.index = df.index + 1
+        return df
+
+    def arc_key(self, i):
+        """
+        arc_renderer에 넘길 (단어, 헤드, 의존 관계) 튜플
+        """
+        rows = self._rows(i)
+        deprels = self.deprel.label_array()[self.deprel_codes[rows]]
+        return tuple(zip(self.texts[rows].tolist(), self.heads[rows].tolist(), deprels.tolist()))
+
+    @staticmethod
+    def label_counts(categories, codes):
+        """
+        범주 코드 배열의 라벨별 개수 (값 없음 제외)
+        """
+        counts = np.bincount(codes, minlength=len(categories.labels))
+        return Counter({label: int(n) for label, n in zip(categories.labels, counts) if label is not None and n})
+
+    def to_csv(self):
+        """
+        문서 전체 결과 표 CSV (문장 번호, 단어 번호 포함)
+        """
+        output = io.StringIO()
+        writer = csv.writer(output)
+        with_dependencies = self.has_dependencies
+        writer.writerow(["문장", "번호"] + TABLE_COLUMNS[:7 if with_dependencies else 4])
+        columns = self.columns(with_dependencies=with_dependencies)
+        writer.writerows(zip(self.sentence_index + 1, self.ids, *columns))
+        return output.getvalue().encode("utf-8-sig")
+
+    def to_conllu(self, doc_id="1"):
+        """
+        문서 전체 CoNLL-U 문자열. 없는 값은 "_"로 씁니다.
+        # text 주석은 한 줄이어야 하므로 공백을 하나로 합치고, 여러 단어 토큰은 단어 줄 앞에 범위 줄(1-2)을 씁니다.
+        """
+        pos_labels = self.pos.label_array()
+        deprel_labels = self.deprel.label_array()
+
+        def field(value):
+            return "_" if value is None or value == "" else str(value)
+
+        lines = [f"# newdoc id = {doc_id}"]
+        for i, text in enumerate(self.sentence_texts):
+            lines.append(f"# sent_id = {doc_id}-{i + 1}")
+            lines.append(f"# text = {_SPACE_RE.sub(' ', text).strip()}")
+            multiword = self.multiword[i]
+            rows = self._rows(i)
+            for word_id, form, lemma, pos, head, deprel in zip(
+                self.ids[rows], self.texts[rows], self.lemmas[rows],
+                pos_labels[self.pos_codes[rows]], self.heads[rows], deprel_labels[self.deprel_codes[rows]],
+            ):
+                if word_id in multiword:
+                    end, token = multiword[word_id]
+                    lines.append("\t".join([f"{word_id}-{end}", field(token)] + ["_"] * 8))
+                lines.append("\t".join([
+                    str(word_id), field(form), field(lemma), field(pos), "_", "_",
+                    "_" if head < 0 else str(head), field(deprel), "_", "_",
+                ]))
+            lines.append("")
+        return "\n".join(lines) + "\n"
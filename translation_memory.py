@@ -0,0 +1,179 @@
+"""
+문장 단위 번역 메모리(TM).
+
+입력을 문장으로 나눠 SQLite에 저장된 번역을 먼저 찾고(완전 일치 -> 정규화 일치),
+처음 보는 문장만 모아 Gemini에 묶음(BATCH_SIZE문장) 단위로 보냅니다. 결과는 입력 문장 순서대로
+돌려주므로 분석 결과 표의 문장 번호와 그대로 맞춰 보여줄 수 있습니다.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import nullcontext
+
+DEFAULT_TM_PATH = os.path.join(".cache", "translation_memory.sqlite3")
+# SQLite의 바인딩 변수 개수 제한(오래된 버전은 999)보다 작게 나눠 조회
+SELECT_CHUNK = 500
+# 한 번의 번역 요청에 넣는 최대 문장 수 (응답 길이 제한과 실패 시 재요청 비용을 줄임)
+BATCH_SIZE = 50
+# 형식이 깨진 응답을 받았을 때 같은 batch를 요청하는 최대 횟수
+BATCH_ATTEMPTS = 2
+# 번역하지 못한 문장에 원문 대신 보여줄 표시
+FAILED_TRANSLATION = "⚠️ 번역 실패"
+
+TRANSLATION_PROMPT = (
+    "다음 JSON 배열의 네덜란드어 문장을 각각 자연스러운 한국어로 번역해줘. "
+    "앞뒤 문장의 문맥을 고려하여 정확하게 번역하고, 오역은 하지 말아줘. "
+    "문장을 합치거나 나누지 말고, 같은 순서와 같은 개수의 JSON 문자열 배열로만 답해줘.\n"
+)
+# JSON 배열로만 답하도록 요청 (genai GenerationConfig dict)
+TRANSLATION_CONFIG = {"response_mime_type": "application/json"}
+
+_QUOTES = str.maketrans({"“": '"', "”": '"', "„": '"', "«": '"', "»": '"', "‘": "'", "’": "'"})
+_SPACE_RE = re.compile(r"\s+")
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def normalize_for_match(text):
+    """
+    정규화 일치용 키: 유니코드 정규화, 따옴표 통일, 공백 정리, 소문자.
+    """
+    text = unicodedata.normalize("NFKC", text).translate(_QUOTES)
+    return _SPACE_RE.sub(" ", text).strip().lower()
+
+
+def build_translation_prompt(sentences):
+    return TRANSLATION_PROMPT + json.dumps(sentences, ensure_ascii=False)
+
+
+def parse_translations(text, expected):
+    """
+    모델 응답에서 번역 목록을 꺼냅니다. 형식이나 개수가 맞지 않으면 None.
+    """
+    try:
+        translations = json.loads(_FENCE_RE.sub("", text.strip()))
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(translations, list) or len(translations) != expected:
+        return None
+    return [str(t).strip() for t in translations]
+
+
+class TranslationMemory:
+    """
+    (모델, 원문) -> 번역을 저장하는 SQLite 번역 메모리.
+    정규화한 원문에도 색인을 두어 대소문자/공백/따옴표만 다른 문장도 찾습니다.
+    """
+
+    def __init__(self, model_name, path=DEFAULT_TM_PATH):
+        self.model_name = model_name
+        self.exact_hits = 0
+        self.normalized_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS segments (
+                model TEXT NOT NULL,
+                source TEXT NOT NULL,
+                normalized TEXT NOT NULL,
+                target TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (model, source)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS segments_normalized ON segments (model, normalized)")
+        self._conn.commit()
+
+    def _select(self, column, values):
+        rows = []
+        for i in range(0, len(values), SELECT_CHUNK):
+            chunk = values[i:i + SELECT_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows += self._conn.execute(
+                f"SELECT {column}, target FROM segments WHERE model = ? AND {column} IN ({placeholders})",
+                [self.model_name, *chunk],
+            ).fetchall()
+        return rows
+
+    def lookup(self, sentences):
+        """
+        {원문: (번역, "exact" 또는 "normalized")} (없는 문장은 빠짐)
+        통계는 서로 다른 원문 기준으로 셉니다 (같은 문장이 여러 번 나와도 한 번).
+        """
+        sources = list(dict.fromkeys(sentences))
+        found = {}
+        with self._lock:
+            if sources:
+                found.update((source, (target, "exact")) for source, target in self._select("source", sources))
+            rest = {normalize_for_match(s): s for s in sources if s not in found}
+            if rest:
+                targets = dict(self._select("normalized", list(rest)))
+                for normalized, source in rest.items():
+                    if normalized in targets:
+                        found[source] = (targets[normalized], "normalized")
+            for sentence in sources:
+                if sentence not in found:
+                    self.misses += 1
+                elif found[sentence][1] == "exact":
+                    self.exact_hits += 1
+                else:
+                    self.normalized_hits += 1
+        return found
+
+    def add(self, pairs):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO segments VALUES (?, ?, ?, ?, ?)",
+                [(self.model_name, source, normalize_for_match(source), target, now) for source, target in pairs],
+            )
+
+    def stats_caption(self):
+        total = self.exact_hits + self.normalized_hits + self.misses
+        return (
+            f"📚 번역 메모리: 완전 일치 {self.exact_hits} / 정규화 일치 {self.normalized_hits} / "
+            f"새로 번역 {self.misses} (서로 다른 문장 {total}개)"
+        )
+
+
+def _translate_batch(batch, memory, generate, rate_limiter):
+    """
+    batch를 한 번의 요청으로 번역합니다. 형식이 깨지면 이 batch만 다시 요청하고,
+    그래도 실패하면 반으로 나눠 요청합니다. 끝까지 실패한 문장은 FAILED_TRANSLATION.
+    """
+    for _ in range(BATCH_ATTEMPTS):
+        with rate_limiter or nullcontext():
+            text = generate(build_translation_prompt(batch))
+        translations = parse_translations(text, len(batch))
+        if translations is not None:
+            memory.add(zip(batch, translations))
+            return [(target, "new") for target in translations]
+    if len(batch) == 1:
+        return [(FAILED_TRANSLATION, "failed")]
+    middle = len(batch) // 2
+    return (_translate_batch(batch[:middle], memory, generate, rate_limiter)
+            + _translate_batch(batch[middle:], memory, generate, rate_limiter))
+
+
+def translate_sentences(sentences, memory, generate, rate_limiter=None, batch_size=BATCH_SIZE):
+    """
+    sentences와 같은 순서의 [(번역, 출처)] 목록. 출처는 "exact", "normalized", "new", "failed"입니다.
+    generate(prompt)는 모델 응답 텍스트를 반환합니다. 메모리에 없는 문장만 batch_size개씩 나눠
+    요청하고, 각 요청은 rate_limiter(컨텍스트 매니저)를 거칩니다. 형식이 깨진 응답은 메모리에
+    저장하지 않고, 번역하지 못한 문장은 원문 대신 FAILED_TRANSLATION으로 표시합니다.
+    """
+    found = memory.lookup(sentences)
+    misses = [s for s in dict.fromkeys(sentences) if s not in found]
+    for i in range(0, len(misses), batch_size):
+        batch = misses[i:i + batch_size]
+        found.update(zip(batch, _translate_batch(batch, memory, generate, rate_limiter)))
+    return [found[s] for s in sentences]
@@ -1,26 +1,30 @@
 import streamlit as st
 import google.generativeai as genai
-import os
-from supabase import create_client, Client
+from supabase_pool import SupabasePool
+from novel_archive import NovelArchive, archive_path_for
+from story_settings import StorySettings, build_chapter_request, build_settings_prefix
+from prompt_prefix import PromptPrefixCache
+
+# Supabase 연결 풀 (프로세스 전체의 모든 세션이 하나의 클라이언트를 공유)
+@st.cache_resource
+def get_supabase_pool():
+    url = st.secrets["supabase"]["url"]
+    key = st.secrets["supabase"]["key"]
+    return SupabasePool(url, key)
 
 # Supabase 클라이언트 초기화
 def init_supabase():
-    url = st.secrets["supabase"]["url"]
-    key = st.secrets["supabase"]["key"]
-    return create_client(url, key)
+    return get_supabase_pool().client()
 
 # Supabase에 저장하는 함수
 def save_to_supabase(title, chapter, contents):
     try:
-        # Supabase 연결
-        client = init_supabase()
-        
-        # 테이블에 저장
-        response = client.table('stories').insert({
+        # 공유 연결로 테이블에 저장 (연결이 끊겼으면 재연결 후 한 번 더 시도)
+        response = get_supabase_pool().run(lambda client: client.table('stories').insert({
             "title": title,
             "chapter": chapter,
             "contents": contents
-        }).execute()
+        }).execute())
 
         # 응답에서 상태 코드 및 데이터를 확인
         if response.data:  # 데이터가 존재하면 성공 처리
@@ -34,13 +38,16 @@ def save_to_supabase(title, chapter, contents):
         st.error(f"⚠️ Supabase 저장 중 오류가 발생했습니다: {e}")
 
 
-# 텍스트 파일 저장 함수
-def save_text_to_file(text, file_name, save_path):
-    os.makedirs(save_path, exist_ok=True)
-    file_path = os.path.join(save_path, file_name)
-    with open(file_path, 'w', encoding='utf-8') as file:
-        file.write(text)
-    return file_path
+# 소설 아카이브 저장 함수 (소설 한 편 = 파일 하나, 회차는 압축 블록으로 덧붙임)
+def save_chapter_to_archive(title, chapter_number, text, save_path="./MyGreatNovel"):
+    archive_path = archive_path_for(title, save_path)
+    NovelArchive(archive_path).append_chapter(chapter_number, text)
+    return archive_path
+
+# 고정 프롬프트 앞부분 재사용 (Gemini 컨텍스트 캐시 또는 로컬 압축 대체)
+@st.cache_resource
+def get_prefix_cache():
+    return PromptPrefixCache()
 
 # 페이지 설정
 st.set_page_config(page_title="AI 소설 생성기", layout="wide")
@@ -60,6 +67,11 @@ model_choice = st.sidebar.selectbox(
     '🧠 사용할 모델:',
     ('gemini-1.5-flash', 'gemini-2.5-flash')
 )
+compact_settings = st.sidebar.checkbox(
+    "설정을 압축 형식(JSON)으로 전송",
+    value=False,
+    help="소설 기본 설정을 한 줄 JSON으로 보내 프롬프트 토큰을 줄입니다."
+)
 
 # 모델 초기화
 if gemini_api_key:
@@ -211,29 +223,12 @@ if menu == "초기 세팅":
             ["부모", "형제", "친구", "악당", "조력자", "스승", "제자", "배우자", "연인"],
             default=st.session_state['main_character_relationship']
         )
-        
-    user_prompt_to_llm = f"""당신은 초인기 소설 작가입니다.
-                아래 정보를 기반으로 2500자 이내의 소설 {len(st.session_state['history'])+1}화를 작성해주세요.
-            
-
-                1. 시점: {st.session_state['perspective']}
-                2. 장르: {", ".join(st.session_state['novel_genre'])}
-                3. 문체: {", ".join(st.session_state['literary_style'])}
-                4. 주제: {", ".join(st.session_state['theme'])}
-                5. 시간적 배경: {", ".join(st.session_state['background_time'])}
-                6. 공간적 배경: {", ".join(st.session_state['background_space'])}
-                7. 사회적 환경: {", ".join(st.session_state['background_social'])}
-                8. 주인공 이름: {name}, 나이: {age}, 성별: {gender}, 직업: {job}
-                9. 주인공 배경: {", ".join(st.session_state['main_character_background'])}
-                10. 주인공 외모: {", ".join(st.session_state['main_character_appearance'])}
-                11. 주인공 능력: {", ".join(st.session_state['main_character_ability'])}
-                12. 주인공 초능력: {", ".join(st.session_state['main_character_superpower'])}
-                13. 주인공 성격: {", ".join(st.session_state['main_character_personality'])}
-                14. 주인공 주변 관계: {", ".join(st.session_state['main_character_relationship'])}
-                """
+
+    # 설정 객체 (설정이 같으면 프롬프트 블록은 캐시된 결과를 재사용)
+    story_settings = StorySettings.from_session(st.session_state, name, age, gender, job)
 
     # 소설 생성 후 Supabase에 저장 (제목 포함)
-    if st.button(f"소설 {len(st.session_state['history'])+1}화 생성하기 ✨"):
+    if st.button(f"소설 {len(st.session_state['history'])+1}화 생성하기 ✨", key="generate_chapter"):
         if not gemini_api_key:
             st.error("⚠️ Gemini API 키가 설정되지 않아 소설을 생성할 수 없습니다.")
         else:
@@ -242,33 +237,16 @@ if menu == "초기 세팅":
                 try:
                     previous_content = "\n\n".join(st.session_state['history']) if st.session_state['history'] else ""
                     
-                    # 새로운 프롬프트 생성
-                    full_prompt_for_this_turn = f"""
-
-
-                    다음 정보를 바탕으로 **바로 직전의 내용에 이어서** 소설 {len(st.session_state['history'])+1}화를 작성해주세요.
-                    이전 회차의 내용을 참고하여 스토리가 자연스럽게 이어지도록 해주세요.
-
-                    {previous_content}
-
-                    다음은 소설의 기본 설정입니다.
-                    1. 시점: {st.session_state['perspective']}
-                    2. 장르: {", ".join(st.session_state['novel_genre'])}
-                    3. 문체: {", ".join(st.session_state['literary_style'])}
-                    4. 주제: {", ".join(st.session_state['theme'])}
-                    5. 시간적 배경: {", ".join(st.session_state['background_time'])}
-                    6. 공간적 배경: {", ".join(st.session_state['background_space'])}
-                    7. 사회적 환경: {", ".join(st.session_state['background_social'])}
-                    8. 주인공 이름: {name}, 나이: {age}, 성별: {gender}, 직업: {job}
-                    9. 주인공 배경: {", ".join(st.session_state['main_character_background'])}
-                    10. 주인공 외모: {", ".join(st.session_state['main_character_appearance'])}
-                    11. 주인공 능력: {", ".join(st.session_state['main_character_ability'])}
-                    12. 주인공 초능력: {", ".join(st.session_state['main_character_superpower'])}
-                    13. 주인공 성격: {", ".join(st.session_state['main_character_personality'])}
-                    14. 주인공 주변 관계: {", ".join(st.session_state['main_character_relationship'])}
-                    """
+                    # 새로운 프롬프트 생성 (고정 앞부분은 재사용하고 달라진 부분만 전송)
+                    chapter_request = build_chapter_request(len(st.session_state['history'])+1, previous_content)
+                    settings_prefix = build_settings_prefix(story_settings)
+                    compact_prefix = build_settings_prefix(story_settings, compact=True)
+                    request_model, prompt_parts, _ = get_prefix_cache().prepare(
+                        model, model_choice, system_prompt, settings_prefix, compact_prefix, chapter_request,
+                        compact=compact_settings, account=gemini_api_key,
+                    )
                     # 모델에 프롬프트 요청
-                    response = model.generate_content([system_prompt, full_prompt_for_this_turn])
+                    response = request_model.generate_content(prompt_parts)
                     result_text = response.text
 
                     # Supabase에 저장
@@ -278,10 +256,8 @@ if menu == "초기 세팅":
                     st.session_state['history'].append(result_text)
 
                     # 파일 저장
-                    save_path = "./MygreatNovel"
-                    file_name = f"chapter_00{len(st.session_state['history'])}.txt"
                     try:
-                        file_path = save_text_to_file(result_text, file_name, save_path)
+                        file_path = save_chapter_to_archive(novel_title, len(st.session_state['history']), result_text)
                         st.success(f"소설 {len(st.session_state['history'])}화가 {file_path}에 저장되었습니다.")
                     except Exception as e:
                         st.error(f"⚠️ 파일 저장 중 오류가 발생했습니다: {e}")
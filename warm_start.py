@@ -0,0 +1,102 @@
+"""
+무거운 모델을 백그라운드 스레드에서 미리 로드하고, 시작 단계별 소요 시간을 기록합니다.
+
+Streamlit 화면은 바로 그려지고, 실제 분석이 필요할 때 loader.result()가
+로드가 끝날 때까지만 기다립니다. 기록된 시간은 로그(logging)와 화면 캡션으로 볼 수 있습니다.
+"""
+import importlib
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import Future, wait
+from contextlib import contextmanager
+
+logger = logging.getLogger("startup")
+
+
+class StartupTimings:
+    """
+    단계 이름 -> 소요 시간(초). 여러 스레드에서 기록할 수 있습니다.
+    """
+
+    def __init__(self):
+        self.steps = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.steps[name] = seconds
+        logger.info("%s: %.3fs", name, seconds)
+
+    @contextmanager
+    def measure(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def import_module(self, name):
+        """
+        처음 import할 때만 시간을 재서 기록합니다.
+        """
+        if name in sys.modules:
+            # 다른 스레드가 import 중이어도 import 잠금이 끝날 때까지 기다려 줌
+            return importlib.import_module(name)
+        with self.measure(f"import {name}"):
+            return importlib.import_module(name)
+
+    def caption(self):
+        with self._lock:
+            steps = list(self.steps.items())
+        if not steps:
+            return "⏱️ 기록된 시작 시간이 없습니다."
+        return "⏱️ " + " / ".join(f"{name} {seconds:.2f}초" for name, seconds in steps)
+
+
+class BackgroundLoader:
+    """
+    load()를 데몬 스레드에서 한 번 실행합니다. 결과(또는 예외)는 result()로 받습니다.
+    """
+
+    def __init__(self, name, load, timings=None):
+        self.name = name
+        self._load = load
+        self._timings = timings
+        self._future = Future()
+        threading.Thread(target=self._run, name=f"load-{name}", daemon=True).start()
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            result = self._load()
+        except BaseException as e:
+            self._future.set_exception(e)
+        else:
+            self._future.set_result(result)
+        finally:
+            if self._timings is not None:
+                self._timings.record(self.name, time.perf_counter() - start)
+
+    def ready(self):
+        """
+        로드가 끝났는지 (성공이든 실패든). 실패 여부는 error()로 확인합니다.
+        """
+        return self._future.done()
+
+    def wait(self, timeout=None):
+        """
+        로드가 끝날 때까지 기다립니다. 실패해도 예외를 내지 않습니다.
+        """
+        wait([self._future], timeout)
+        return self.ready()
+
+    def error(self):
+        """
+        로드가 실패했으면 그 예외, 아직 진행 중이거나 성공했으면 None.
+        """
+        return self._future.exception() if self._future.done() else None
+
+    def result(self, timeout=None):
+        return self._future.result(timeout)
@@ -0,0 +1,161 @@
+import json
+import re
+from dataclasses import asdict, dataclass, field
+
+# 회차가 끝날 때마다 상태를 갱신하는 저렴한 추출용 모델
+EXTRACTION_MODEL = "gemini-1.5-flash"
+
+EXTRACTION_PROMPT = """다음 소설 회차에서 인물, 관계, 장소, 사건의 변화를 추출해 JSON으로만 답하세요.
+이미 알려진 인물과 장소는 아래 목록의 이름을 그대로 사용하세요. 별명이나 호칭으로 바꾸지 마세요.
+알려진 인물: {characters}
+알려진 장소: {locations}
+진행 중인 사건: {threads}
+
+형식:
+{{"characters": [{{"name": "이름", "desc": "현재 상태 한 줄"}}],
+ "relationships": [{{"a": "이름", "b": "이름", "relation": "관계"}}],
+ "locations": [{{"name": "장소", "desc": "한 줄 설명"}}],
+ "new_threads": ["새로 시작된 사건"],
+ "resolved_threads": ["이번 회차에서 해결된 사건 (진행 중인 사건 문구 그대로)"]}}
+
+--- {chapter}화 ---
+{text}"""
+
+
+@dataclass
+class WorldState:
+    """
+    회차가 끝날 때마다 갱신되는 인물/관계/장소/진행 중인 사건 상태.
+    프롬프트에는 이전 회차 원문 대신 render_table()의 짧은 표를 넣습니다.
+    """
+    chapter: int = 0  # 마지막으로 반영한 회차
+    characters: dict = field(default_factory=dict)     # 이름 -> {"desc", "last_seen"}
+    relationships: dict = field(default_factory=dict)  # "A|B" -> 관계
+    locations: dict = field(default_factory=dict)      # 이름 -> {"desc", "last_seen"}
+    open_threads: list = field(default_factory=list)   # [{"thread", "since"}]
+
+    @classmethod
+    def seed(cls, settings):
+        """
+        소설 설정의 주인공과 공간적 배경으로 초기 상태를 만듭니다.
+        """
+        state = cls()
+        if settings.name:
+            desc = f"주인공, {settings.age}세 {settings.gender} {settings.job}".strip()
+            state.characters[settings.name] = {"desc": desc, "last_seen": 0}
+        for place in settings.background_space:
+            state.locations[place] = {"desc": "", "last_seen": 0}
+        return state
+
+    @classmethod
+    def from_json(cls, payload):
+        return cls(**json.loads(payload))
+
+    def to_json(self):
+        return json.dumps(asdict(self), ensure_ascii=False, separators=(",", ":"))
+
+    def apply(self, update, chapter):
+        """
+        추출 결과(update)를 반영합니다. 이름이 같으면 설명만 갱신합니다.
+        """
+        for item in update.get("characters", []):
+            name = str(item.get("name", "")).strip()
+            if name:
+                previous = self.characters.get(name, {}).get("desc", "")
+                self.characters[name] = {"desc": item.get("desc") or previous, "last_seen": chapter}
+        for item in update.get("relationships", []):
+            a, b = str(item.get("a", "")).strip(), str(item.get("b", "")).strip()
+            if a and b and item.get("relation"):
+                self.relationships["|".join(sorted((a, b)))] = item["relation"]
+        for item in update.get("locations", []):
+            name = str(item.get("name", "")).strip()
+            if name:
+                previous = self.locations.get(name, {}).get("desc", "")
+                self.locations[name] = {"desc": item.get("desc") or previous, "last_seen": chapter}
+        resolved = {str(t).strip() for t in update.get("resolved_threads", [])}
+        self.open_threads = [t for t in self.open_threads if t["thread"] not in resolved]
+        known = {t["thread"] for t in self.open_threads}
+        for thread in update.get("new_threads", []):
+            thread = str(thread).strip()
+            if thread and thread not in known:
+                self.open_threads.append({"thread": thread, "since": chapter})
+                known.add(thread)
+        self.chapter = chapter
+        return self
+
+    def render_table(self, max_items=12):
+        """
+        프롬프트용 상태 표. 최근에 등장한 항목부터 max_items개까지만 넣습니다.
+        """
+        def recent(entries):
+            return sorted(entries.items(), key=lambda kv: -kv[1]["last_seen"])[:max_items]
+
+        lines = [f"[{self.chapter}화까지의 상태]", "인물:"]
+        lines += [f"- {name}: {info['desc']} (최근 {info['last_seen']}화)" for name, info in recent(self.characters)]
+        if self.relationships:
+            lines.append("관계:")
+            lines += [
+                f"- {pair.replace('|', ' ↔ ')}: {relation}"
+                for pair, relation in list(self.relationships.items())[-max_items:]
+            ]
+        if self.locations:
+            lines.append("장소:")
+            lines += [
+                f"- {name}: {info['desc']}" if info["desc"] else f"- {name}"
+                for name, info in recent(self.locations)
+            ]
+        if self.open_threads:
+            lines.append("진행 중인 사건:")
+            lines += [f"- {t['thread']} ({t['since']}화~)" for t in self.open_threads[-max_items:]]
+        return "\n".join(lines)
+
+
+def build_extraction_prompt(state, chapter, text):
+    return EXTRACTION_PROMPT.format(
+        characters=", ".join(state.characters) or "없음",
+        locations=", ".join(state.locations) or "없음",
+        threads="; ".join(t["thread"] for t in state.open_threads) or "없음",
+        chapter=chapter,
+        text=text,
+    )
+
+
+def parse_update(text):
+    """
+    모델 응답에서 JSON 객체를 꺼냅니다. 코드 블록으로 감싸져 있어도 처리합니다.
+    """
+    match = re.search(r"\{.*\}", text, re.S)
+    if not match:
+        raise ValueError("상태 추출 응답에 JSON이 없습니다.")
+    update = json.loads(match.group(0))
+    if not isinstance(update, dict):
+        raise ValueError("상태 추출 응답 형식이 올바르지 않습니다.")
+    return update
+
+
+def extract_locally(state, text):
+    """
+    모델 호출 없이, 이미 알려진 인물/장소 중 본문에 등장한 항목만 갱신 대상으로 돌려줍니다.
+    """
+    return {
+        "characters": [{"name": name} for name in state.characters if name in text],
+        "locations": [{"name": name} for name in state.locations if name in text],
+    }
+
+
+def update_world_state(state, chapter, text, generate=None):
+    """
+    회차 본문으로 상태를 갱신합니다. generate(prompt) -> 응답 문자열이 주어지면
+    저렴한 모델로 추출하고, 실패하거나 없으면 로컬 추출로 대체합니다.
+    (갱신된 상태, 모델 추출 사용 여부)를 반환합니다.
+    """
+    update, used_model = None, False
+    if generate is not None:
+        try:
+            update = parse_update(generate(build_extraction_prompt(state, chapter, text)))
+            used_model = True
+        except Exception:
+            update = None
+    if update is None:
+        update = extract_locally(state, text)
+    return state.apply(update, chapter), used_model